@@ -0,0 +1,142 @@
+"""Overlapping mailbox and send operations, thread pools vs. one event loop.
+
+Runs against the local stand-ins in `imap_stub.py` and `smtp_stub.py` with
+a simulated round trip per command. Each IMAP operation logs in, selects
+INBOX, fetches the headers of the last emails and logs out; each SMTP one
+submits one message. Before, the actions ran imaplib and smtplib on pools
+of 4 and 2 threads, so at most 4 mailboxes were read at once; the
+asyncio clients overlap all of them on the loop. Last, a session in IDLE
+is checked to wake up on new mail.
+
+    rye run python benchmarks/async_mail.py
+"""
+
+import asyncio
+import imaplib
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+
+from imap_stub import ImapStub, make_message
+from smtp_stub import SmtpStub
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.aiosmtp import SmtpClient
+
+MAILBOX_SIZE = 200
+N_EMAILS = 20
+N_LISTS = 32
+N_SENDS = 16
+LATENCY = 0.005
+ITEMS = "(UID BODY.PEEK[HEADER.FIELDS (SUBJECT FROM)])"
+TAIL = f"{MAILBOX_SIZE - N_EMAILS + 1}:*"
+
+
+def message(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "me@example.com"
+    msg["To"] = "you@example.com"
+    msg["Subject"] = f"Report {i}"
+    msg.set_content(f"Report {i}\n.leading dot\n")
+    return msg
+
+
+def list_blocking(port: int) -> int:
+    mail = imaplib.IMAP4("127.0.0.1", port)
+    mail.login("me@example.com", "password")
+    mail.select("INBOX")
+    _, data = mail.fetch(TAIL, ITEMS)
+    mail.logout()
+    return sum(isinstance(item, tuple) for item in data)
+
+
+def send_blocking(port: int, i: int) -> None:
+    with smtplib.SMTP("127.0.0.1", port) as server:
+        server.login("me@example.com", "password")
+        server.send_message(message(i))
+
+
+async def list_async(port: int) -> int:
+    mail = await ImapClient("127.0.0.1", port, use_ssl=False).connect()
+    await mail.login("me@example.com", "password")
+    await mail.select("INBOX")
+    _, data = await mail.fetch(TAIL, ITEMS)
+    await mail.logout()
+    return sum(isinstance(item, tuple) for item in data)
+
+
+async def send_async(port: int, i: int) -> None:
+    server = SmtpClient("127.0.0.1", port, starttls=False)
+    try:
+        await server.connect()
+        await server.login("me@example.com", "password")
+        await server.send_message(message(i), "me@example.com", ["you@example.com"])
+    finally:
+        await server.quit()
+
+
+async def threaded(imap_port: int, smtp_port: int) -> list:
+    loop = asyncio.get_running_loop()
+    with (
+        ThreadPoolExecutor(4) as imap_workers,
+        ThreadPoolExecutor(2) as smtp_workers,
+    ):
+        return await asyncio.gather(
+            *(
+                loop.run_in_executor(imap_workers, list_blocking, imap_port)
+                for _ in range(N_LISTS)
+            ),
+            *(
+                loop.run_in_executor(smtp_workers, send_blocking, smtp_port, i)
+                for i in range(N_SENDS)
+            ),
+        )
+
+
+async def on_loop(imap_port: int, smtp_port: int) -> list:
+    return await asyncio.gather(
+        *(list_async(imap_port) for _ in range(N_LISTS)),
+        *(send_async(smtp_port, i) for i in range(N_SENDS)),
+    )
+
+
+async def measure(label: str, run, smtp: SmtpStub) -> None:
+    smtp.messages.clear()
+    started = time.perf_counter()
+    results = await run()
+    elapsed = time.perf_counter() - started
+
+    assert results[:N_LISTS] == [N_EMAILS] * N_LISTS, results
+    assert len(smtp.messages) == N_SENDS
+    assert all(b"\r\n.leading dot\r\n" in data for _, _, data in smtp.messages)
+    print(f"{label:<14} lists={N_LISTS} sends={N_SENDS} {elapsed * 1000:8.2f}ms")
+
+
+async def check_idle(imap: ImapStub) -> None:
+    mail = await ImapClient("127.0.0.1", imap.port, use_ssl=False).connect()
+    await mail.login("me@example.com", "password")
+    await mail.select("INBOX")
+
+    assert await mail.idle(0.05) == []
+    loop = asyncio.get_running_loop()
+    loop.call_later(0.05, imap.append, make_message(MAILBOX_SIZE, attachment_kb=0))
+    changes = await mail.idle(5)
+    assert changes == [("EXISTS", [str(MAILBOX_SIZE + 1).encode()])], changes
+    # the session is usable after IDLE
+    status, _ = await mail.noop()
+    assert status == "OK"
+    await mail.logout()
+    print("idle           woke up on new mail")
+
+
+async def main():
+    messages = [make_message(i, attachment_kb=0) for i in range(MAILBOX_SIZE)]
+    with ImapStub(messages, LATENCY) as imap, SmtpStub(LATENCY) as smtp:
+        await measure("thread pools", lambda: threaded(imap.port, smtp.port), smtp)
+        await measure("asyncio", lambda: on_loop(imap.port, smtp.port), smtp)
+        await check_idle(imap)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Per-call dispatch overhead of the router, separate lookups vs. `ActionSpec`.
+
+The old path looked the action up three times, built the input with
+`input_type(**input_data)` and instantiated a fresh action (and `LLM()`)
+per call. Both paths run an action whose `execute` does nothing.
+
+    rye run python benchmarks/dispatch.py
+"""
+
+import asyncio
+import time
+
+from pydantic import BaseModel
+
+from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.registry import action_registry, register_action
+from agnia_smart_digest.external_services.llm import LLM
+from agnia_smart_digest.router import execute_action, form_result_message, load_action
+
+N_CALLS = 20_000
+INPUT_DATA = {"user_request": "show me my last 5 emails"}
+
+
+class NoopInputParams(BaseModel):
+    user_request: str
+
+
+class NoopOutputParams(BaseModel):
+    answer: str
+
+
+def noop_message(obj: NoopOutputParams) -> tuple[str, NoopOutputParams]:
+    return obj.answer, obj
+
+
+@register_action(
+    NoopInputParams,
+    NoopOutputParams,
+    "Benchmark",
+    result_message_func=noop_message,
+)
+class NoopAction(Action[NoopInputParams, NoopOutputParams]):
+    action_name = "noop_action"
+    coalesce = False
+
+    def __init__(self):
+        super().__init__(action_name="noop_action")
+        self.llm = LLM()
+
+    async def execute(self, input_data: NoopInputParams) -> NoopOutputParams:
+        return NoopOutputParams(answer=input_data.user_request)
+
+
+async def legacy_dispatch() -> BaseModel:
+    action_obj = action_registry.get_action_object("Benchmark", "noop_action")
+    input_type = action_registry.get_input_type("Benchmark", "noop_action")
+    input_params = input_type(**INPUT_DATA)
+    output = await action_obj().execute(input_params)
+    former = action_registry.get_result_message_former("Benchmark", "noop_action")
+    former(output)
+    return output
+
+
+async def spec_dispatch() -> BaseModel:
+    spec = await load_action("Benchmark", "noop_action")
+    output = await execute_action(spec, INPUT_DATA)
+    form_result_message(spec, output)
+    return output
+
+
+async def run(label: str, dispatch) -> None:
+    await dispatch()
+    started = time.perf_counter()
+    for _ in range(N_CALLS):
+        await dispatch()
+    elapsed = (time.perf_counter() - started) / N_CALLS
+    print(f"{label:<7} {elapsed * 1e6:7.2f}us per call")
+
+
+async def main() -> None:
+    await run("legacy", legacy_dispatch)
+    await run("spec", spec_dispatch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
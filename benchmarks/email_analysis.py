@@ -0,0 +1,121 @@
+"""CPU time per email of a digest, each action on its own vs. `EmailAnalysis`.
+
+The digest cleans, ranks and summarizes the same emails. Before, every
+action normalized and tokenized the text itself, `summarize_email` with
+`word_tokenize` over the whole text and again over every sentence. Now
+the actions share one `EmailAnalysis` per text, cached by content hash:
+the first digest computes it, the next one, which sees mostly the same
+emails, looks it up.
+
+    rye run python benchmarks/email_analysis.py
+"""
+
+import heapq
+import re
+import time
+
+import nltk
+from lexrank import STOPWORDS, LexRank
+
+from agnia_smart_digest.action.backend.email_analysis import analysis_cache, analyze
+from agnia_smart_digest.action.backend.html_text import html_to_text
+from agnia_smart_digest.action.backend.ranking_emails import EmailLexRank
+from agnia_smart_digest.action.backend.summarize_emails import summarize_email
+
+N_EMAILS = 50
+ROUNDS = 3
+SENTENCES = [
+    "The deployment of release {i} went fine, metrics look stable.",
+    "We cannot roll back the database migration before Monday [2].",
+    "Latency of the search API dropped to 120 ms at p99!",
+    "Could you review the budget for the new cache servers?",
+    "The index rebuild is gonna take about three hours.",
+    "Alice approved the rollback plan; Bob will run it tonight.",
+]
+
+
+def email(i: int) -> str:
+    paragraphs = "".join(
+        "<p>" + " ".join(s.format(i=i) for s in SENTENCES[n % 3 :]) + "</p>"
+        for n in range(8)
+    )
+    greeting = f"<div dir='ltr'>Hi team, update #{i}.</div>"
+    return f"<html><body>{greeting}{paragraphs}</body></html>"
+
+
+def summarize_before(email_text: str) -> str:
+    # what summarize_email did before, without the crash on a leading stopword
+    email_text = re.sub(r"\[[0-9]*\]", " ", email_text)
+    email_text = re.sub(r"\s+", " ", email_text)
+    formatted_email_text = re.sub("[^a-zA-Z]", " ", email_text)
+    formatted_email_text = re.sub(r"\s+", " ", formatted_email_text)
+    sentence_list = nltk.sent_tokenize(email_text)
+    stopwords = nltk.corpus.stopwords.words("english")
+
+    word_frequencies = {}
+    for word in nltk.word_tokenize(formatted_email_text):
+        if word not in stopwords:
+            word_frequencies[word] = word_frequencies.get(word, 0) + 1
+    maximum_frequency = max(word_frequencies.values())
+    for word in word_frequencies:
+        word_frequencies[word] /= maximum_frequency
+
+    sentence_scores = {}
+    for sent in sentence_list:
+        for word in nltk.word_tokenize(sent.lower()):
+            if word in word_frequencies and len(sent.split(" ")) < 30:
+                sentence_scores[sent] = (
+                    sentence_scores.get(sent, 0) + word_frequencies[word]
+                )
+
+    return " ".join(heapq.nlargest(7, sentence_scores, key=sentence_scores.get))  # type: ignore
+
+
+def digest_before(lxr: LexRank, bodies: list[str]) -> list[str]:
+    texts = [html_to_text(body) for body in bodies]
+    lxr.rank_sentences(
+        [" ".join(text.split()) for text in texts],
+        threshold=None,
+        fast_power_method=False,
+    )
+    return [summarize_before(text) for text in texts]
+
+
+def digest(lxr: EmailLexRank, bodies: list[str]) -> list[str]:
+    texts = [analyze(body).cleaned for body in bodies]
+    lxr.rank_sentences(
+        [analyze(text) for text in texts], threshold=None, fast_power_method=False
+    )
+    return [summarize_email(text) for text in texts]
+
+
+def measure(label: str, run, prepare=None) -> list[str]:
+    total = 0.0
+    for _ in range(ROUNDS):
+        if prepare is not None:
+            prepare()
+        started = time.process_time()
+        summaries = run()
+        total += time.process_time() - started
+    per_email = total / ROUNDS / N_EMAILS
+    print(f"{label:<22} {per_email * 1000:7.2f}ms CPU per email")
+    return summaries
+
+
+def main():
+    bodies = [email(i) for i in range(N_EMAILS)]
+    before = LexRank(documents=[["tech"]], stopwords=STOPWORDS["en"])
+    after = EmailLexRank(documents=[["tech"]], stopwords=frozenset(STOPWORDS["en"]))
+
+    expected = measure("actions on their own", lambda: digest_before(before, bodies))
+    cold = measure(
+        "analysis, first digest",
+        lambda: digest(after, bodies),
+        prepare=analysis_cache._entries.clear,
+    )
+    warm = measure("analysis, next digest", lambda: digest(after, bodies))
+    assert cold == warm == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Payload size and per-stage cost of a 100-email digest, schema v1 vs. v2.
+
+v1 passes every email as a JSON-encoded string, so each stage of the digest
+plan (clean, summarize, rank) parses its input, dumps its output and the
+socket frame escapes the strings once more. v2 passes nested objects.
+Only the (de)serialization a stage does is measured, not its own work.
+
+    rye run python benchmarks/email_payload.py
+"""
+
+import json
+import time
+
+from pydantic_core import to_json
+
+from agnia_smart_digest.action.backend.emails import (
+    EmailOutputModel,
+    EmailsOutputParams,
+)
+
+N_EMAILS = 100
+N_STAGES = 3
+N_ROUNDS = 50
+
+
+def make_emails() -> list[EmailOutputModel]:
+    return [
+        EmailOutputModel(
+            Subject=f"Weekly report #{i}",
+            From='"Team" <team@example.com>',
+            To="me@example.com",
+            Date="Mon, 1 Jul 2024 10:00:00 +0300",
+            Text='<p>The "deployment" went fine,\nmetrics look stable.</p>\n' * 20,
+        )
+        for i in range(N_EMAILS)
+    ]
+
+
+def v1_stage(frame: str) -> str:
+    # hub frame -> input strings -> models -> output strings -> reply frame
+    emails = json.loads(frame)["emails"]
+    models = [EmailOutputModel.model_validate_json(email) for email in emails]
+    return json.dumps({"emails": [model.model_dump_json() for model in models]})
+
+
+def v2_stage(frame: str) -> str:
+    output = EmailsOutputParams.model_validate_json(frame)
+    return to_json(output).decode()
+
+
+def run(label: str, stage, frame: str) -> None:
+    started = time.process_time()
+    for _ in range(N_ROUNDS):
+        reply = frame
+        for _ in range(N_STAGES):
+            reply = stage(reply)
+    elapsed = (time.process_time() - started) / N_ROUNDS / N_STAGES
+    print(
+        f"{label:<3} frame={len(frame.encode()) / 1024:8.1f}KiB "
+        f"cpu/stage={elapsed * 1000:7.3f}ms"
+    )
+
+
+def main() -> None:
+    emails = make_emails()
+    v1_frame = json.dumps({"emails": [email.model_dump_json() for email in emails]})
+    v2_frame = EmailsOutputParams(emails=emails).model_dump_json()
+
+    # the shim keeps v1 plans working
+    assert EmailsOutputParams.model_validate_json(v1_frame).emails == emails
+
+    run("v1", v1_stage, v1_frame)
+    run("v2", v2_stage, v2_frame)
+
+
+if __name__ == "__main__":
+    main()
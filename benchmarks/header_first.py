@@ -0,0 +1,179 @@
+"""Digest candidates: bodies of the whole window vs. header-first top-k.
+
+The inbox mixes what a real one gets: newsletters, CI notifications,
+conversations, reports with a PDF and Outlook mail with inline images.
+The full fetch downloads the bodies of every email in the window; the
+header-first one fetches headers and structures of the window, pre-ranks
+them and downloads the bodies of the best `K` only. Repeat header-first
+digests through the mailbox mirror then fetch the headers of new mail and
+the bodies of newly picked emails only. Runs against the local IMAP
+stand-in in `imap_stub.py`.
+
+    rye run python benchmarks/header_first.py
+"""
+
+import asyncio
+import tempfile
+import time
+from email.message import EmailMessage
+from email.utils import format_datetime
+from functools import partial
+
+from imap_stub import START, ImapStub
+from mime_shapes import newsletter, outlook, plain, plain_and_html
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.email_prerank import prerank
+from agnia_smart_digest.action.backend.emails import EXTRACTION_VERSION, to_email
+from agnia_smart_digest.action.backend.imap_fetch import (
+    fetch_bodies,
+    fetch_headers,
+    fetch_messages,
+    last_uids,
+    select_inbox,
+)
+from agnia_smart_digest.action.backend.mailbox_mirror import MailboxMirror
+from agnia_smart_digest.settings import imap_settings
+
+WINDOWS = [50, 100, 200, 400]
+K = 10
+LATENCY = 0.005
+
+
+def report(marker: str) -> EmailMessage:
+    message = plain_and_html(marker)
+    message.add_attachment(
+        bytes(range(256)) * 800,
+        maintype="application",
+        subtype="pdf",
+        filename="report.pdf",
+    )
+    return message
+
+
+# builder, sender, subject; the first two are what the digest should skip
+KINDS = [
+    (newsletter, '"Shop" <news@shop.example.com>', "Summer sale: 30% off"),
+    (plain, "<no-reply@ci.example.com>", "Build #{i} passed"),
+    (plain_and_html, '"Alice" <alice@example.com>', "Re: deployment plan #{i}"),
+    (report, '"Boss" <boss@example.com>', "Weekly report #{i}"),
+    (outlook, '"Bob" <bob@example.com>', "Design review notes #{i}"),
+]
+SKIPPED = ("Summer sale", "Build #")
+
+
+def make_inbox(size: int) -> list[EmailMessage]:
+    messages = []
+    for i in range(size):
+        build, sender, subject = KINDS[i % len(KINDS)]
+        message = build(f"MARKER-{i}")
+        message["Subject"] = subject.format(i=i)
+        message["From"] = sender
+        message["To"] = "me@example.com"
+        message["Date"] = format_datetime(START)
+        messages.append(message)
+    return messages
+
+
+async def full(mail: ImapClient, window: int) -> list:
+    return await fetch_messages(
+        mail,
+        await last_uids(mail, window),
+        max_part_bytes=imap_settings.imap_max_part_bytes,
+        max_email_bytes=imap_settings.imap_max_email_bytes,
+        batch_size=imap_settings.imap_fetch_batch_size,
+    )
+
+
+async def header_first(mail: ImapClient, window: int) -> list:
+    messages = await fetch_headers(
+        mail, await last_uids(mail, window), imap_settings.imap_fetch_batch_size
+    )
+    messages = prerank(messages, K)
+    await fetch_bodies(
+        mail,
+        messages,
+        max_part_bytes=imap_settings.imap_max_part_bytes,
+        max_email_bytes=imap_settings.imap_max_email_bytes,
+        batch_size=imap_settings.imap_fetch_batch_size,
+    )
+    return messages
+
+
+async def mirrored(mail: ImapClient, mirror: MailboxMirror, window: int) -> list:
+    status = await select_inbox(mail)
+    return await mirror.pick_emails(
+        mail,
+        "me@example.com",
+        status.uidvalidity,
+        EXTRACTION_VERSION,
+        to_email,
+        await last_uids(mail, window, exists=status.exists),
+        lambda messages: prerank(messages, K),
+    )
+
+
+async def connect(stub: ImapStub) -> ImapClient:
+    mail = await ImapClient("127.0.0.1", stub.port, use_ssl=False).connect()
+    await mail.login("me@example.com", "password")
+    return mail
+
+
+async def measure(label: str, stub: ImapStub, fetch) -> list:
+    mail = await connect(stub)
+    sent = stub.bytes_sent
+    started = time.perf_counter()
+    messages = await fetch(mail)
+    elapsed = time.perf_counter() - started
+    received = stub.bytes_sent - sent
+    await mail.logout()
+
+    print(
+        f"{label:<24} {elapsed * 1000:8.1f}ms {received / 1024:9.1f} KiB "
+        f"emails={len(messages)}"
+    )
+    return messages
+
+
+async def main():
+    with ImapStub(make_inbox(max(WINDOWS)), LATENCY) as stub:
+        # the stand-in works out message sizes once
+        mail = await connect(stub)
+        await fetch_headers(mail, await last_uids(mail, max(WINDOWS)), 100)
+        await mail.logout()
+
+        for window in WINDOWS:
+            await measure(f"full, window={window}", stub, partial(full, window=window))
+            picked = await measure(
+                f"header-first, k={K}", stub, partial(header_first, window=window)
+            )
+            assert len(picked) == K
+            for message in picked:
+                subject = str(message.headers["Subject"])
+                assert not subject.startswith(SKIPPED), subject
+                assert any("MARKER-" in text for text in message.texts()), subject
+
+        window = max(WINDOWS)
+        expected = [
+            to_email(message).model_dump_json()
+            for message in await header_first(await connect(stub), window)
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            mirror = MailboxMirror(f"{directory}/mirror.sqlite3", depth=500)
+            fetch = partial(mirrored, mirror=mirror, window=window)
+            for label in ("cold", "unchanged"):
+                emails = await measure(f"mirrored, {label}", stub, fetch)
+                assert emails == expected, label
+
+            for i in range(5):
+                build, sender, subject = KINDS[2]
+                message = build(f"MARKER-new-{i}")
+                message["Subject"] = subject.format(i=f"new-{i}")
+                message["From"] = sender
+                message["Date"] = format_datetime(START)
+                stub.append(message)
+            await measure("mirrored, 5 new", stub, fetch)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""Cleaning email bodies, the tag-stripping regex vs. `html_to_text`.
+
+The corpus holds the bodies `list_emails_action` passes on: newsletters
+with styles, scripts and layout tables, Gmail and Outlook replies with the
+quoted thread, and plain text replies with quotes and a signature. For
+each cleaner: throughput over the corpus, characters left for the actions
+downstream, the cost of the passes those run over every character (the
+whitespace pass of the ranking action and the regex passes of
+`summarize_email` before tokenizing) and cleaning plus those passes.
+
+    rye run python benchmarks/html_clean.py
+"""
+
+import re
+import time
+
+from agnia_smart_digest.action.backend.html_text import html_to_text
+
+ROUNDS = 20
+PARAGRAPH = "The deployment went fine, metrics look stable. "
+STYLE = "<style>" + ".cell{padding:0;margin:0;font-family:Arial}\n" * 200 + "</style>"
+SCRIPT = "<script>" + "window.dataLayer.push({event:'open'});\n" * 50 + "</script>"
+
+
+def newsletter(i: int) -> str:
+    rows = "".join(
+        f"<tr>\n  <td class='cell'>\n    <a href='https://shop.example.com/{n}'>"
+        f"Item {n}</a>\n  </td>\n  <td class='cell'>&euro;{n}.99&nbsp;</td>\n</tr>\n"
+        for n in range(300)
+    )
+    return (
+        f"<html><head><title>News</title>{STYLE}{SCRIPT}</head><body>"
+        f"<span style='display:none'>{'&#847; &zwnj; ' * 100}</span>"
+        f"<h1>Deals #{i}</h1><p>____</p><table>{rows}</table>"
+        "<p>--</p><p>SEPARATED-CONTENT</p></body></html>"
+    )
+
+
+def gmail_reply(i: int) -> str:
+    quoted = f"<p>{PARAGRAPH * 10}</p>" * 20
+    return (
+        f"<div dir='ltr'>Looks good to me, ship #{i}.<div><br></div>"
+        "<div class='gmail_signature'>-- <br>Alice</div></div><br>"
+        "<div class='gmail_quote'><div dir='ltr'>On Mon, Bob wrote:</div>"
+        f"<blockquote class='gmail_quote'>{quoted}</blockquote></div>"
+    )
+
+
+def outlook_reply(i: int) -> str:
+    quoted = f"<p class='MsoNormal'>{PARAGRAPH * 10}<o:p></o:p></p>" * 20
+    return (
+        f"<html><head>{STYLE}</head><body><div class='WordSection1'>"
+        f"<p class='MsoNormal'>Approved, #{i}.<o:p></o:p></p></div>"
+        "<div id='appendonsend'></div><hr>"
+        "<div id='divRplyFwdMsg'><b>From:</b> Bob<br><b>Sent:</b> Monday</div>"
+        f"<div>{quoted}</div></body></html>"
+    )
+
+
+def plain_reply(i: int) -> str:
+    quoted = "".join(f"> {PARAGRAPH}\n" for _ in range(200))
+    return (
+        f"Thanks, merged #{i}.\n\nSee <https://ci.example.com/{i}>.\n\n"
+        f"-- \nAlice\n\nOn Mon, Bob <bob@example.com> wrote:\n{quoted}"
+    )
+
+
+def corpus() -> list[str]:
+    return [
+        build(i)
+        for i in range(25)
+        for build in (newsletter, gmail_reply, outlook_reply, plain_reply)
+    ]
+
+
+def regex(body: str) -> str:
+    # what clean_emails_action did before
+    return re.sub(r"\<.*?\>", "", body)
+
+
+def downstream_passes(text: str) -> None:
+    # `normalize` of the email analysis, used by ranking and search
+    " ".join(text.split())
+    # summarize_email
+    text = re.sub(r"\[[0-9]*\]", " ", text)
+    text = re.sub(r"\s+", " ", text)
+    text = re.sub("[^a-zA-Z]", " ", text)
+    re.sub(r"\s+", " ", text)
+
+
+def measure(label: str, clean, bodies: list[str]) -> None:
+    size = sum(len(body.encode()) for body in bodies)
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        cleaned = [clean(body) for body in bodies]
+    elapsed = (time.perf_counter() - started) / ROUNDS
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text in cleaned:
+            downstream_passes(text)
+    downstream = (time.perf_counter() - started) / ROUNDS
+
+    chars = sum(map(len, cleaned))
+    print(
+        f"{label:<12} {size / elapsed / 2**20:7.1f} MiB/s "
+        f"{elapsed * 1000:8.1f}ms  out={chars / 1024:8.1f} Ki chars  "
+        f"downstream={downstream * 1000:6.1f}ms  "
+        f"total={(elapsed + downstream) * 1000:6.1f}ms"
+    )
+
+
+def main():
+    bodies = corpus()
+    print(f"corpus: {len(bodies)} bodies, {sum(map(len, bodies)) / 2**20:.1f} MiB")
+    measure("regex", regex, bodies)
+    measure("html_to_text", html_to_text, bodies)
+
+    for body in bodies:
+        text = html_to_text(body)
+        assert "{" not in text and "<" not in text, text[:200]
+        assert PARAGRAPH.strip() not in text, text[:200]
+        assert "Alice" not in text, text[:200]
+        if "Deals" in text:
+            # separator lines are content, not quotes
+            assert "SEPARATED-CONTENT" in text and "Item 299" in text, text[-200:]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""LLM-style request latency, session per call vs. the shared pooled client.
+
+Starts a local aiohttp stub that answers like the LLM endpoint and sends the
+same prompt through both paths.
+
+    rye run python benchmarks/http_pool.py
+"""
+
+import asyncio
+import statistics
+import time
+
+import aiohttp
+from aiohttp import web
+
+from agnia_smart_digest.external_services.http import http_client
+
+N_REQUESTS = 200
+CONCURRENCY = 10
+PAYLOAD = {"prompt": "<Prompt>...</Prompt>", "stop": "</Answer>", "max_tokens": 50}
+
+
+async def llm_stub(request: web.Request) -> web.Response:
+    await request.json()
+    return web.json_response("3")
+
+
+async def session_per_call(url: str) -> None:
+    async with (
+        aiohttp.ClientSession() as session,
+        session.post(url, json=PAYLOAD) as response,
+    ):
+        await response.json()
+
+
+async def shared_session(url: str) -> None:
+    async with http_client.session.post(url, json=PAYLOAD) as response:
+        await response.json()
+
+
+async def run(label: str, call, url: str) -> None:
+    limit = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+
+    async def one():
+        async with limit:
+            started = time.perf_counter()
+            await call(url)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(N_REQUESTS)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(
+        f"{label:<18} total={elapsed:6.3f}s "
+        f"p50={statistics.median(latencies) * 1000:7.2f}ms "
+        f"p95={latencies[int(len(latencies) * 0.95)] * 1000:7.2f}ms"
+    )
+
+
+async def main() -> None:
+    app = web.Application()
+    app.router.add_post("/llm/get_response", llm_stub)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+    url = f"http://127.0.0.1:{port}/llm/get_response"
+
+    await run("session-per-call", session_per_call, url)
+    await run("shared-pool", shared_session, url)
+
+    await http_client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
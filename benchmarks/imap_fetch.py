@@ -0,0 +1,100 @@
+"""Fetching the last N emails, one `UID FETCH (RFC822)` each vs. batched.
+
+Runs against the local IMAP stand-in in `imap_stub.py` with a simulated
+round trip per command. Half of the messages carry a 200 KiB attachment,
+which the per-message path downloads and the batched one skips.
+
+    rye run python benchmarks/imap_fetch.py
+"""
+
+import asyncio
+import imaplib
+import inspect
+import time
+from email import policy
+from email.parser import BytesParser
+
+from imap_stub import ImapStub, make_message
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.imap_fetch import fetch_messages
+from agnia_smart_digest.settings import imap_settings
+
+SIZES = [10, 50, 200]
+LATENCY = 0.005
+
+
+def per_message(mail: imaplib.IMAP4, uids: list[bytes]) -> list[str]:
+    # the fetch loop the emails action used before
+    texts = []
+    for uid in uids:
+        _, data = mail.uid("fetch", uid, "(RFC822)")
+        msg = BytesParser(policy=policy.default).parsebytes(data[0][1])
+        text = ""
+        for part in msg.walk():
+            if part.is_multipart():
+                continue
+            payload = part.get_payload(decode=True)
+            if isinstance(payload, bytes):
+                charset = part.get_content_charset() or "utf-8"
+                text += payload.decode(charset, errors="replace") + "\n"
+        texts.append(text)
+    return texts
+
+
+async def batched(mail: ImapClient, uids: list[bytes]) -> list[str]:
+    messages = await fetch_messages(
+        mail,
+        uids,
+        max_part_bytes=imap_settings.imap_max_part_bytes,
+        max_email_bytes=imap_settings.imap_max_email_bytes,
+        batch_size=imap_settings.imap_fetch_batch_size,
+    )
+    return ["".join(text + "\n" for text in message.texts()) for message in messages]
+
+
+async def report(label: str, stub: ImapStub, n: int, fetch) -> None:
+    uids = [str(uid).encode() for uid in stub.uids]
+    commands, sent = stub.commands, stub.bytes_sent
+    started = time.perf_counter()
+    texts = fetch(uids)
+    if inspect.isawaitable(texts):
+        texts = await texts
+    elapsed = time.perf_counter() - started
+    commands, sent = stub.commands - commands, stub.bytes_sent - sent
+
+    assert len(texts) == n
+    print(
+        f"{label:<12} n={n:<4} {elapsed:7.3f}s "
+        f"commands={commands:<4} received={sent / 2**20:7.2f} MiB"
+    )
+
+
+async def run_per_message(n: int) -> None:
+    with ImapStub([make_message(i) for i in range(n)], LATENCY) as stub:
+        mail = imaplib.IMAP4("127.0.0.1", stub.port)
+        mail.login("me@example.com", "password")
+        mail.select("INBOX")
+        await report("per-message", stub, n, lambda uids: per_message(mail, uids))
+        mail.logout()
+
+
+async def run_batched(n: int) -> None:
+    with ImapStub([make_message(i) for i in range(n)], LATENCY) as stub:
+        mail = await ImapClient("127.0.0.1", stub.port, use_ssl=False).connect()
+        await mail.login("me@example.com", "password")
+        await mail.select("INBOX")
+        # the stand-in works out message sizes once, a server stores them
+        await mail.uid("fetch", "1:*", "(RFC822.SIZE)")
+        await report("batched", stub, n, lambda uids: batched(mail, uids))
+        await mail.logout()
+
+
+async def main():
+    for n in SIZES:
+        await run_per_message(n)
+        await run_batched(n)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
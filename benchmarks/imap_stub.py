@@ -0,0 +1,335 @@
+"""A local IMAP stand-in for the IMAP benchmarks.
+
+Plain TCP, no TLS, one INBOX of generated messages. Understands the
+commands the emails action sends: LOGIN, SELECT, NOOP, IDLE, LOGOUT, UID
+SEARCH (ALL, a sequence set, UID, FROM, SINCE) and [UID] FETCH with UID,
+INTERNALDATE, RFC822, RFC822.SIZE, BODYSTRUCTURE, BODY.PEEK[HEADER.FIELDS
+(...)] and BODY.PEEK[<section>]<origin.length>. Messages can be delivered
+and expunged while the stand-in runs; sessions in IDLE are told about new
+mail. Every command is answered after `latency` seconds to stand in for
+the network round trip.
+
+`messages` may be any sequence, e.g. one building messages on access, so
+large mailboxes do not have to be held in memory.
+
+Not a benchmark by itself, imported by the ones that talk IMAP.
+"""
+
+import re
+import socketserver
+import threading
+import time
+from collections.abc import Sequence
+from datetime import UTC, datetime, timedelta
+from email.message import EmailMessage
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Self
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+ITEM = re.compile(
+    rb"UID|INTERNALDATE|RFC822\.SIZE|RFC822|BODYSTRUCTURE"
+    rb"|BODY\.PEEK\[([^\]]*)\](?:<(\d+)\.(\d+)>)?"
+)
+
+
+def make_message(i: int, attachment_kb: int = 200) -> EmailMessage:
+    """Every other message has an HTML alternative and a PDF attachment.
+
+    Messages arrive an hour apart starting on 2024-01-01, every tenth one is
+    from boss@example.com.
+    """
+    message = EmailMessage()
+    message["Subject"] = f"Weekly report #{i}"
+    message["From"] = (
+        '"Boss" <boss@example.com>' if i % 10 == 9 else '"Team" <team@example.com>'
+    )
+    message["To"] = "me@example.com"
+    message["Date"] = format_datetime(START + timedelta(hours=i))
+    message["X-Mailer"] = "benchmark"
+
+    text = f"Report {i}: the deployment went fine, metrics look stable.\n" * 40
+    message.set_content(text)
+    if i % 2:
+        message.add_alternative(f"<html><body><p>{text}</p></body></html>", "html")
+        message.add_attachment(
+            bytes(range(256)) * (attachment_kb * 4),
+            maintype="application",
+            subtype="pdf",
+            filename="report.pdf",
+        )
+    return message
+
+
+def _quote(value: str | None) -> bytes:
+    return b"NIL" if value is None else b'"' + value.encode() + b'"'
+
+
+def _params(part: EmailMessage) -> bytes:
+    # the first "parameter" is the content type itself
+    params = (part.get_params() or [])[1:]
+    if not params:
+        return b"NIL"
+    return b"(" + b" ".join(_quote(k) + b" " + _quote(v) for k, v in params) + b")"
+
+
+def bodystructure(part: EmailMessage) -> bytes:
+    if part.get_content_type() == "message/rfc822":
+        inner = part.get_payload(0)
+        raw = bytes(inner).replace(b"\n", b"\r\n")
+        # the envelope is left out, nothing reads it
+        fields = [b'"message" "rfc822" NIL NIL NIL "7bit"', str(len(raw)).encode()]
+        fields += [b"NIL", bodystructure(inner), str(raw.count(b"\n")).encode()]
+        return b"(" + b" ".join(fields) + b")"
+    if part.is_multipart():
+        children = b"".join(bodystructure(child) for child in part.iter_parts())
+        return b"(" + children + b" " + _quote(part.get_content_subtype()) + b")"
+
+    payload = _raw_payload(part)
+    fields = [
+        _quote(part.get_content_maintype()),
+        _quote(part.get_content_subtype()),
+        _params(part),
+        b"NIL",
+        b"NIL",
+        _quote(part.get("Content-Transfer-Encoding", "7bit")),
+        str(len(payload)).encode(),
+    ]
+    if part.get_content_maintype() == "text":
+        fields.append(str(payload.count(b"\n")).encode())
+    fields.append(b"NIL")
+    disposition = part.get_content_disposition()
+    if disposition is None:
+        fields.append(b"NIL")
+    elif part.get_filename() is None:
+        fields.append(b"(" + _quote(disposition) + b" NIL)")
+    else:
+        filename = b"(" + _quote("filename") + b" " + _quote(part.get_filename()) + b")"
+        fields.append(b"(" + _quote(disposition) + b" " + filename + b")")
+    return b"(" + b" ".join(fields) + b")"
+
+
+def _raw_payload(part: EmailMessage) -> bytes:
+    return part.get_payload(decode=False).encode().replace(b"\n", b"\r\n")
+
+
+def _section(message: EmailMessage, section: bytes) -> bytes:
+    if section.upper().startswith(b"HEADER.FIELDS"):
+        names = section[section.index(b"(") + 1 : section.index(b")")].split()
+        lines = [
+            f"{name}: {value}\r\n".encode()
+            for name, value in message.items()
+            if name.upper().encode() in names
+        ]
+        return b"".join(lines) + b"\r\n"
+
+    part = message
+    for index in section.decode().split("."):
+        if part.get_content_type() == "message/rfc822":
+            # the parts of a forwarded message are those of its body
+            part = part.get_payload(0)
+        if part.is_multipart():
+            part = list(part.iter_parts())[int(index) - 1]
+    return _raw_payload(part)
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    # the default of 5 drops connections made at the same time
+    request_queue_size = 128
+
+
+class ImapStub:
+    def __init__(self, messages: Sequence[EmailMessage], latency: float = 0.005):
+        # the message with UID n is messages[n - 1]
+        self.messages = messages
+        # UIDs of the messages in the mailbox, by sequence number
+        self.uids = list(range(1, len(messages) + 1))
+        self.uidvalidity = 1
+        self._positions: dict[int, int] | None = None
+        # uid -> RFC822.SIZE, servers store it rather than serialize the message
+        self._sizes: dict[int, int] = {}
+        self.latency = latency
+        self.commands = 0
+        self.bytes_sent = 0
+        # connections in IDLE, notified of new mail
+        self._idlers: set = set()
+        self._idlers_lock = threading.Lock()
+
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                self.wfile.write(b"* OK [CAPABILITY IMAP4rev1] stub ready\r\n")
+                while line := self.rfile.readline():
+                    tag, _, rest = line.strip().partition(b" ")
+                    time.sleep(stub.latency)
+                    stub.commands += 1
+                    if rest.upper() == b"IDLE":
+                        stub.idle(tag, self.rfile, self.wfile)
+                        continue
+                    reply = stub.respond(tag, rest)
+                    stub.bytes_sent += len(reply)
+                    self.wfile.write(reply)
+                    if rest.upper().startswith(b"LOGOUT"):
+                        return
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+
+    def __enter__(self) -> Self:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def append(self, message: EmailMessage) -> int:
+        """Deliver a new message, `messages` must be a list for this."""
+        self.messages.append(message)
+        self.uids.append(len(self.messages))
+        self._positions = None
+        with self._idlers_lock:
+            for wfile in self._idlers:
+                wfile.write(f"* {len(self.uids)} EXISTS\r\n".encode())
+        return self.uids[-1]
+
+    def idle(self, tag: bytes, rfile, wfile) -> None:
+        with self._idlers_lock:
+            wfile.write(b"+ idling\r\n")
+            self._idlers.add(wfile)
+        # anything but DONE ends IDLE too, as a disconnect does
+        rfile.readline()
+        with self._idlers_lock:
+            self._idlers.discard(wfile)
+            wfile.write(tag + b" OK IDLE terminated\r\n")
+
+    def expunge(self, uid: int) -> None:
+        self.uids.remove(uid)
+        self._positions = None
+
+    def positions(self) -> dict[int, int]:
+        # uid -> sequence number
+        if self._positions is None:
+            self._positions = {uid: seq for seq, uid in enumerate(self.uids, start=1)}
+        return self._positions
+
+    def respond(self, tag: bytes, rest: bytes) -> bytes:
+        command = rest.split(b" ", 1)[0].upper()
+        if command == b"SELECT":
+            return (
+                (
+                    f"* {len(self.uids)} EXISTS\r\n"
+                    f"* OK [UIDVALIDITY {self.uidvalidity}] UIDs valid\r\n"
+                    f"* OK [UIDNEXT {len(self.messages) + 1}] Predicted next UID\r\n"
+                ).encode()
+                + tag
+                + b" OK [READ-WRITE] SELECT completed\r\n"
+            )
+        if command == b"LOGOUT":
+            return b"* BYE\r\n" + tag + b" OK LOGOUT completed\r\n"
+
+        if command == b"FETCH":
+            _, args = rest.split(b" ", 1)
+            seq_set, items = args.split(b" ", 1)
+            seqs = self._range(seq_set, len(self.uids))
+        elif command == b"UID":
+            _, subcommand, args = rest.split(b" ", 2)
+            if subcommand.upper() == b"SEARCH":
+                uids = " ".join(str(uid) for uid in self._search(args.split()))
+                return (
+                    f"* SEARCH {uids}\r\n".encode() + tag + b" OK SEARCH completed\r\n"
+                )
+            uid_set, items = args.split(b" ", 1)
+            seqs = self._uid_range(uid_set)
+        else:
+            return tag + b" OK " + command + b" completed\r\n"
+
+        reply = b"".join(self._fetch(seq, items) for seq in seqs)
+        return reply + tag + b" OK FETCH completed\r\n"
+
+    def _search(self, criteria: list[bytes]) -> list[int]:
+        seqs = range(1, len(self.uids) + 1)
+        sender, since = None, None
+        i = 0
+        while i < len(criteria):
+            key = criteria[i].upper()
+            if key == b"FROM":
+                sender = criteria[i + 1].strip(b'"').decode().lower()
+                i += 1
+            elif key == b"SINCE":
+                since = datetime.strptime(criteria[i + 1].decode(), "%d-%b-%Y")
+                i += 1
+            elif key == b"UID":
+                seqs = sorted(set(seqs) & set(self._uid_range(criteria[i + 1])))
+                i += 1
+            elif key != b"ALL":
+                seqs = sorted(set(seqs) & set(self._range(key, len(self.uids))))
+            i += 1
+
+        def matches(uid: int) -> bool:
+            if sender is None and since is None:
+                # building the message is what is slow in the stand-in
+                return True
+            message = self.messages[uid - 1]
+            if sender is not None and sender not in str(message["From"]).lower():
+                return False
+            if since is not None:
+                sent = parsedate_to_datetime(str(message["Date"])).replace(tzinfo=None)
+                if sent.date() < since.date():
+                    return False
+            return True
+
+        return [self.uids[seq - 1] for seq in seqs if matches(self.uids[seq - 1])]
+
+    @staticmethod
+    def _range(number_set: bytes, top: int) -> list[int]:
+        numbers = []
+        for item in number_set.split(b","):
+            first, _, last = item.partition(b":")
+            start = top if first == b"*" else int(first)
+            end = top if last == b"*" else int(last or first)
+            numbers += range(min(start, end), max(start, end) + 1)
+        return numbers
+
+    def _uid_range(self, uid_set: bytes) -> list[int]:
+        if not self.uids:
+            return []
+        positions = self.positions()
+        uids = self._range(uid_set, self.uids[-1])
+        return [positions[uid] for uid in uids if uid in positions]
+
+    def _fetch(self, seq: int, items: bytes) -> bytes:
+        if not 1 <= seq <= len(self.uids):
+            return b""
+        uid = self.uids[seq - 1]
+        message = self.messages[uid - 1]
+        fields = []
+        for match in ITEM.finditer(items):
+            name = match.group(0)
+            if name == b"UID":
+                fields.append(f"UID {uid}".encode())
+            elif name == b"INTERNALDATE":
+                received = parsedate_to_datetime(str(message["Date"]))
+                fields.append(
+                    received.strftime('INTERNALDATE "%d-%b-%Y %H:%M:%S %z"').encode()
+                )
+            elif name == b"RFC822.SIZE":
+                if uid not in self._sizes:
+                    raw = bytes(message).replace(b"\n", b"\r\n")
+                    self._sizes[uid] = len(raw)
+                fields.append(f"RFC822.SIZE {self._sizes[uid]}".encode())
+            elif name == b"BODYSTRUCTURE":
+                fields.append(b"BODYSTRUCTURE " + bodystructure(message))
+            else:
+                if name == b"RFC822":
+                    data = bytes(message).replace(b"\n", b"\r\n")
+                else:
+                    section, origin, length = match.groups()
+                    data = _section(message, section)
+                    name = b"BODY[" + section + b"]"
+                    if origin is not None:
+                        data = data[int(origin) : int(origin) + int(length)]
+                        name += b"<" + origin + b">"
+                fields.append(name + f" {{{len(data)}}}\r\n".encode() + data)
+        return f"* {seq} FETCH (".encode() + b" ".join(fields) + b")\r\n"
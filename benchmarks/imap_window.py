@@ -0,0 +1,122 @@
+"""Finding the last 3 emails, `UID SEARCH ALL` vs. the tail window.
+
+Runs against the local IMAP stand-in in `imap_stub.py` with a simulated
+round trip per command, for growing mailboxes. `UID SEARCH ALL` returns
+every UID in the mailbox (imaplib refuses the reply once it passes 1 MB);
+`last_uids` only addresses the end of it, also with a sender and a date
+filter.
+
+    rye run python benchmarks/imap_window.py
+"""
+
+import asyncio
+import imaplib
+import time
+from datetime import timedelta
+
+from imap_stub import START, ImapStub, make_message
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.imap_fetch import last_uids
+
+SIZES = [1_000, 20_000, 200_000]
+N_EMAILS = 3
+LATENCY = 0.005
+ROUNDS = 5
+
+
+class Mailbox:
+    """Builds messages on access, a 200k mailbox does not fit in memory.
+
+    Recently built messages are cached so the stand-in's own search cost
+    does not swamp the round trips being measured.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._cache = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int):
+        if index not in self._cache:
+            if len(self._cache) > 10_000:
+                self._cache.clear()
+            self._cache[index] = make_message(index, attachment_kb=1)
+        return self._cache[index]
+
+
+def search_all(mail: imaplib.IMAP4, size: int) -> list[bytes]:
+    # what the emails action did before
+    _, data = mail.uid("search", "ALL")
+    return data[0].split()[-N_EMAILS:]
+
+
+async def tail(mail: ImapClient, size: int) -> list[bytes]:
+    return await last_uids(mail, N_EMAILS)
+
+
+async def tail_from_sender(mail: ImapClient, size: int) -> list[bytes]:
+    return await last_uids(mail, N_EMAILS, sender="boss@example.com")
+
+
+async def tail_since(mail: ImapClient, size: int) -> list[bytes]:
+    # the last day of the mailbox, messages arrive an hour apart
+    since = (START + timedelta(hours=size - 1)).date()
+    return await last_uids(mail, N_EMAILS, since=since)
+
+
+def report(label: str, size: int, elapsed: float, uids: list[bytes]) -> None:
+    assert uids and int(uids[-1]) <= size, uids
+    print(f"{label:<18} mailbox={size:<7} {elapsed * 1000:8.2f}ms uids={uids}")
+
+
+def run_search_all(size: int) -> None:
+    label = "uid search all"
+    with ImapStub(Mailbox(size), LATENCY) as stub:
+        mail = imaplib.IMAP4("127.0.0.1", stub.port)
+        mail.login("me@example.com", "password")
+        mail.select("INBOX")
+
+        try:
+            started = time.perf_counter()
+            for _ in range(ROUNDS):
+                uids = search_all(mail, size)
+            elapsed = (time.perf_counter() - started) / ROUNDS
+        except imaplib.IMAP4.error as e:
+            # the rest of the reply is still in flight, drop the connection
+            mail.shutdown()
+            print(f"{label:<18} mailbox={size:<7} failed: {e}")
+            return
+        mail.logout()
+
+    report(label, size, elapsed, uids)
+
+
+async def run(label: str, find, size: int) -> None:
+    with ImapStub(Mailbox(size), LATENCY) as stub:
+        mail = await ImapClient("127.0.0.1", stub.port, use_ssl=False).connect()
+        await mail.login("me@example.com", "password")
+
+        # the first round fills the message cache
+        await find(mail, size)
+        started = time.perf_counter()
+        for _ in range(ROUNDS):
+            uids = await find(mail, size)
+        elapsed = (time.perf_counter() - started) / ROUNDS
+        await mail.logout()
+
+    report(label, size, elapsed, uids)
+
+
+async def main():
+    for size in SIZES:
+        run_search_all(size)
+        await run("tail", tail, size)
+        await run("tail, sender", tail_from_sender, size)
+        await run("tail, since", tail_since, size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+"""Event-loop stall caused by blocking actions, inline vs. per-action executor.
+
+rye run python benchmarks/loop_lag.py
+"""
+
+import asyncio
+import time
+
+from pydantic import BaseModel
+
+from agnia_smart_digest.action.base import BlockingAction
+from agnia_smart_digest.action.executor import action_executors
+
+N_CALLS = 8
+BLOCK_SECONDS = 0.2
+TICK_SECONDS = 0.005
+
+
+class SleepParams(BaseModel):
+    seconds: float
+
+
+class SleepAction(BlockingAction[SleepParams, SleepParams]):
+    action_name = "sleep_action"
+    max_workers = 4
+
+    def __init__(self):
+        super().__init__(action_name="sleep_action")
+
+    def execute_blocking(self, input_data: SleepParams) -> SleepParams:
+        time.sleep(input_data.seconds)  # stands in for imaplib / smtplib
+        return input_data
+
+
+async def measure_lag(stop: asyncio.Event) -> list[float]:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - started - TICK_SECONDS)
+    return lags
+
+
+async def run(label: str, call) -> None:
+    stop = asyncio.Event()
+    probe = asyncio.create_task(measure_lag(stop))
+    await asyncio.sleep(TICK_SECONDS)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(N_CALLS)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    lags = await probe
+    print(
+        f"{label:<10} wall={elapsed:6.3f}s "
+        f"max-lag={max(lags) * 1000:8.2f}ms "
+        f"stalled={sum(lag for lag in lags if lag > 0.001):6.3f}s"
+    )
+
+
+async def main() -> None:
+    action = SleepAction()
+    params = SleepParams(seconds=BLOCK_SECONDS)
+
+    async def inline():
+        return action.execute_blocking(params)
+
+    async def executor():
+        return await action_executors.run(action, params)
+
+    await run("inline", inline)
+    await run("executor", executor)
+    action_executors.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+"""Repeat digests of the last 50 emails, with and without the mailbox mirror.
+
+Runs against the local IMAP stand-in in `imap_stub.py` with a simulated
+round trip per command. The mirror is synced cold, then again with no new
+mail, after new mail arrived and a few messages were expunged, and after a
+UIDVALIDITY change. Each time its emails are compared with a full fetch.
+
+    rye run python benchmarks/mailbox_mirror.py
+"""
+
+import asyncio
+import tempfile
+import time
+
+from imap_stub import ImapStub, make_message
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.emails import EXTRACTION_VERSION, to_email
+from agnia_smart_digest.action.backend.imap_fetch import fetch_messages, last_uids
+from agnia_smart_digest.action.backend.mailbox_mirror import MailboxMirror
+from agnia_smart_digest.settings import imap_settings
+
+MAILBOX_SIZE = 2_000
+N_EMAILS = 50
+LATENCY = 0.005
+ACCOUNT = "me@example.com"
+
+
+async def without_mirror(mail: ImapClient) -> list[str]:
+    messages = await fetch_messages(
+        mail,
+        await last_uids(mail, N_EMAILS),
+        max_part_bytes=imap_settings.imap_max_part_bytes,
+        max_email_bytes=imap_settings.imap_max_email_bytes,
+        batch_size=imap_settings.imap_fetch_batch_size,
+    )
+    return [to_email(message).model_dump_json() for message in messages]
+
+
+async def with_mirror(mirror: MailboxMirror, mail: ImapClient) -> list[str]:
+    await mirror.sync(mail, ACCOUNT, EXTRACTION_VERSION, to_email, window=N_EMAILS)
+    emails = await mirror.last_emails(ACCOUNT, N_EMAILS)
+    assert emails is not None
+    return emails
+
+
+async def measure(label: str, stub: ImapStub, fetch) -> list[str]:
+    commands, sent = stub.commands, stub.bytes_sent
+    started = time.perf_counter()
+    emails = await fetch()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<28} {elapsed * 1000:8.2f}ms "
+        f"commands={stub.commands - commands:<3} "
+        f"received={(stub.bytes_sent - sent) / 1024:8.1f} KiB"
+    )
+    return emails
+
+
+async def main():
+    messages = [make_message(i, attachment_kb=50) for i in range(MAILBOX_SIZE)]
+    with (
+        tempfile.TemporaryDirectory() as directory,
+        ImapStub(messages, LATENCY) as stub,
+    ):
+        mirror = MailboxMirror(f"{directory}/mirror.sqlite3", depth=500)
+        mail = await ImapClient("127.0.0.1", stub.port, use_ssl=False).connect()
+        await mail.login(ACCOUNT, "password")
+        await mail.select("INBOX")
+        # the stand-in works out message sizes once, a server stores them
+        await mail.uid("fetch", "1:*", "(RFC822.SIZE)")
+
+        async def check(label: str) -> None:
+            fresh = await measure(
+                f"{label}, no mirror", stub, lambda: without_mirror(mail)
+            )
+            mirrored = await measure(
+                f"{label}, mirror", stub, lambda: with_mirror(mirror, mail)
+            )
+            assert mirrored == fresh, label
+
+        await check("cold")
+        await check("unchanged")
+
+        for i in range(5):
+            stub.append(make_message(MAILBOX_SIZE + i, attachment_kb=50))
+        for uid in (MAILBOX_SIZE - 1, MAILBOX_SIZE - 10, MAILBOX_SIZE - 20):
+            stub.expunge(uid)
+        await check("5 new, 3 expunged")
+
+        stub.uidvalidity += 1
+        await check("uidvalidity changed")
+
+        await mail.logout()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,201 @@
+"""Email bodies of common MIME shapes, full RFC822 walk vs. picked parts.
+
+Each shape is a kind of email found in real inboxes: plain text, plain
+with an HTML alternative, an HTML-only newsletter, reports with a PDF,
+Outlook's alternative/related nesting, forwarded mail, calendar invites,
+legacy charsets and long base64 text. The full walk is the loop the
+emails action used before, which downloads whole messages and joins every
+part, alternatives and attachments included. The batched fetch picks one
+alternative, plain over HTML, from BODYSTRUCTURE and downloads only that.
+Runs against the local IMAP stand-in in `imap_stub.py`.
+
+    rye run python benchmarks/mime_shapes.py
+"""
+
+import asyncio
+import imaplib
+import time
+from email.message import EmailMessage
+from email.utils import format_datetime
+
+from imap_fetch import per_message
+from imap_stub import START, ImapStub
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.imap_fetch import fetch_messages
+from agnia_smart_digest.settings import imap_settings
+
+N_COPIES = 20
+LATENCY = 0.005
+PARAGRAPH = "The deployment went fine, metrics look stable. "
+CYRILLIC = "Отчёт о развёртывании: всё прошло штатно. "
+
+
+def html(marker: str, repeat: int = 20) -> str:
+    rows = f"<tr><td class='cell'>{PARAGRAPH}</td></tr>" * repeat
+    return f"<html><body><h1>{marker}</h1><table>{rows}</table></body></html>"
+
+
+def plain(marker: str) -> EmailMessage:
+    message = EmailMessage()
+    message.set_content(f"{marker}\n" + PARAGRAPH * 20)
+    return message
+
+
+def plain_and_html(marker: str) -> EmailMessage:
+    message = plain(marker)
+    message.add_alternative(html(marker), subtype="html")
+    return message
+
+
+def newsletter(marker: str) -> EmailMessage:
+    message = EmailMessage()
+    message.set_content(html(marker, repeat=3000), subtype="html")
+    return message
+
+
+def report_with_pdf(marker: str) -> EmailMessage:
+    message = plain_and_html(marker)
+    message.add_attachment(
+        bytes(range(256)) * 8192,
+        maintype="application",
+        subtype="pdf",
+        filename="report.pdf",
+    )
+    return message
+
+
+def outlook(marker: str) -> EmailMessage:
+    # alternative(plain, related(html, inline logo))
+    message = plain_and_html(marker)
+    message.get_payload()[1].add_related(
+        bytes(range(256)) * 256, "image", "png", cid="<logo@example.com>"
+    )
+    return message
+
+
+def forwarded(marker: str) -> EmailMessage:
+    original = plain_and_html(marker)
+    original["Subject"] = "Original"
+    message = EmailMessage()
+    message.set_content("FYI, see below.\n")
+    message.add_attachment(original)
+    return message
+
+
+def invite(marker: str) -> EmailMessage:
+    message = plain_and_html(marker)
+    message.add_alternative(
+        "BEGIN:VCALENDAR\nMETHOD:REQUEST\nEND:VCALENDAR\n",
+        subtype="calendar",
+        params={"method": "REQUEST"},
+    )
+    return message
+
+
+def legacy_charset(marker: str) -> EmailMessage:
+    message = EmailMessage()
+    message.set_content(
+        f"{marker}\n" + CYRILLIC * 20, charset="windows-1251", cte="quoted-printable"
+    )
+    return message
+
+
+def csv_attachment(marker: str) -> EmailMessage:
+    message = plain(marker)
+    message.add_attachment("id,value\n" + "1,2\n" * 20000, subtype="csv")
+    return message
+
+
+def long_base64(marker: str) -> EmailMessage:
+    # past the part cap, cut in the middle of a two-byte character
+    message = EmailMessage()
+    message.set_content(f"{marker}\n" + CYRILLIC * 4000, cte="base64")
+    return message
+
+
+SHAPES = {
+    "plain": plain,
+    "plain + html": plain_and_html,
+    "html newsletter": newsletter,
+    "report + pdf": report_with_pdf,
+    "outlook related": outlook,
+    "forwarded": forwarded,
+    "calendar invite": invite,
+    "windows-1251 qp": legacy_charset,
+    "csv attachment": csv_attachment,
+    "long base64": long_base64,
+}
+
+
+def corpus(build) -> list[EmailMessage]:
+    messages = []
+    for i in range(N_COPIES):
+        message = build(f"MARKER-{i}")
+        message["Subject"] = f"Message #{i}"
+        message["From"] = '"Team" <team@example.com>'
+        message["To"] = "me@example.com"
+        message["Date"] = format_datetime(START)
+        messages.append(message)
+    return messages
+
+
+async def picked(mail: ImapClient, uids: list[bytes]) -> list[str]:
+    messages = await fetch_messages(
+        mail,
+        uids,
+        max_part_bytes=imap_settings.imap_max_part_bytes,
+        max_email_bytes=imap_settings.imap_max_email_bytes,
+        batch_size=imap_settings.imap_fetch_batch_size,
+    )
+    return ["".join(text + "\n" for text in message.texts()) for message in messages]
+
+
+def check(label: str, texts: list[str]) -> None:
+    for i, text in enumerate(texts):
+        assert f"MARKER-{i}" in text, (label, text[:200])
+        assert "�" not in text, label
+        assert "BEGIN:VCALENDAR" not in text, label
+        assert "id,value" not in text, label
+        # HTML only where there is no plain text alternative
+        assert ("<html>" in text) == (label == "html newsletter"), label
+
+
+def row(elapsed: float, received: int, texts: list[str]) -> str:
+    chars = sum(map(len, texts)) / len(texts)
+    return f"{elapsed * 1000:8.1f}ms {received / 1024:9.1f} KiB {chars:9.0f} chars"
+
+
+async def run(label: str, build) -> None:
+    with ImapStub(corpus(build), LATENCY) as stub:
+        uids = [str(uid).encode() for uid in stub.uids]
+
+        mail = imaplib.IMAP4("127.0.0.1", stub.port)
+        mail.login("me@example.com", "password")
+        mail.select("INBOX")
+        sent = stub.bytes_sent
+        started = time.perf_counter()
+        walked = per_message(mail, uids)
+        walk = row(time.perf_counter() - started, stub.bytes_sent - sent, walked)
+        mail.logout()
+
+        client = await ImapClient("127.0.0.1", stub.port, use_ssl=False).connect()
+        await client.login("me@example.com", "password")
+        await client.select("INBOX")
+        sent = stub.bytes_sent
+        started = time.perf_counter()
+        texts = await picked(client, uids)
+        pick = row(time.perf_counter() - started, stub.bytes_sent - sent, texts)
+        await client.logout()
+
+    check(label, texts)
+    print(f"{label:<16} walk {walk}   picked {pick}")
+
+
+async def main():
+    for label, build in SHAPES.items():
+        await run(label, build)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Result path of a 200-email summarize reply, dict round trips vs. typed output.
+
+The old path dumps the output to JSON and back in the router, re-validates it
+in the result former and serializes the reply with `json.dumps`. The new path hands the output model to the former and
+serializes the reply once.
+
+    rye run python benchmarks/result_path.py
+"""
+
+import json
+import time
+
+from pydantic_core import to_json
+
+from agnia_smart_digest.action.backend.emails import EmailOutputModel
+from agnia_smart_digest.action.backend.summarize_emails import (
+    EmailSummaryOutputParams,
+    summarized_emails_message,
+)
+
+N_EMAILS = 200
+N_ROUNDS = 200
+REQUEST = {
+    "request_id": "42",
+    "system_name": "General",
+    "action_name": "summarize_emails_action",
+    "input_data": {},
+    "system_authorization_data": None,
+}
+
+
+def make_output() -> EmailSummaryOutputParams:
+    emails = [
+        EmailOutputModel(
+            Subject=f"Weekly report #{i}",
+            From="team@example.com",
+            To="me@example.com",
+            Date="Mon, 1 Jul 2024 10:00:00 +0300",
+            Text="The deployment went fine and the metrics look stable. " * 8,
+        )
+        for i in range(N_EMAILS)
+    ]
+    return EmailSummaryOutputParams(emails=emails)
+
+
+def legacy_former(data: dict) -> tuple[str, dict]:
+    obj = EmailSummaryOutputParams.model_validate(data)
+    formatted_message = f"<i>Summarized {len(obj.emails)} emails ✅</i>\n"
+    for email_data in obj.emails:
+        formatted_message += (
+            f"✉️ «{email_data.Subject}» {email_data.Date}\n{email_data.Text}\n\n"
+        )
+    return formatted_message, obj.model_dump()
+
+
+def legacy_path(output: EmailSummaryOutputParams) -> str:
+    result = json.loads(output.json())
+    message_str, message_dict = legacy_former(result)
+    response = {
+        **REQUEST,
+        "message_str": message_str,
+        "message_dict": message_dict,
+        "result": result,
+    }
+    return json.dumps(response)
+
+
+def typed_path(output: EmailSummaryOutputParams) -> str:
+    message_str, message_dict = summarized_emails_message(output)
+    response = {
+        **REQUEST,
+        "message_str": message_str,
+        "message_dict": message_dict,
+        "result": output,
+    }
+    return to_json(response).decode()
+
+
+def run(label: str, path) -> float:
+    outputs = [make_output() for _ in range(N_ROUNDS)]
+    started = time.perf_counter()
+    for output in outputs:
+        path(output)
+    elapsed = (time.perf_counter() - started) / N_ROUNDS
+    print(f"{label:<8} {elapsed * 1000:7.3f}ms per reply")
+    return elapsed
+
+
+def main() -> None:
+    assert json.loads(legacy_path(make_output())) == json.loads(
+        typed_path(make_output())
+    )
+
+    legacy = run("legacy", legacy_path)
+    typed = run("typed", typed_path)
+    print(f"speedup  {legacy / typed:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""A local SMTP stand-in for the email benchmarks.
+
+Plain TCP, no TLS. Understands what `send_email_action` sends: EHLO, AUTH
+PLAIN/LOGIN, MAIL FROM, RCPT TO, DATA, RSET, NOOP and QUIT. Accepted
+messages are kept in `messages` with dot-stuffing undone. Every reply is
+sent after `latency` seconds to stand in for the network round trip.
+
+Not a benchmark by itself, imported by the ones that talk SMTP.
+"""
+
+import socketserver
+import threading
+import time
+from typing import Self
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    # the default of 5 drops connections made at the same time
+    request_queue_size = 128
+
+
+class SmtpStub:
+    def __init__(self, latency: float = 0.005):
+        self.latency = latency
+        self.commands = 0
+        # (sender, recipients, data)
+        self.messages: list[tuple[str, list[str], bytes]] = []
+        self._lock = threading.Lock()
+
+        stub = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line: str) -> None:
+                time.sleep(stub.latency)
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                sender, recipients = "", []
+                self.reply("220 stub ready")
+                while line := self.rfile.readline():
+                    stub.commands += 1
+                    command = line.strip().decode()
+                    verb = command.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        self.wfile.write(b"250-stub\r\n250-AUTH PLAIN LOGIN\r\n")
+                        self.reply("250 8BITMIME")
+                    elif verb == "AUTH" and command.upper() == "AUTH LOGIN":
+                        self.reply("334 VXNlcm5hbWU6")
+                        self.rfile.readline()
+                        self.reply("334 UGFzc3dvcmQ6")
+                        self.rfile.readline()
+                        self.reply("235 authenticated")
+                    elif verb == "AUTH":
+                        self.reply("235 authenticated")
+                    elif verb == "MAIL":
+                        sender, recipients = command[10:].strip("<>"), []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        recipients.append(command[8:].strip("<>"))
+                        self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 end with <CRLF>.<CRLF>")
+                        lines = []
+                        while (data := self.rfile.readline()) != b".\r\n":
+                            if not data:
+                                return
+                            lines.append(data[1:] if data.startswith(b".") else data)
+                        with stub._lock:
+                            stub.messages.append((sender, recipients, b"".join(lines)))
+                        self.reply("250 queued")
+                    elif verb == "QUIT":
+                        self.reply("221 bye")
+                        return
+                    else:
+                        self.reply("250 OK")
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+
+    def __enter__(self) -> Self:
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
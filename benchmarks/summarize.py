@@ -0,0 +1,136 @@
+"""Summarizing emails, one by one with dict lookups vs. batched with NumPy.
+
+The one by one summarizer is `summarize_email` as it was: it read the
+stopword list on every call and searched it for every word, and scored
+sentences word by word in a dict. The batched one scores the sentences
+of all the emails at once from a sparse term matrix and picks each
+summary with `argpartition`. Its summaries must be the same on the whole
+corpus, except where the old one crashed: emails that are empty, have no
+English words or start with a stopword. Tokenizing is shared through
+`EmailAnalysis` and timed separately.
+
+    rye run python benchmarks/summarize.py
+"""
+
+import heapq
+import random
+import re
+import time
+
+import nltk
+
+from agnia_smart_digest.action.backend.email_analysis import analysis_cache
+from agnia_smart_digest.action.backend.summarize_emails import summarize_emails
+
+N_EMAILS = 300
+ROUNDS = 3
+SENTENCES = [
+    "The deployment of release {n} went fine, metrics look stable.",
+    "We cannot roll back the database migration before Monday [2].",
+    "Latency of the search API dropped to {n} ms at p99!",
+    "Could you review the budget for the new cache servers?",
+    "The index rebuild is gonna take about {n} hours.",
+    "Alice approved the rollback plan; Bob will run it tonight.",
+    "Please see the attached report for the details of incident #{n}.",
+    "Thanks!",
+    "Dr. Smith from the U.S. office joins the call at 3 p.m.",
+    "The on-call rotation changes next week, check the calendar.",
+    "Отчёт о развёртывании приложен.",
+    (
+        "Error rates stayed below 0.{n}% during the whole rollout, which is well "
+        "within the budget we agreed on with the product team last quarter, so "
+        "no further action is needed from anyone on this thread right now."
+    ),
+]
+
+
+def corpus() -> list[str]:
+    random.seed(0)
+    emails = [
+        " ".join(
+            random.choice(SENTENCES).format(n=random.randrange(100))
+            for _ in range(random.randint(1, 40))
+        )
+        for _ in range(N_EMAILS)
+    ]
+    # the old summarizer crashed on these, and on emails without English words
+    return emails + ["", "The release is out.", "[1] 2024-05-01"]
+
+
+def summarize_before(email_text: str) -> str:
+    # what summarize_email did before
+    email_text = re.sub(r"\[[0-9]*\]", " ", email_text)
+    email_text = re.sub(r"\s+", " ", email_text)
+    formatted_email_text = re.sub("[^a-zA-Z]", " ", email_text)
+    formatted_email_text = re.sub(r"\s+", " ", formatted_email_text)
+    sentence_list = nltk.sent_tokenize(email_text)
+    stopwords = nltk.corpus.stopwords.words("english")
+
+    word_frequencies = {}
+    for word in nltk.word_tokenize(formatted_email_text):
+        if word not in stopwords:
+            if word not in word_frequencies:
+                word_frequencies[word] = 1
+            else:
+                word_frequencies[word] += 1
+        maximum_frequncy = max(word_frequencies.values())
+    for word, count in word_frequencies.items():
+        word_frequencies[word] = count / maximum_frequncy
+        sentence_scores = {}
+    for sent in sentence_list:
+        for word in nltk.word_tokenize(sent.lower()):
+            if word in word_frequencies and len(sent.split(" ")) < 30:
+                if sent not in sentence_scores:
+                    sentence_scores[sent] = word_frequencies[word]
+                else:
+                    sentence_scores[sent] += word_frequencies[word]
+
+    summary_sentences = heapq.nlargest(7, sentence_scores, key=sentence_scores.get)  # type: ignore
+    return " ".join(summary_sentences)
+
+
+def measure(label: str, run, prepare=None) -> list[str]:
+    total = 0.0
+    for _ in range(ROUNDS):
+        if prepare is not None:
+            prepare()
+        started = time.process_time()
+        summaries = run()
+        total += time.process_time() - started
+    per_email = total / ROUNDS / len(summaries)
+    print(f"{label:<30} {per_email * 1000:7.3f}ms CPU per email")
+    return summaries
+
+
+def one_by_one(emails: list[str]) -> list[str | None]:
+    summaries = []
+    for email in emails:
+        try:
+            summaries.append(summarize_before(email))
+        except (ValueError, UnboundLocalError):
+            summaries.append(None)
+    return summaries
+
+
+def main():
+    emails = corpus()
+    before = measure("one by one", lambda: one_by_one(emails))
+    after = measure(
+        "batched, tokenizing",
+        lambda: summarize_emails(emails),
+        prepare=analysis_cache._entries.clear,
+    )
+    measure("batched, tokens cached", lambda: summarize_emails(emails))
+
+    crashed = 0
+    for email, expected, summary in zip(emails, before, after):
+        if expected is None:
+            crashed += 1
+            assert all(sentence in email for sentence in summary.split(". ")), email
+        else:
+            assert summary == expected, (email, expected, summary)
+    print(f"golden: {len(emails) - crashed} summaries equal, {crashed} old crashes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,56 @@
+import argparse
 import asyncio
-import importlib
 
 import uvicorn
 import yaml
 
 import agnia_smart_digest.servers.http.server as http_server
 import agnia_smart_digest.servers.socket.server as socket_server
+from agnia_smart_digest.action.loader import dump_schemas, load_actions
+from agnia_smart_digest.settings import action_loading_settings
+from agnia_smart_digest.utils.startup_profiler import profile_startup
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="agnia-smart-digest")
+    commands = parser.add_subparsers(dest="command")
+
+    commands.add_parser(
+        "dump-schemas", help="write the schema file of every action for lazy loading"
+    )
+
+    profile = commands.add_parser(
+        "profile-startup", help="report import, memory and lifespan startup costs"
+    )
+    profile.add_argument("--output", default="startup-profile.json")
+    profile.add_argument(
+        "--no-lifespan",
+        action="store_true",
+        help="skip running the server lifespan (it talks to the API endpoints)",
+    )
+
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     config = yaml.load(open("config.yml"), Loader=yaml.FullLoader)
 
-    for module in config["load_actions"]:
-        importlib.import_module(module)
+    if args.command == "dump-schemas":
+        dump_schemas(config["load_actions"], action_loading_settings.schemas_dir)
+        return
+
+    if args.command == "profile-startup":
+        profile_startup(
+            config["load_actions"], args.output, with_lifespan=not args.no_lifespan
+        )
+        return
+
+    load_actions(
+        config["load_actions"],
+        action_loading_settings.schemas_dir,
+        lazy=action_loading_settings.lazy_actions,
+    )
 
     config = uvicorn.Config(http_server.build_app(), port=8845, log_level="info")
     server = uvicorn.Server(config)
@@ -0,0 +1,156 @@
+import asyncio
+import json
+import re
+from dataclasses import dataclass
+
+from pydantic import BaseModel, ValidationError
+
+from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.registry import action_registry
+from agnia_smart_digest.external_services.llm import LLM
+from agnia_smart_digest.utils.helpers import prepare_prompt
+from agnia_smart_digest.utils.logger import Logger
+
+logger = Logger("extraction-engine")
+
+INSTRUCTION_PATTERN = re.compile(r"<Instruction>\s*(.*?)\s*</Instruction>", re.DOTALL)
+
+
+@dataclass
+class ExtractionField:
+    # output field of the extractor, e.g. "extracted_receiver"
+    name: str
+    action_cls: type[Action]
+    system_name: str = "General"
+
+
+class MultiFieldExtractor:
+    """Answers several extractor fields with one LLM call.
+
+    The prompt is assembled from the instructions of the existing single-field
+    extractors, and the answer is a JSON object keyed by output field. Fields
+    that are missing or fail validation are re-extracted with their own
+    single-field prompt. Fields that an extractor's rule-based `match_rules`
+    pre-pass resolves confidently are left out of the prompt altogether.
+    """
+
+    def __init__(self, fields: list[ExtractionField]):
+        self.fields = fields
+        # reuse the registry's long-lived extractor instances
+        self.actions = [
+            action_registry.get_action_spec(
+                field.system_name, field.action_cls.action_name
+            ).instance
+            for field in fields
+        ]
+
+        self.llm = LLM(use_cache=all(self.uses_cache(a) for a in self.actions))
+        self.stop = "</Answer>"
+
+    @staticmethod
+    def uses_cache(action: Action) -> bool:
+        llm = getattr(action, "llm", None)
+        return llm is None or llm.use_cache
+
+    async def extract(self, user_request: str) -> dict:
+        result = {}
+        pending = []
+        for field, action in zip(self.fields, self.actions, strict=True):
+            match_rules = getattr(action, "match_rules", None)
+            match = match_rules(user_request) if match_rules else None
+            if match is not None and match.confident:
+                result[field.name] = match.value
+            else:
+                pending.append((field, action))
+
+        if not pending:
+            return result
+
+        answers = {}
+        try:
+            answer = await self.llm.get_response(
+                {
+                    "prompt": prepare_prompt(
+                        self.get_prompt(pending),
+                        self.prepare_request(user_request, pending),
+                    ),
+                    "stop": self.stop,
+                    "max_tokens": sum(
+                        getattr(action, "max_tokens", 50) for _, action in pending
+                    ),
+                }
+            )
+            answers = self.parse_answer(answer)
+        except (ValueError, TypeError) as e:
+            logger.error(f"failed to parse fused answer, falling back: {e}")
+
+        fallbacks = []
+        for field, action in pending:
+            output_type = action_registry.get_output_type(
+                field.system_name, action.action_name
+            )
+            try:
+                output = output_type.model_validate({field.name: answers[field.name]})
+                result[field.name] = getattr(output, field.name)
+            except (KeyError, ValidationError):
+                fallbacks.append((field, action))
+
+        if fallbacks:
+            logger.info(f"single-field fallback for {[f.name for f, _ in fallbacks]}")
+            outputs = await asyncio.gather(
+                *(self.extract_single(f, a, user_request) for f, a in fallbacks)
+            )
+            for (field, _), output in zip(fallbacks, outputs, strict=True):
+                result[field.name] = getattr(output, field.name)
+
+        return result
+
+    async def extract_single(
+        self, field: ExtractionField, action: Action, user_request: str
+    ) -> BaseModel:
+        input_type = action_registry.get_input_type(
+            field.system_name, action.action_name
+        )
+        return await action.execute(input_type(user_request=user_request))
+
+    def prepare_request(
+        self, user_request: str, fields: list[tuple[ExtractionField, Action]]
+    ) -> str:
+        # extractors that need extra context (e.g. the current time) add it here
+        for _, action in fields:
+            prepare = getattr(action, "prepare_request", None)
+            if prepare is not None:
+                user_request = prepare(user_request)
+        return user_request
+
+    @staticmethod
+    def parse_answer(answer) -> dict:
+        if isinstance(answer, dict):
+            return answer
+
+        start, end = answer.find("{"), answer.rfind("}")
+        if start == -1 or end < start:
+            raise ValueError(f"no JSON object in answer: {answer!r}")
+
+        answers = json.loads(answer[start : end + 1])
+        if not isinstance(answers, dict):
+            raise TypeError(f"answer is not a JSON object: {answer!r}")
+        return answers
+
+    def get_prompt(self, fields: list[tuple[ExtractionField, Action]]) -> str:
+        keys = ", ".join(f'"{field.name}"' for field, _ in fields)
+        tasks = []
+        for field, action in fields:
+            instruction = INSTRUCTION_PATTERN.search(action.get_prompt())
+            if instruction is None:
+                raise ValueError(f"no instruction in {action.action_name} prompt")
+            tasks.append(f'<Task key="{field.name}">\n{instruction.group(1)}\n</Task>')
+
+        return (
+            "<Prompt>\n<Instruction>\n"
+            "Complete every task below for the same user request.\n"
+            f"Return only a JSON object with the keys {keys}, "
+            "where each value is the answer to the task with that key.\n"
+            "</Instruction>\n\n" + "\n\n".join(tasks) + "\n\n\n"
+            "<Question>\n<User review>{USER_REQUEST}</User review>\n<Answer>"
+        )
@@ -1,10 +1,25 @@
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.ai.rules import (
+    RuleMatch,
+    parse_answer_number,
+    parse_number,
+)
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.external_services.llm import LLM
 from agnia_smart_digest.utils.helpers import prepare_prompt
 
+ARTICLE_NOUNS = (
+    "article",
+    "articles",
+    "news",
+    "headline",
+    "headlines",
+    "story",
+    "stories",
+)
+
 
 class ExtractArticleNumberActionInputParams(BaseModel):
     user_request: str
@@ -14,12 +29,12 @@ class ExtractArticleNumberActionOutputParams(BaseModel):
     extracted_article_number: int
 
 
-def extract_article_number_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractArticleNumberActionOutputParams.model_validate(data)
-
+def extract_article_number_message(
+    obj: ExtractArticleNumberActionOutputParams,
+) -> tuple[str, ExtractArticleNumberActionOutputParams]:
     return (
         f"<i>Extracted number of acrticles: {obj.extracted_article_number} ✅</i>",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -48,15 +63,31 @@ class ExtractArticleNumberAction(
         self, input_data: ExtractArticleNumberActionInputParams
     ) -> ExtractArticleNumberActionOutputParams:
         user_request = input_data.user_request
+        match = self.match_rules(user_request)
+        if match.confident:
+            return ExtractArticleNumberActionOutputParams(
+                extracted_article_number=match.value
+            )
+
         prompt = self.get_prompt()
         prompt = prepare_prompt(prompt, user_request)
         answer = await self.llm.get_response(
             {"prompt": prompt, "stop": self.stop, "max_tokens": self.max_tokens}
         )
+        number = parse_answer_number(answer)
         return ExtractArticleNumberActionOutputParams(
-            extracted_article_number=int(answer)
+            extracted_article_number=self.clamp(3 if number is None else number)
         )
 
+    def clamp(self, number: int) -> int:
+        return min(max(number, 1), 5)
+
+    def match_rules(self, user_request: str) -> RuleMatch:
+        match = parse_number(user_request, ARTICLE_NOUNS)
+        if match.value is not None:
+            match.value = self.clamp(match.value)
+        return match
+
     def get_prompt(self) -> str:
         return """<Prompt>
 <Instruction>
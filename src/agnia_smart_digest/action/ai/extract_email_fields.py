@@ -0,0 +1,82 @@
+from pydantic import BaseModel
+
+from agnia_smart_digest.action.ai.engine import ExtractionField, MultiFieldExtractor
+from agnia_smart_digest.action.ai.extract_email_receiver import (
+    ExtractEmailReceiverAction,
+    ExtractEmailReceiverActionOutputParams,
+    extract_email_receiver_message,
+)
+from agnia_smart_digest.action.ai.extract_email_subject import (
+    ExtractEmailSubjectAction,
+    ExtractEmailSubjectActionOutputParams,
+    extract_email_subject_message,
+)
+from agnia_smart_digest.action.ai.extract_email_text import (
+    ExtractEmailTextAction,
+    ExtractEmailTextActionOutputParams,
+    extract_email_text_message,
+)
+from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.registry import register_action
+
+
+class ExtractEmailFieldsActionInputParams(BaseModel):
+    user_request: str
+
+
+class ExtractEmailFieldsActionOutputParams(BaseModel):
+    extracted_receiver: str
+    extracted_text: str
+    extracted_subject: str
+
+
+def extract_email_fields_message(
+    obj: ExtractEmailFieldsActionOutputParams,
+) -> tuple[str, ExtractEmailFieldsActionOutputParams]:
+    messages = [
+        extract_email_receiver_message(
+            ExtractEmailReceiverActionOutputParams.model_construct(
+                extracted_receiver=obj.extracted_receiver
+            )
+        )[0],
+        extract_email_text_message(
+            ExtractEmailTextActionOutputParams.model_construct(
+                extracted_text=obj.extracted_text
+            )
+        )[0],
+        extract_email_subject_message(
+            ExtractEmailSubjectActionOutputParams.model_construct(
+                extracted_subject=obj.extracted_subject
+            )
+        )[0],
+    ]
+    return "\n\n".join(messages), obj
+
+
+@register_action(
+    ExtractEmailFieldsActionInputParams,
+    ExtractEmailFieldsActionOutputParams,
+    "General",
+    result_message_func=extract_email_fields_message,
+)
+class ExtractEmailFieldsAction(
+    Action[ExtractEmailFieldsActionInputParams, ExtractEmailFieldsActionOutputParams]
+):
+    action_name = "extract_email_fields_action"
+
+    def __init__(self) -> None:
+        super().__init__("extract_email_fields_action")
+
+        self.engine = MultiFieldExtractor(
+            [
+                ExtractionField("extracted_receiver", ExtractEmailReceiverAction),
+                ExtractionField("extracted_text", ExtractEmailTextAction),
+                ExtractionField("extracted_subject", ExtractEmailSubjectAction),
+            ]
+        )
+
+    async def execute(
+        self, input_data: ExtractEmailFieldsActionInputParams
+    ) -> ExtractEmailFieldsActionOutputParams:
+        fields = await self.engine.extract(input_data.user_request)
+        return ExtractEmailFieldsActionOutputParams(**fields)
@@ -1,10 +1,26 @@
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.ai.rules import (
+    RuleMatch,
+    parse_answer_number,
+    parse_number,
+)
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.external_services.llm import LLM
 from agnia_smart_digest.utils.helpers import prepare_prompt
 
+EMAIL_NOUNS = (
+    "email",
+    "emails",
+    "mail",
+    "mails",
+    "letter",
+    "letters",
+    "message",
+    "messages",
+)
+
 
 class ExtractEmailNumberActionInputParams(BaseModel):
     user_request: str
@@ -14,12 +30,12 @@ class ExtractEmailNumberActionOutputParams(BaseModel):
     extracted_email_number: int
 
 
-def extract_email_number_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractEmailNumberActionOutputParams.model_validate(data)
-
+def extract_email_number_message(
+    obj: ExtractEmailNumberActionOutputParams,
+) -> tuple[str, ExtractEmailNumberActionOutputParams]:
     return (
         f"<i>Extracted number of emails: {obj.extracted_email_number} ✅</i>",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -46,12 +62,30 @@ class ExtractEmailNumberAction(
         self, input_data: ExtractEmailNumberActionInputParams
     ) -> ExtractEmailNumberActionOutputParams:
         user_request = input_data.user_request
+        match = self.match_rules(user_request)
+        if match.confident:
+            return ExtractEmailNumberActionOutputParams(
+                extracted_email_number=match.value
+            )
+
         prompt = self.get_prompt()
         prompt = prepare_prompt(prompt, user_request)
         answer = await self.llm.get_response(
             {"prompt": prompt, "stop": self.stop, "max_tokens": self.max_tokens}
         )
-        return ExtractEmailNumberActionOutputParams(extracted_email_number=int(answer))
+        number = parse_answer_number(answer)
+        return ExtractEmailNumberActionOutputParams(
+            extracted_email_number=self.clamp(3 if number is None else number)
+        )
+
+    def clamp(self, number: int) -> int:
+        return min(max(number, 1), 10)
+
+    def match_rules(self, user_request: str) -> RuleMatch:
+        match = parse_number(user_request, EMAIL_NOUNS)
+        if match.value is not None:
+            match.value = self.clamp(match.value)
+        return match
 
     def get_prompt(self) -> str:
         return """<Prompt>
@@ -14,11 +14,12 @@ class ExtractEmailReceiverActionOutputParams(BaseModel):
     extracted_receiver: str
 
 
-def extract_email_receiver_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractEmailReceiverActionOutputParams.model_validate(data)
+def extract_email_receiver_message(
+    obj: ExtractEmailReceiverActionOutputParams,
+) -> tuple[str, ExtractEmailReceiverActionOutputParams]:
     return (
         f"<i>Extracted receiver from request ✅</i>\n👤 {obj.extracted_receiver}",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -14,11 +14,12 @@ class ExtractEmailSubjectActionOutputParams(BaseModel):
     extracted_subject: str
 
 
-def extract_email_subject_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractEmailSubjectActionOutputParams.model_validate(data)
+def extract_email_subject_message(
+    obj: ExtractEmailSubjectActionOutputParams,
+) -> tuple[str, ExtractEmailSubjectActionOutputParams]:
     return (
         f"<i>Extracted subject from request ✅</i>\n📬 <b>{obj.extracted_subject}</b>",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -14,14 +14,15 @@ class ExtractEmailTextActionOutputParams(BaseModel):
     extracted_text: str
 
 
-def extract_email_text_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractEmailTextActionOutputParams.model_validate(data)
+def extract_email_text_message(
+    obj: ExtractEmailTextActionOutputParams,
+) -> tuple[str, ExtractEmailTextActionOutputParams]:
     return (
         (
             "<i>Extracted text from request ✅</i>\n"
             f"<blockquote expandable>{obj.extracted_text}</blockquote>"
         ),
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -1,10 +1,32 @@
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.ai.rules import KeywordMatcher, RuleMatch
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.external_services.llm import LLM
 from agnia_smart_digest.utils.helpers import prepare_prompt
 
+formats_matcher = KeywordMatcher(
+    {
+        "poem": "Poem",
+        "poetry": "Poem",
+        "rhyme": "Poem",
+        "haiku": "Haiku",
+        "essay": "Essay",
+        "short summary": "Short Summary",
+        "summary": "Short Summary",
+        "summarize": "Short Summary",
+        "summarizing": "Short Summary",
+        "digest": "Short Summary",
+        "bullet points": "Bullet Points",
+        "bulleted list": "Bullet Points",
+        "report": "Report",
+        "letter": "Letter",
+    }
+)
+# also said of what the digest is about ("the weekly report"), not its format
+VAGUE_KEYWORDS = frozenset(("digest", "report", "letter"))
+
 
 class ExtractFormatActionInputParams(BaseModel):
     user_request: str
@@ -14,9 +36,10 @@ class ExtractFormatActionOutputParams(BaseModel):
     extracted_format: str
 
 
-def extract_format_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractFormatActionOutputParams.model_validate(data)
-    return f"<i>Extracted «{obj.extracted_format}» format ✅</i>", obj.model_dump()
+def extract_format_message(
+    obj: ExtractFormatActionOutputParams,
+) -> tuple[str, ExtractFormatActionOutputParams]:
+    return f"<i>Extracted «{obj.extracted_format}» format ✅</i>", obj
 
 
 @register_action(
@@ -42,6 +65,10 @@ class ExtractFormatAction(
         self, input_data: ExtractFormatActionInputParams
     ) -> ExtractFormatActionOutputParams:
         user_request = input_data.user_request
+        match = self.match_rules(user_request)
+        if match.confident:
+            return ExtractFormatActionOutputParams(extracted_format=match.value)
+
         prompt = self.get_prompt()
         prompt = prepare_prompt(prompt, user_request)
         answer = await self.llm.get_response(
@@ -49,6 +76,14 @@ class ExtractFormatAction(
         )
         return ExtractFormatActionOutputParams(extracted_format=answer)
 
+    def match_rules(self, user_request: str) -> RuleMatch:
+        formats = formats_matcher.labels(user_request)
+        if len(formats) == 1:
+            keywords = formats_matcher.keywords(user_request)
+            specific = any(keyword not in VAGUE_KEYWORDS for keyword in keywords)
+            return RuleMatch(formats[0], 0.9 if specific else 0.6)
+        return RuleMatch(formats[0] if formats else None, 0.5 if formats else 0.0)
+
     def get_prompt(self) -> str:
         return """<Prompt>
 <Instruction>
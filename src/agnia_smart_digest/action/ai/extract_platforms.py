@@ -2,11 +2,33 @@ import json
 
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.ai.rules import KeywordMatcher, RuleMatch
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.external_services.llm import LLM
 from agnia_smart_digest.utils.helpers import prepare_prompt
 
+platforms_matcher = KeywordMatcher(
+    {
+        "outlook": "outlook",
+        "gmail": "gmail",
+        "google mail": "gmail",
+        "teamflame": "teamflame",
+        "team flame": "teamflame",
+        "gitflame": "gitflame",
+        "git flame": "gitflame",
+        "google meet": "google meet",
+        "telegram": "telegram",
+        "moodle": "moodle",
+        "zoom": "zoom",
+        "slack": "slack",
+        "github": "github",
+        "gitlab": "gitlab",
+    }
+)
+# plain English words as well ("zoom in", "the weekly outlook")
+VAGUE_KEYWORDS = frozenset(("outlook", "zoom", "slack"))
+
 
 class ExtractPlatformsActionInputParams(BaseModel):
     user_request: str
@@ -16,11 +38,12 @@ class ExtractPlatformsActionOutputParams(BaseModel):
     extracted_platforms: list[str]
 
 
-def extract_platforms_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractPlatformsActionOutputParams.model_validate(data)
+def extract_platforms_message(
+    obj: ExtractPlatformsActionOutputParams,
+) -> tuple[str, ExtractPlatformsActionOutputParams]:
     return (
         "<i>Extracted «" + json.dumps(obj.extracted_platforms) + "» platforms ✅</i>",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -47,6 +70,10 @@ class ExtractPlatformsAction(
         self, input_data: ExtractPlatformsActionInputParams
     ) -> ExtractPlatformsActionOutputParams:
         user_request = input_data.user_request
+        match = self.match_rules(user_request)
+        if match.confident:
+            return ExtractPlatformsActionOutputParams(extracted_platforms=match.value)
+
         prompt = self.get_prompt()
         prompt = prepare_prompt(prompt, user_request)
         answer = await self.llm.get_response(
@@ -56,6 +83,14 @@ class ExtractPlatformsAction(
             extracted_platforms=json.loads(answer)
         )
 
+    def match_rules(self, user_request: str) -> RuleMatch:
+        platforms = platforms_matcher.labels(user_request)
+        if not platforms:
+            return RuleMatch(platforms, 0.0)
+        keywords = platforms_matcher.keywords(user_request)
+        vague = any(keyword in VAGUE_KEYWORDS for keyword in keywords)
+        return RuleMatch(platforms, 0.6 if vague else 0.9)
+
     def get_prompt(self) -> str:
         return """<Prompt>
 <Instruction>
@@ -3,6 +3,7 @@ from datetime import datetime
 import humanfriendly
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.ai.rules import RuleMatch, parse_reminder_datetime
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.external_services.llm import LLM
@@ -17,9 +18,9 @@ class ExtractReminderDatetimeActionOutputParams(BaseModel):
     reminder_datetime: str
 
 
-def extract_reminder_datetime_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractReminderDatetimeActionOutputParams.model_validate(data)
-
+def extract_reminder_datetime_message(
+    obj: ExtractReminderDatetimeActionOutputParams,
+) -> tuple[str, ExtractReminderDatetimeActionOutputParams]:
     delta = datetime.fromisoformat(obj.reminder_datetime) - datetime.now()
 
     return (
@@ -27,7 +28,7 @@ def extract_reminder_datetime_message(data: dict) -> tuple[str, dict]:
             f"<i>Extracted reminder timedelta ✅</i>\n"
             f"⏰ Will remind in {humanfriendly.format_timespan(delta.total_seconds())}"
         ),
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -48,7 +49,8 @@ class ExtractReminderDatetimeAction(
     def __init__(self) -> None:
         super().__init__("extract_reminder_datetime_action")
 
-        self.llm = LLM()
+        # the prompt embeds the current time, so answers are never reusable
+        self.llm = LLM(use_cache=False)
         self.stop = "</Answer>"
         self.max_tokens = 50
         self.temperature = 0.1
@@ -56,17 +58,29 @@ class ExtractReminderDatetimeAction(
     async def execute(
         self, input_data: ExtractReminderDatetimeActionInputParams
     ) -> ExtractReminderDatetimeActionOutputParams:
-        user_request = input_data.user_request
+        match = self.match_rules(input_data.user_request)
+        if match.confident:
+            return ExtractReminderDatetimeActionOutputParams(
+                reminder_datetime=match.value
+            )
+
+        user_request = self.prepare_request(input_data.user_request)
         prompt = self.get_prompt()
-        user_request = (
-            f"Current date and time is {datetime.now().isoformat()}. {user_request}"
-        )
         prompt = prepare_prompt(prompt, user_request)
         answer = await self.llm.get_response(
             {"prompt": prompt, "stop": self.stop, "max_tokens": self.max_tokens}
         )
         return ExtractReminderDatetimeActionOutputParams(reminder_datetime=answer)
 
+    def match_rules(self, user_request: str) -> RuleMatch:
+        match = parse_reminder_datetime(user_request, datetime.now())
+        if match.value is not None:
+            match.value = match.value.isoformat(timespec="seconds")
+        return match
+
+    def prepare_request(self, user_request: str) -> str:
+        return f"Current date and time is {datetime.now().isoformat()}. {user_request}"
+
     def get_prompt(self) -> str:
         return """<Prompt>
 <Instruction>
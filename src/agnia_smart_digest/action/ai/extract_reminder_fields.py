@@ -0,0 +1,73 @@
+from pydantic import BaseModel
+
+from agnia_smart_digest.action.ai.engine import ExtractionField, MultiFieldExtractor
+from agnia_smart_digest.action.ai.extract_reminder_datetime import (
+    ExtractReminderDatetimeAction,
+    ExtractReminderDatetimeActionOutputParams,
+    extract_reminder_datetime_message,
+)
+from agnia_smart_digest.action.ai.generate_reminder_text import (
+    GenerateReminderTextAction,
+    GenerateReminderTextActionOutputParams,
+    generate_reminder_text_message,
+)
+from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.registry import register_action
+
+
+class ExtractReminderFieldsActionInputParams(BaseModel):
+    user_request: str
+
+
+class ExtractReminderFieldsActionOutputParams(BaseModel):
+    reminder_datetime: str
+    reminder_text: str
+
+
+def extract_reminder_fields_message(
+    obj: ExtractReminderFieldsActionOutputParams,
+) -> tuple[str, ExtractReminderFieldsActionOutputParams]:
+    messages = [
+        extract_reminder_datetime_message(
+            ExtractReminderDatetimeActionOutputParams.model_construct(
+                reminder_datetime=obj.reminder_datetime
+            )
+        )[0],
+        generate_reminder_text_message(
+            GenerateReminderTextActionOutputParams.model_construct(
+                reminder_text=obj.reminder_text
+            )
+        )[0],
+    ]
+    return "\n\n".join(messages), obj
+
+
+@register_action(
+    ExtractReminderFieldsActionInputParams,
+    ExtractReminderFieldsActionOutputParams,
+    "General",
+    result_message_func=extract_reminder_fields_message,
+)
+class ExtractReminderFieldsAction(
+    Action[
+        ExtractReminderFieldsActionInputParams,
+        ExtractReminderFieldsActionOutputParams,
+    ]
+):
+    action_name = "extract_reminder_fields_action"
+
+    def __init__(self) -> None:
+        super().__init__("extract_reminder_fields_action")
+
+        self.engine = MultiFieldExtractor(
+            [
+                ExtractionField("reminder_datetime", ExtractReminderDatetimeAction),
+                ExtractionField("reminder_text", GenerateReminderTextAction),
+            ]
+        )
+
+    async def execute(
+        self, input_data: ExtractReminderFieldsActionInputParams
+    ) -> ExtractReminderFieldsActionOutputParams:
+        fields = await self.engine.extract(input_data.user_request)
+        return ExtractReminderFieldsActionOutputParams(**fields)
@@ -14,11 +14,12 @@ class ExtractSearchQueryActionOutputParams(BaseModel):
     extracted_query: str
 
 
-def extract_search_query_message(data: dict) -> tuple[str, dict]:
-    obj = ExtractSearchQueryActionOutputParams.model_validate(data)
+def extract_search_query_message(
+    obj: ExtractSearchQueryActionOutputParams,
+) -> tuple[str, ExtractSearchQueryActionOutputParams]:
     return (
         f"<i>Extracted query from request ✅</i>\n🔎 {obj.extracted_query}",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -14,14 +14,15 @@ class GenerateReminderTextActionOutputParams(BaseModel):
     reminder_text: str
 
 
-def generate_reminder_text_message(data: dict) -> tuple[str, dict]:
-    obj = GenerateReminderTextActionOutputParams.model_validate(data)
+def generate_reminder_text_message(
+    obj: GenerateReminderTextActionOutputParams,
+) -> tuple[str, GenerateReminderTextActionOutputParams]:
     return (
         (
             "<i>Generated reminder text ✅</i>\n"
             f"<blockquote>{obj.reminder_text}</blockquote>"
         ),
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -0,0 +1,347 @@
+"""Rule-based pre-pass for the `action/ai` extractors.
+
+Each matcher returns a `RuleMatch` with a confidence in [0, 1]. Extractors
+use the value directly when the confidence reaches `CONFIDENCE_THRESHOLD`
+and fall back to the LLM otherwise.
+"""
+
+import re
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+CONFIDENCE_THRESHOLD = 0.8
+
+
+@dataclass(slots=True)
+class RuleMatch:
+    value: Any
+    confidence: float
+
+    @property
+    def confident(self) -> bool:
+        return self.confidence >= CONFIDENCE_THRESHOLD
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over a keyword -> label vocabulary.
+
+    Matching is case-insensitive and only whole words are reported.
+    """
+
+    def __init__(self, vocabulary: dict[str, str]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, str]]] = [[]]
+
+        for keyword, label in vocabulary.items():
+            self._add(keyword.lower(), label)
+        self._build()
+
+    def _add(self, keyword: str, label: str) -> None:
+        state = 0
+        for char in keyword:
+            if char not in self._goto[state]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = len(self._goto) - 1
+            state = self._goto[state][char]
+        self._out[state].append((len(keyword), label))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> list[tuple[int, int, str]]:
+        text = text.lower()
+        matches = []
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for length, label in self._out[state]:
+                start = end - length
+                if _is_boundary(text, start - 1) and _is_boundary(text, end):
+                    matches.append((start, end, label))
+        return matches
+
+    def labels(self, text: str) -> list[str]:
+        # distinct labels in order of first appearance
+        return list(dict.fromkeys(label for _, _, label in self.find_all(text)))
+
+    def keywords(self, text: str) -> list[str]:
+        # distinct keywords found, lowercased, in order of first appearance
+        text = text.lower()
+        return list(
+            dict.fromkeys(text[start:end] for start, end, _ in self.find_all(text))
+        )
+
+
+def _is_boundary(text: str, index: int) -> bool:
+    return index < 0 or index >= len(text) or not text[index].isalnum()
+
+
+NUMBER_WORDS = {
+    "zero": 0,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+    "twenty": 20,
+    "thirty": 30,
+    "forty": 40,
+    "fifty": 50,
+    "hundred": 100,
+    "a couple of": 2,
+    "a couple": 2,
+    "a few": 3,
+    "a dozen": 12,
+}
+
+_NUMBER_WORD = "|".join(
+    re.escape(word) for word in sorted(NUMBER_WORDS, key=len, reverse=True)
+)
+NUMBER_PATTERN = re.compile(
+    # no part of "1,000"
+    rf"(?<![\w.@:/-])(?<!\d,)(?P<sign>-|minus\s+|negative\s+)?"
+    # a period ends the sentence unless a word or digit follows it ("3.5")
+    rf"(?P<number>\d+|(?:{_NUMBER_WORD})(?:[\s-](?:{_NUMBER_WORD}))?)"
+    r"(?![\w@:/]|\.\w|,\d)",
+    re.IGNORECASE,
+)
+COMPOUND = re.compile(r"(?P<tens>[a-z]+)[\s-](?P<units>[a-z]+)")
+
+
+def _number_value(match: re.Match) -> int | None:
+    """Value of a `NUMBER_PATTERN` match.
+
+    None for two number words that are not tens and units, such as "one
+    hundred": adding them up would be wrong and multiplying is not always
+    right, so those are left to the LLM.
+    """
+    number = match["number"].lower()
+    if number.isdigit():
+        value = int(number)
+    elif number in NUMBER_WORDS:
+        value = NUMBER_WORDS[number]
+    else:
+        # "twenty one", "twenty-five"
+        compound = COMPOUND.fullmatch(number)
+        if compound is None:
+            return None
+        tens = NUMBER_WORDS.get(compound["tens"], 0)
+        units = NUMBER_WORDS.get(compound["units"], 0)
+        if tens < 20 or tens % 10 or not 0 < units < 10:
+            return None
+        value = tens + units
+    return -value if match["sign"] else value
+
+
+def parse_number(text: str, nouns: tuple[str, ...]) -> RuleMatch:
+    """Count of `nouns` the user asks for, e.g. "last 5 emails" -> 5.
+
+    Numbers are only taken when they directly precede the noun (allowing a
+    couple of adjectives in between), so dates, times and addresses are
+    ignored. Several different counts make the match ambiguous.
+    """
+    noun = "|".join(re.escape(noun) for noun in nouns)
+    pattern = re.compile(
+        rf"{NUMBER_PATTERN.pattern}(?:\s+[a-z]+){{0,2}}?\s+(?:{noun})\b",
+        re.IGNORECASE,
+    )
+    values = {_number_value(match) for match in pattern.finditer(text)}
+    if len(values) > 1 or None in values:
+        return RuleMatch(None, 0.3)
+
+    # other numbers in the request ("3 or 4 emails", "emails from 2024")
+    others = {_number_value(match) for match in NUMBER_PATTERN.finditer(text)}
+    others -= values
+
+    if values:
+        return RuleMatch(values.pop(), 0.6 if others else 0.95)
+    return RuleMatch(None, 0.3 if others else 0.0)
+
+
+def parse_answer_number(answer: str) -> int | None:
+    # LLM answers are expected to be a bare number but may carry extra text
+    match = NUMBER_PATTERN.search(str(answer))
+    if match is None:
+        return None
+    return _number_value(match)
+
+
+UNIT_SECONDS = {
+    "second": 1,
+    "sec": 1,
+    "minute": 60,
+    "min": 60,
+    "hour": 60 * 60,
+    "hr": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+MONTHS = {
+    name: index
+    for index, names in enumerate(
+        [
+            ("january", "jan"),
+            ("february", "feb"),
+            ("march", "mar"),
+            ("april", "apr"),
+            ("may",),
+            ("june", "jun"),
+            ("july", "jul"),
+            ("august", "aug"),
+            ("september", "sep", "sept"),
+            ("october", "oct"),
+            ("november", "nov"),
+            ("december", "dec"),
+        ],
+        start=1,
+    )
+    for name in names
+}
+
+_UNIT = "|".join(sorted(UNIT_SECONDS, key=len, reverse=True))
+_MONTH = "|".join(sorted(MONTHS, key=len, reverse=True))
+
+RELATIVE_PATTERN = re.compile(
+    rf"\bin\s+(?P<amount>\d+(?:\.\d+)?|{_NUMBER_WORD}|half\s+an?|an?)\s+"
+    rf"(?P<unit>{_UNIT})s?\b",
+    re.IGNORECASE,
+)
+DAY_PATTERN = re.compile(
+    r"\b(?P<day>day\s+after\s+tomorrow|tomorrow|tommorow|today|tonight)\b",
+    re.IGNORECASE,
+)
+DATE_PATTERN = re.compile(
+    rf"\b(?:(?P<day1>\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?(?P<month1>{_MONTH})"
+    rf"|(?P<month2>{_MONTH})\s+(?P<day2>\d{{1,2}})(?:st|nd|rd|th)?)"
+    r"\b(?:,?\s+(?P<year>\d{4}))?",
+    re.IGNORECASE,
+)
+TIME_PATTERN = re.compile(
+    r"\bat\s+(?P<hour>\d{1,2})(?::(?P<minute>\d{2}))?\s*(?P<meridiem>am|pm|a\.m\.|p\.m\.)?"
+    r"(?![\w:])",
+    re.IGNORECASE,
+)
+# parts of the day that say whether a bare "at 9" is AM or PM
+PERIOD_PATTERN = re.compile(
+    r"\b(?:(?P<pm>tonight|(?:this|in\s+the)\s+(?:evening|afternoon)|afternoon)"
+    r"|(?P<am>(?:this|in\s+the)\s+morning|morning))\b",
+    re.IGNORECASE,
+)
+
+
+def _relative_amount(amount: str) -> float:
+    amount = amount.lower()
+    if amount.startswith("half"):
+        return 0.5
+    if amount in ("a", "an"):
+        return 1
+    if amount in NUMBER_WORDS:
+        return NUMBER_WORDS[amount]
+    return float(amount)
+
+
+def parse_reminder_datetime(text: str, now: datetime) -> RuleMatch:
+    """Resolve "in 5 minutes", "tomorrow at 10 AM", "on 28 august 2024 at 10 AM"."""
+    relative = list(RELATIVE_PATTERN.finditer(text))
+    days = list(DAY_PATTERN.finditer(text))
+    dates = list(DATE_PATTERN.finditer(text))
+    times = list(TIME_PATTERN.finditer(text))
+
+    if len(relative) + len(days) + len(dates) + len(times) == 0:
+        return RuleMatch(None, 0.0)
+
+    if relative:
+        if len(relative) > 1 or days or dates or times:
+            return RuleMatch(None, 0.3)
+        match = relative[0]
+        unit = match["unit"].lower()
+        seconds = _relative_amount(match["amount"]) * UNIT_SECONDS[unit]
+        return RuleMatch(now + timedelta(seconds=seconds), 0.95)
+
+    if len(days) > 1 or len(dates) > 1 or len(times) > 1 or (days and dates):
+        return RuleMatch(None, 0.3)
+
+    date = now.date()
+    if days:
+        day = days[0]["day"].lower()
+        if day.startswith("day after"):
+            date += timedelta(days=2)
+        elif day.startswith("tom"):
+            date += timedelta(days=1)
+    elif dates:
+        match = dates[0]
+        month = MONTHS[(match["month1"] or match["month2"]).lower()]
+        year = int(match["year"]) if match["year"] else now.year
+        try:
+            date = date.replace(
+                year=year, month=month, day=int(match["day1"] or match["day2"])
+            )
+        except ValueError:
+            return RuleMatch(None, 0.0)
+
+    if not times:
+        # a day without a time of day is left to the LLM
+        return RuleMatch(None, 0.4)
+
+    match = times[0]
+    hour = int(match["hour"])
+    minute = int(match["minute"] or 0)
+    meridiem = (match["meridiem"] or "").lower().replace(".", "")
+    if not meridiem and 1 <= hour < 12:
+        period = PERIOD_PATTERN.search(text)
+        if period is not None:
+            meridiem = "pm" if period["pm"] else "am"
+    if meridiem == "pm" and hour < 12:
+        hour += 12
+    elif meridiem == "am" and hour == 12:
+        hour = 0
+    if hour > 23 or minute > 59:
+        return RuleMatch(None, 0.0)
+
+    result = datetime.combine(date, now.time()).replace(
+        hour=hour, minute=minute, second=0, microsecond=0
+    )
+    # a bare "at 6" may be morning or evening, the LLM reads the context
+    confidence = 0.95 if meridiem or hour == 0 or hour > 12 else 0.5
+
+    if result <= now:
+        if days or dates:
+            return RuleMatch(None, 0.3)
+        # a bare "at 10 AM" that already passed today means tomorrow
+        result += timedelta(days=1)
+        confidence = min(confidence, 0.8)
+
+    return RuleMatch(result, confidence)
@@ -0,0 +1,285 @@
+"""Minimal asyncio IMAP4rev1 client.
+
+Covers what the email actions need: LOGIN, SELECT, NOOP, [UID] SEARCH,
+[UID] FETCH with literals, IDLE and LOGOUT. Commands return `(typ, data)`
+shaped like imaplib's, so responses are parsed the same way: `data` of a
+FETCH is a list of `bytes` lines and `(line, literal)` tuples, and response
+codes such as UIDVALIDITY are collected for `response()`.
+
+One command runs at a time per client; overlap comes from using several
+clients on the same loop.
+"""
+
+import asyncio
+import re
+import ssl
+
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+metrics = metrics_registry.get("aioimap")
+
+CRLF = b"\r\n"
+
+TAGGED = re.compile(rb"(?P<tag>A\d+) (?P<type>[A-Z]+) ?(?P<data>.*)")
+UNTAGGED = re.compile(rb"\* (?P<type>[A-Z-]+)( (?P<data>.*))?")
+UNTAGGED_STATUS = re.compile(rb"\* (?P<data>\d+) (?P<type>[A-Z-]+)( (?P<data2>.*))?")
+RESPONSE_CODE = re.compile(rb"\[(?P<type>[A-Z-]+)( (?P<data>[^\]]*))?\]")
+LITERAL = re.compile(rb".*\{(?P<size>\d+)\}$", re.DOTALL)
+
+
+class ImapError(Exception):
+    """The server rejected a command."""
+
+
+class ImapAbort(ImapError):
+    """The connection is broken and cannot be used any more."""
+
+
+def quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+class ImapClient:
+    def __init__(
+        self, host: str, port: int, use_ssl: bool = True, timeout: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+
+        self.untagged_responses: dict[str, list] = {}
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._tag = 0
+        self.broken = False
+
+    async def connect(self) -> "ImapClient":
+        try:
+            async with asyncio.timeout(self.timeout):
+                self._reader, self._writer = await asyncio.open_connection(
+                    self.host,
+                    self.port,
+                    ssl=ssl.create_default_context() if self.use_ssl else None,
+                )
+                greeting = await self._readline()
+        except (OSError, TimeoutError, asyncio.IncompleteReadError) as e:
+            raise ImapAbort(f"cannot connect to {self.host}:{self.port}: {e}") from e
+
+        if not greeting.startswith((b"* OK", b"* PREAUTH")):
+            raise ImapAbort(f"unexpected greeting: {greeting!r}")
+        metrics.inc("connects")
+        return self
+
+    async def _readline(self) -> bytes:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line.endswith(CRLF):
+            raise ImapAbort("connection closed by the server")
+        return line[:-2]
+
+    def _append_untagged(self, typ: str, data) -> None:
+        self.untagged_responses.setdefault(typ, []).append(data)
+
+    def _collect_response_code(self, data: bytes) -> None:
+        match = RESPONSE_CODE.match(data)
+        if match:
+            self._append_untagged(match["type"].decode(), match["data"])
+
+    async def _handle_untagged(self, line: bytes) -> None:
+        match = UNTAGGED.match(line)
+        if match:
+            typ, data = match["type"].decode(), match["data"] or b""
+        else:
+            match = UNTAGGED_STATUS.match(line)
+            if match is None:
+                raise ImapAbort(f"unexpected response: {line[:200]!r}")
+            typ, data = match["type"].decode(), match["data"]
+            if match["data2"]:
+                data += b" " + match["data2"]
+
+        if typ in ("OK", "NO", "BAD", "BYE"):
+            self._collect_response_code(data)
+
+        assert self._reader is not None
+        while literal := LITERAL.match(data):
+            value = await self._reader.readexactly(int(literal["size"]))
+            self._append_untagged(typ, (data, value))
+            data = await self._readline()
+        self._append_untagged(typ, data)
+
+    async def _complete(self, tag: bytes, name: str) -> tuple[str, list]:
+        while True:
+            line = await self._readline()
+            if line.startswith(b"* "):
+                await self._handle_untagged(line)
+                continue
+
+            match = TAGGED.match(line)
+            if match is None or match["tag"] != tag:
+                raise ImapAbort(f"unexpected response: {line[:200]!r}")
+
+            typ, data = match["type"].decode(), match["data"]
+            self._collect_response_code(data)
+            if typ == "BAD":
+                raise ImapError(f"{name} command error: {data!r}")
+            return typ, [data]
+
+    def _next_tag(self) -> bytes:
+        self._tag += 1
+        return f"A{self._tag:04d}".encode()
+
+    def _send(self, tag: bytes, name: str, args: tuple) -> None:
+        assert self._writer is not None
+        parts = [tag, name.encode()] + [
+            arg if isinstance(arg, bytes) else str(arg).encode() for arg in args
+        ]
+        self._writer.write(b" ".join(parts) + CRLF)
+
+    async def _command(self, name: str, *args) -> tuple[str, list]:
+        if self.broken or self._writer is None:
+            raise ImapAbort("connection is not open")
+
+        async with self._lock:
+            tag = self._next_tag()
+            try:
+                async with asyncio.timeout(self.timeout):
+                    self._send(tag, name, args)
+                    await self._writer.drain()
+                    result = await self._complete(tag, name)
+            except ImapAbort:
+                self.broken = True
+                raise
+            except (OSError, TimeoutError, asyncio.IncompleteReadError) as e:
+                # the stream may be in the middle of a response now
+                self.broken = True
+                raise ImapAbort(f"{name} failed: {e!r}") from e
+            except ImapError:
+                # a tagged BAD, the response was read to the end
+                raise
+            except BaseException:
+                # cancelled: the reply to the command is still on the way
+                self.broken = True
+                raise
+
+        metrics.inc("commands")
+        if "BYE" in self.untagged_responses and name != "LOGOUT":
+            self.broken = True
+            raise ImapAbort(f"server closed the session: {self.response('BYE')}")
+        return result
+
+    def _untagged(self, result: tuple[str, list], name: str) -> tuple[str, list]:
+        typ, data = result
+        if typ == "NO":
+            return typ, data
+        return typ, self.untagged_responses.pop(name, [None])
+
+    def response(self, code: str) -> tuple[str, list]:
+        """Pop the collected untagged responses or response codes of `code`."""
+        return code, self.untagged_responses.pop(code.upper(), [None])
+
+    async def login(self, user: str, password: str) -> tuple[str, list]:
+        typ, data = await self._command("LOGIN", quote(user), quote(password))
+        if typ != "OK":
+            raise ImapError(f"LOGIN failed: {data}")
+        return typ, data
+
+    async def select(self, mailbox: str = "INBOX") -> tuple[str, list]:
+        self.untagged_responses = {}
+        typ, data = await self._command("SELECT", mailbox)
+        if typ != "OK":
+            return typ, data
+        return typ, self.untagged_responses.get("EXISTS", [None])
+
+    async def noop(self) -> tuple[str, list]:
+        return await self._command("NOOP")
+
+    async def search(self, *criteria: str) -> tuple[str, list]:
+        return self._untagged(await self._command("SEARCH", *criteria), "SEARCH")
+
+    async def fetch(self, message_set: str, items: str) -> tuple[str, list]:
+        return self._untagged(await self._command("FETCH", message_set, items), "FETCH")
+
+    async def uid(self, command: str, *args: str) -> tuple[str, list]:
+        command = command.upper()
+        name = command if command == "SEARCH" else "FETCH"
+        return self._untagged(await self._command("UID", command, *args), name)
+
+    async def idle(self, timeout: float) -> list[tuple[str, list]]:
+        """Wait up to `timeout` seconds for the server to report changes.
+
+        Returns the untagged responses (EXISTS, EXPUNGE, FETCH, ...) that
+        ended the wait, empty if nothing changed.
+        """
+        if self.broken or self._writer is None:
+            raise ImapAbort("connection is not open")
+
+        async with self._lock:
+            tag = self._next_tag()
+            before = {typ: len(data) for typ, data in self.untagged_responses.items()}
+            try:
+                self._send(tag, "IDLE", ())
+                await self._writer.drain()
+                async with asyncio.timeout(self.timeout):
+                    line = await self._readline()
+                    while line.startswith(b"* "):
+                        await self._handle_untagged(line)
+                        line = await self._readline()
+                if not line.startswith(b"+"):
+                    raise ImapAbort(f"IDLE refused: {line[:200]!r}")
+
+                assert self._reader is not None
+                try:
+                    # readline leaves the buffer intact when it is cancelled
+                    line = await asyncio.wait_for(self._reader.readline(), timeout)
+                except TimeoutError:
+                    line = b""
+                if line:
+                    if not line.endswith(CRLF):
+                        raise ImapAbort("connection closed by the server")
+                    await self._handle_untagged(line[:-2])
+
+                self._writer.write(b"DONE" + CRLF)
+                await self._writer.drain()
+                async with asyncio.timeout(self.timeout):
+                    await self._complete(tag, "IDLE")
+            except ImapAbort:
+                self.broken = True
+                raise
+            except (OSError, TimeoutError, asyncio.IncompleteReadError) as e:
+                self.broken = True
+                raise ImapAbort(f"IDLE failed: {e!r}") from e
+            except ImapError:
+                # a tagged BAD, the response was read to the end
+                raise
+            except BaseException:
+                # cancelled: the reply to the command is still on the way
+                self.broken = True
+                raise
+
+        metrics.inc("commands")
+        return [
+            (typ, data[before.get(typ, 0) :])
+            for typ, data in self.untagged_responses.items()
+            if len(data) > before.get(typ, 0)
+        ]
+
+    async def logout(self) -> None:
+        try:
+            if not self.broken and self._writer is not None:
+                await self._command("LOGOUT")
+        except ImapError:
+            pass
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        self.broken = True
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+            self._writer = None
@@ -0,0 +1,143 @@
+"""Minimal asyncio SMTP submission client.
+
+EHLO, STARTTLS, AUTH PLAIN/LOGIN, MAIL FROM, RCPT TO, DATA and QUIT, the
+part of smtplib `send_email_action` used.
+"""
+
+import asyncio
+import base64
+import ssl
+from email.message import Message
+
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+metrics = metrics_registry.get("aiosmtp")
+
+CRLF = b"\r\n"
+
+
+class SmtpError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+
+class SmtpClient:
+    def __init__(
+        self, host: str, port: int, starttls: bool = True, timeout: float = 30.0
+    ):
+        self.host = host
+        self.port = port
+        self.starttls = starttls
+        self.timeout = timeout
+
+        self.extensions: dict[str, str] = {}
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def _reply(self) -> tuple[int, str]:
+        assert self._reader is not None
+        lines = []
+        while True:
+            line = await self._reader.readline()
+            if not line.endswith(CRLF):
+                raise SmtpError(421, "connection closed by the server")
+            lines.append(line[4:-2].decode(errors="replace"))
+            # "250-..." continues, "250 ..." is the last line
+            if line[3:4] != b"-":
+                return int(line[:3]), "\n".join(lines)
+
+    async def command(self, line: str, expect: tuple[int, ...] = (250,)) -> str:
+        assert self._writer is not None
+        self._writer.write(line.encode() + CRLF)
+        await self._writer.drain()
+        code, message = await self._reply()
+        if code not in expect:
+            raise SmtpError(code, message)
+        return message
+
+    async def _ehlo(self) -> None:
+        message = await self.command("EHLO localhost")
+        self.extensions = {}
+        for line in message.splitlines()[1:]:
+            name, _, value = line.partition(" ")
+            self.extensions[name.upper()] = value
+
+    async def connect(self) -> "SmtpClient":
+        async with asyncio.timeout(self.timeout):
+            self._reader, self._writer = await asyncio.open_connection(
+                self.host, self.port
+            )
+            code, message = await self._reply()
+            if code != 220:
+                raise SmtpError(code, message)
+            await self._ehlo()
+
+            if self.starttls:
+                if "STARTTLS" not in self.extensions:
+                    raise SmtpError(502, "the server does not offer STARTTLS")
+                await self.command("STARTTLS", expect=(220,))
+                await self._writer.start_tls(
+                    ssl.create_default_context(), server_hostname=self.host
+                )
+                # extensions, AUTH among them, change once the channel is secure
+                await self._ehlo()
+
+        metrics.inc("connects")
+        return self
+
+    async def login(self, user: str, password: str) -> None:
+        methods = self.extensions.get("AUTH", "").upper().split()
+        async with asyncio.timeout(self.timeout):
+            if "PLAIN" in methods or not methods:
+                token = base64.b64encode(f"\0{user}\0{password}".encode()).decode()
+                await self.command(f"AUTH PLAIN {token}", expect=(235,))
+            else:
+                await self.command("AUTH LOGIN", expect=(334,))
+                await self.command(
+                    base64.b64encode(user.encode()).decode(), expect=(334,)
+                )
+                await self.command(
+                    base64.b64encode(password.encode()).decode(), expect=(235,)
+                )
+
+    async def send_message(
+        self, message: Message, sender: str, recipients: list[str]
+    ) -> None:
+        assert self._writer is not None
+        data = message.as_bytes().replace(b"\r\n", b"\n").replace(b"\n", CRLF)
+        # dot-stuffing: a line starting with "." gets another one
+        data = b"\r\n".join(
+            b"." + line if line.startswith(b".") else line for line in data.split(CRLF)
+        )
+        if not data.endswith(CRLF):
+            data += CRLF
+
+        async with asyncio.timeout(self.timeout):
+            await self.command(f"MAIL FROM:<{sender}>")
+            for recipient in recipients:
+                await self.command(f"RCPT TO:<{recipient}>", expect=(250, 251))
+            await self.command("DATA", expect=(354,))
+            self._writer.write(data + b"." + CRLF)
+            await self._writer.drain()
+            code, reply = await self._reply()
+            if code != 250:
+                raise SmtpError(code, reply)
+        metrics.inc("messages")
+
+    async def quit(self) -> None:
+        if self._writer is None:
+            return
+        try:
+            async with asyncio.timeout(self.timeout):
+                await self.command("QUIT", expect=(221,))
+        except (SmtpError, OSError, TimeoutError):
+            pass
+        finally:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+            self._writer = None
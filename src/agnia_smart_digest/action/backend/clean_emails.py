@@ -1,29 +1,29 @@
-import re
-
 from pydantic import BaseModel
 
-from agnia_smart_digest.action.backend.emails import EmailOutputModel
+from agnia_smart_digest.action.backend.email_analysis import analyze
+from agnia_smart_digest.action.backend.emails import EMAIL_SCHEMA_VERSION, EmailList
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 
 
 class CleanEmailsInputParams(BaseModel):
-    emails: list[str]
+    emails: EmailList
 
 
 class CleanEmailsOutputParams(BaseModel):
-    emails: list[str]
-
+    emails: EmailList
+    schema_version: int = EMAIL_SCHEMA_VERSION
 
-def clean_emails_message(data: dict) -> tuple[str, dict]:
-    output = CleanEmailsOutputParams.model_validate(data)
 
+def clean_emails_message(
+    output: CleanEmailsOutputParams,
+) -> tuple[str, CleanEmailsOutputParams]:
     n = len(output.emails)
     word = "email"
     if n > 1:
         word = "emails"
 
-    return f"<i>Preprocessed {n} {word} ✅</i>", output.model_dump()
+    return f"<i>Preprocessed {n} {word} ✅</i>", output
 
 
 @register_action(
@@ -41,16 +41,13 @@ class EmailsAction(Action[CleanEmailsInputParams, CleanEmailsOutputParams]):
     async def execute(
         self, input_data: CleanEmailsInputParams
     ) -> CleanEmailsOutputParams:
-        emails = []
-        for email in input_data.emails:
-            emails.append(EmailOutputModel.model_validate_json(email))
-
         cleaned_emails = []
-        for email in emails:
-            email.Text = self.clean_email(email.Text)
-            cleaned_emails.append(email.model_dump_json())
+        for email in input_data.emails:
+            cleaned_emails.append(
+                email.model_copy(update={"Text": self.clean_email(email.Text)})
+            )
 
         return CleanEmailsOutputParams(emails=cleaned_emails)
 
     def clean_email(self, email: str) -> str:
-        return re.sub(r"\<.*?\>", "", email)
+        return analyze(email).cleaned
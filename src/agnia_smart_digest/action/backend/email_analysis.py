@@ -0,0 +1,117 @@
+"""Normalized text and tokens of an email, computed once per content.
+
+The clean, ranking, search and summarize actions all start from the text
+of each email and used to normalize and tokenize it on their own, again on
+every digest. `analyze` returns the `EmailAnalysis` of a text from an LRU
+keyed by its content hash; each field is computed the first time an action
+reads it, so the same email in the next digest costs a lookup.
+"""
+
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from functools import cached_property
+
+import nltk
+
+from agnia_smart_digest.action.backend.html_text import html_to_text
+from agnia_smart_digest.settings import email_analysis_settings
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+metrics = metrics_registry.get("email-analysis")
+
+CITATIONS = re.compile(r"\[[0-9]*\]")
+SPACES = re.compile(r"\s+")
+NOT_LETTERS = re.compile("[^a-zA-Z]")
+# the only words nltk's tokenizer splits in text of letters and spaces
+CONTRACTIONS = frozenset(("cannot", "gimme", "gonna", "gotta", "lemme", "wanna"))
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+class EmailAnalysis:
+    def __init__(self, source: str):
+        self.source = source
+        # filled in by the ranking action with its own tokenizer
+        self.rank_tokens: list[str] | None = None
+        self._sentence_words: dict[int, list[str]] = {}
+
+    @cached_property
+    def cleaned(self) -> str:
+        """Readable text of the email, see `html_to_text`."""
+        return html_to_text(self.source)
+
+    @cached_property
+    def text(self) -> str:
+        """The text with whitespace runs collapsed to single spaces."""
+        return normalize(self.source)
+
+    @cached_property
+    def _prose(self) -> str:
+        # citation marks removed, spaces collapsed but not stripped
+        return SPACES.sub(" ", CITATIONS.sub(" ", self.source))
+
+    @cached_property
+    def sentences(self) -> list[str]:
+        return nltk.sent_tokenize(self._prose)
+
+    @cached_property
+    def words(self) -> list[str]:
+        """Words of the text, letters only, as `nltk.word_tokenize` splits them."""
+        words = []
+        for word in NOT_LETTERS.sub(" ", self._prose).split():
+            if word.lower() in CONTRACTIONS:
+                # "cannot" -> "can", "not"; all of them split after three letters
+                words += (word[:3], word[3:])
+            else:
+                words.append(word)
+        return words
+
+    @cached_property
+    def term_counts(self) -> Counter[str]:
+        """Occurrences of each of `words`, in the order they first appear."""
+        return Counter(self.words)
+
+    def sentence_words(self, i: int) -> list[str]:
+        """Lowercased tokens of the `i`-th sentence."""
+        words = self._sentence_words.get(i)
+        if words is None:
+            words = nltk.word_tokenize(self.sentences[i].lower())
+            self._sentence_words[i] = words
+        return words
+
+
+class AnalysisCache:
+    """`EmailAnalysis` of recently seen texts keyed by their SHA-256."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, EmailAnalysis] = OrderedDict()
+        # the actions warm up in worker threads
+        self._lock = threading.Lock()
+
+    def get(self, text: str) -> EmailAnalysis:
+        key = hashlib.sha256(text.encode()).hexdigest()
+        with self._lock:
+            analysis = self._entries.get(key)
+            if analysis is not None:
+                self._entries.move_to_end(key)
+                metrics.inc("hits")
+                return analysis
+
+            metrics.inc("misses")
+            analysis = self._entries[key] = EmailAnalysis(text)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.inc("evictions")
+            return analysis
+
+
+analysis_cache = AnalysisCache(email_analysis_settings.email_analysis_max_entries)
+
+
+def analyze(text: str) -> EmailAnalysis:
+    return analysis_cache.get(text)
@@ -0,0 +1,83 @@
+"""Cheap ranking of emails from their headers, before any body is fetched.
+
+Used by the header-first mode of `list_emails_action`: the headers, size
+and body structure of a wide window of messages are fetched, the best `k`
+are picked here and only their bodies are downloaded. The score only has
+to keep bulk mail (newsletters, notifications, promotions) and emails
+without readable text away from the digest; the ranking action orders the
+picked emails properly afterwards.
+"""
+
+import re
+from email.utils import parseaddr
+
+from agnia_smart_digest.action.backend.imap_fetch import FetchedMessage
+
+BULK_SENDER = re.compile(
+    r"no-?reply|do-?not-?reply|notifications?|newsletters?|mailer-daemon|"
+    r"marketing|promo|^(news|info|digest|updates)@",
+    re.IGNORECASE,
+)
+PROMO_SUBJECT = re.compile(
+    r"\b(sale|discount|offer|deals?|webinar|newsletter|digest|promo)\b|\d+\s?% off",
+    re.IGNORECASE,
+)
+AUTOMATED_SUBJECT = re.compile(
+    r"\b(build|pipeline|job) #?\d+|\b(passed|failed|succeeded)\b|"
+    r"\b(notification|reminder|receipt|invoice|verify|confirm)",
+    re.IGNORECASE,
+)
+# replies and forwards are part of a conversation someone takes part in
+CONVERSATION = re.compile(r"^\s*(re|fwd?|aw|wg|ответ|пересл)\s*:", re.IGNORECASE)
+
+# bytes of body text
+SHORT_BODY = 200
+LONG_BODY = 50 * 1024
+
+
+def score(message: FetchedMessage) -> float:
+    """Higher for emails more likely to belong in a digest."""
+    subject = str(message.headers.get("Subject", ""))
+    _, address = parseaddr(str(message.headers.get("From", "")))
+
+    points = 0.0
+    if BULK_SENDER.search(address):
+        points -= 2
+    if PROMO_SUBJECT.search(subject):
+        points -= 1
+    if AUTOMATED_SUBJECT.search(subject):
+        points -= 1
+    if CONVERSATION.match(subject):
+        points += 1
+
+    if not message.parts:
+        # nothing to read, let alone summarize
+        points -= 3
+    elif all(part.subtype == "html" for part in message.parts):
+        # HTML without a plain text alternative is mostly bulk mail
+        points -= 1
+
+    body = sum(part.size for part in message.parts)
+    if body < SHORT_BODY:
+        points -= 0.5
+    elif body > LONG_BODY:
+        points -= 1
+    return points
+
+
+def prerank(messages: list[FetchedMessage], k: int) -> list[FetchedMessage]:
+    """The `k` best scoring of `messages`, newer first among equals.
+
+    The picked messages keep the order they were given in.
+    """
+    if len(messages) <= k:
+        return messages
+
+    # on equal scores the later, newer, message comes first
+    ranked = sorted(
+        range(len(messages)),
+        key=lambda i: (score(messages[i]), i),
+        reverse=True,
+    )
+    picked = sorted(ranked[:k])
+    return [messages[i] for i in picked]
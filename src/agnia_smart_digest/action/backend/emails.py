@@ -1,11 +1,24 @@
-import imaplib
-from email import policy
-from email.parser import BytesParser
-
-from pydantic import BaseModel
-
+import json
+from datetime import date
+from typing import Annotated, Any
+
+from pydantic import BaseModel, BeforeValidator
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.email_prerank import prerank
+from agnia_smart_digest.action.backend.imap_fetch import (
+    FetchedMessage,
+    fetch_bodies,
+    fetch_headers,
+    fetch_messages,
+    last_uids,
+    select_inbox,
+)
+from agnia_smart_digest.action.backend.imap_pool import imap_pool
+from agnia_smart_digest.action.backend.mailbox_mirror import mailbox_mirror
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
+from agnia_smart_digest.settings import imap_settings
 from agnia_smart_digest.utils.logger import Logger
 
 logger = Logger("list-emails-action")
@@ -15,6 +28,19 @@ class EmailsInputParams(BaseModel):
     outlook_email: str
     outlook_password: str
     last_n_emails: int
+    # optional server-side filters: ISO date (YYYY-MM-DD) and sender address
+    since: str = ""
+    sender: str = ""
+    # header-first mode: rank the headers of this many last emails and
+    # download the bodies of the best last_n_emails of them only
+    candidates: int = 0
+
+
+# 1 - every email is a JSON-encoded string, 2 - emails are nested objects
+EMAIL_SCHEMA_VERSION = 2
+
+# bump when `to_email` changes, mirrored emails are then fetched again
+EXTRACTION_VERSION = 2
 
 
 class EmailOutputModel(BaseModel):
@@ -25,19 +51,40 @@ class EmailOutputModel(BaseModel):
     Text: str
 
 
+def parse_legacy_emails(value: Any) -> Any:
+    # plans created before schema version 2 still pass JSON strings
+    if isinstance(value, str):
+        value = json.loads(value)
+    if isinstance(value, list):
+        return [json.loads(item) if isinstance(item, str) else item for item in value]
+    return value
+
+
+EmailList = Annotated[list[EmailOutputModel], BeforeValidator(parse_legacy_emails)]
+
+
 class EmailsOutputParams(BaseModel):
-    emails: list[str]
+    emails: EmailList
+    schema_version: int = EMAIL_SCHEMA_VERSION
+
 
+def to_email(message: FetchedMessage) -> EmailOutputModel:
+    return EmailOutputModel(
+        Subject=message.headers.get("Subject", ""),
+        From=message.headers.get("From", ""),
+        To=message.headers.get("To", ""),
+        Date=message.headers.get("Date", ""),
+        Text="".join(text + "\n" for text in message.texts()),
+    )
 
-def emails_message(raw_data: dict) -> tuple[str, dict]:
-    output = EmailsOutputParams.model_validate(raw_data)
 
+def emails_message(output: EmailsOutputParams) -> tuple[str, EmailsOutputParams]:
     n = len(output.emails)
     word = "email"
     if n > 1:
         word = "emails"
 
-    return f"<i>Extracted {n} {word} ✅</i>", output.model_dump()
+    return f"<i>Extracted {n} {word} ✅</i>", output
 
 
 @register_action(
@@ -52,67 +99,99 @@ class EmailsAction(Action[EmailsInputParams, EmailsOutputParams]):
     def __init__(self):
         super().__init__(action_name="list_emails_action")
 
-    async def execute(self, input_data: EmailsInputParams) -> EmailsOutputParams:
-        # IMAP server settings
-        IMAP_HOST = "mail.innopolis.ru"
-        IMAP_PORT = 993  # IMAP over SSL/TLS
-        EMAIL_ADDRESS = input_data.outlook_email
-        EMAIL_PASSWORD = input_data.outlook_password
-
-        mail = imaplib.IMAP4_SSL(IMAP_HOST, IMAP_PORT)
-        mail.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
-
-        mail.select("INBOX")
-
-        # Search for latest emails
-        result, data = mail.uid("search", "ALL")
-        email_uids = data[0].split()
-
-        # Fetch only the last n emails
-        if len(email_uids) > input_data.last_n_emails:
-            email_uids = email_uids[-input_data.last_n_emails :]
-
-        emails_data = []
-
-        for uid in email_uids:
-            # Fetch the email
-            result, email_data = mail.uid("fetch", uid, "(RFC822)")
-            raw_email = email_data[0][1]
-
-            # Parse the email using BytesParser
-            msg = BytesParser(policy=policy.default).parsebytes(raw_email)
-
-            # Extract email title and text description
-            email_info = EmailOutputModel(
-                Subject=msg["Subject"],
-                From=msg["From"],
-                To=msg["To"],
-                Date=msg["Date"],
-                Text="",
-            )
+    async def setup(self) -> None:
+        imap_pool.start()
 
-            # Find and decode the email body
-            for part in msg.walk():
-                content_type = part.get_content_type()
+    async def teardown(self) -> None:
+        await imap_pool.close()
 
-                if part.is_multipart():
-                    continue
-                else:
-                    charset = part.get_content_charset() or "utf-8"
-                    payload = part.get_payload(decode=True)
+    async def execute(self, input_data: EmailsInputParams) -> EmailsOutputParams:
+        emails_data = await imap_pool.run(
+            input_data.outlook_email,
+            input_data.outlook_password,
+            lambda mail: self.fetch_emails(mail, input_data),
+        )
 
-                    if isinstance(payload, bytes):
-                        try:
-                            decoded_payload = payload.decode(charset, errors="replace")
-                            email_info.Text += decoded_payload + "\n"
-                        except Exception as e:
-                            logger.info(f"Error decoding part: {e}")
+        return EmailsOutputParams(
+            emails=emails_data,
+        )
 
-            # Append email info to list
-            emails_data.append(email_info.model_dump_json())
+    async def fetch_emails(
+        self, mail: ImapClient, input_data: EmailsInputParams
+    ) -> list[EmailOutputModel]:
+        since = date.fromisoformat(input_data.since) if input_data.since else None
+        header_first = input_data.candidates > input_data.last_n_emails
+
+        exists = None
+        if imap_settings.imap_mirror_enabled and header_first:
+            status = await select_inbox(mail)
+            email_uids = await last_uids(
+                mail,
+                input_data.candidates,
+                since=since,
+                sender=input_data.sender,
+                search_window=imap_settings.imap_search_window,
+                search_depth=imap_settings.imap_search_depth,
+                exists=status.exists,
+            )
+            emails = await mailbox_mirror.pick_emails(
+                mail,
+                input_data.outlook_email,
+                status.uidvalidity,
+                EXTRACTION_VERSION,
+                to_email,
+                email_uids,
+                lambda messages: prerank(messages, input_data.last_n_emails),
+            )
+            return [EmailOutputModel.model_validate_json(email) for email in emails]
+
+        if imap_settings.imap_mirror_enabled and not header_first:
+            status = await mailbox_mirror.sync(
+                mail,
+                input_data.outlook_email,
+                EXTRACTION_VERSION,
+                to_email,
+                window=input_data.last_n_emails,
+            )
+            emails = await mailbox_mirror.last_emails(
+                input_data.outlook_email,
+                input_data.last_n_emails,
+                since=since,
+                sender=input_data.sender,
+            )
+            if emails is not None:
+                return [EmailOutputModel.model_validate_json(email) for email in emails]
+            exists = status.exists
+
+        email_uids = await last_uids(
+            mail,
+            max(input_data.candidates, input_data.last_n_emails),
+            since=since,
+            sender=input_data.sender,
+            search_window=imap_settings.imap_search_window,
+            search_depth=imap_settings.imap_search_depth,
+            exists=exists,
+        )
 
-        mail.logout()
+        if not header_first:
+            messages = await fetch_messages(
+                mail,
+                email_uids,
+                max_part_bytes=imap_settings.imap_max_part_bytes,
+                max_email_bytes=imap_settings.imap_max_email_bytes,
+                batch_size=imap_settings.imap_fetch_batch_size,
+            )
+            return [to_email(message) for message in messages]
 
-        return EmailsOutputParams(
-            emails=emails_data,
+        messages = await fetch_headers(
+            mail, email_uids, batch_size=imap_settings.imap_fetch_batch_size
+        )
+        messages = prerank(messages, input_data.last_n_emails)
+        await fetch_bodies(
+            mail,
+            messages,
+            max_part_bytes=imap_settings.imap_max_part_bytes,
+            max_email_bytes=imap_settings.imap_max_email_bytes,
+            batch_size=imap_settings.imap_fetch_batch_size,
         )
+        return [to_email(message) for message in messages]
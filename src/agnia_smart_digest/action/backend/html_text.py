@@ -0,0 +1,190 @@
+"""Readable text of an email body, HTML or plain.
+
+One pass of `html.parser` over the body: the content of scripts, styles
+and other non-content elements is dropped, entities are decoded, block
+elements become line breaks and whitespace runs collapse the way a
+browser collapses them. Quoted replies and signatures are left out, both
+the HTML markup mail clients wrap them in and their plain text forms.
+
+Plain text bodies skip the parser: stray markup such as `<https://...>` is
+removed with a regex as before and entities are left alone, they are text.
+"""
+
+import re
+from html.parser import HTMLParser
+from itertools import islice
+
+# elements whose content is never shown; blockquotes are quoted replies
+SKIPPED = frozenset(
+    (
+        "script", "style", "head", "title", "noscript", "template", "svg",
+        "object", "blockquote",
+    )
+)  # fmt: skip
+# elements without content or end tag
+VOID = frozenset(
+    (
+        "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+        "meta", "param", "source", "track", "wbr",
+    )
+)  # fmt: skip
+BLOCKS = frozenset(
+    (
+        "p", "div", "br", "li", "tr", "table", "ul", "ol", "dl", "dt", "dd",
+        "h1", "h2", "h3", "h4", "h5", "h6", "hr", "pre", "section", "article",
+        "header", "footer", "center", "address",
+    )
+)  # fmt: skip
+CELLS = frozenset(("td", "th"))
+
+# classes and ids mail clients put on quoted replies and signatures
+QUOTE_MARKERS = frozenset(
+    (
+        "gmail_quote", "gmail_signature", "moz-cite-prefix", "moz-signature",
+        "yahoo_quoted", "signature",
+    )
+)  # fmt: skip
+# Outlook puts the quoted message after this header, not inside it
+REPLY_HEADER_IDS = frozenset(("divrplyfwdmsg", "appendonsend"))
+
+HTML_TAG = re.compile(r"<(html|body|div|p|br|table|span|a|font|td)\b", re.IGNORECASE)
+ANGLE_BRACKETS = re.compile(r"\<.*?\>")
+# zero-width characters pad newsletter previews
+SPACES = re.compile(r"[ \t\r\f\v\xa0\u034f\u200b\u200c\u200d\ufeff]+")
+BLANK_LINES = re.compile(r"\n{3,}")
+
+# everything from one of these lines on is quoted or a signature
+QUOTE_START = re.compile(
+    r"^(on\s.{1,200}\swrote:|.{1,200}\s(пишет|написал\(а\)):"
+    r"|-{2,}\s*original message\s*-{2,})$",
+    re.IGNORECASE,
+)
+# the signature separator; "--" without the space is a separator in content
+SIGNATURE = "-- "
+# Outlook puts this rule above the header of the quoted message
+UNDERSCORE_RULE = re.compile(r"^_{5,}$")
+OUTLOOK_FROM = re.compile(r"^from:\s", re.IGNORECASE)
+OUTLOOK_SENT = re.compile(r"^(sent|date):\s", re.IGNORECASE)
+MOBILE_FOOTER = re.compile(r"^(sent from my \w+|отправлено с \w+)", re.IGNORECASE)
+
+
+class _ReplyHeader(Exception):
+    """Raised to stop parsing, the rest of the body is the quoted message."""
+
+
+class TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.chunks: list[str] = []
+        # name and nesting depth of the element being skipped
+        self._skipping: str | None = None
+        self._depth = 0
+        self._pre = 0
+
+    def _skip(self, tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        if tag in SKIPPED:
+            return True
+        for name, value in attrs:
+            if value and name in ("class", "id"):
+                value = value.lower()
+                if name == "id" and value in REPLY_HEADER_IDS:
+                    raise _ReplyHeader
+                if any(word in QUOTE_MARKERS for word in value.split()):
+                    return tag not in VOID
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        if self._skipping is not None:
+            if tag == self._skipping:
+                self._depth += 1
+        elif self._skip(tag, attrs):
+            self._skipping, self._depth = tag, 1
+        elif tag in BLOCKS:
+            self.chunks.append("\n")
+            if tag == "pre":
+                self._pre += 1
+        elif tag in CELLS:
+            self.chunks.append(" ")
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        # a self-closed element has no content to skip
+        if self._skipping == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._skipping is not None:
+            if tag == self._skipping:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._skipping = None
+            return
+
+        if tag in BLOCKS:
+            self.chunks.append("\n")
+            if tag == "pre" and self._pre:
+                self._pre -= 1
+
+    def handle_data(self, data):
+        if self._skipping is not None:
+            return
+        if self._pre:
+            self.chunks.append(data)
+        else:
+            # in HTML, line breaks in the source are spaces
+            self.chunks.append(data.replace("\n", " "))
+
+    def text(self) -> str:
+        return "".join(self.chunks)
+
+
+def _outlook_header(lines: list[str], i: int) -> bool:
+    # "From: ..." and "Sent: ..." on the next two lines with text
+    texts = (SPACES.sub(" ", line).strip() for line in islice(lines, i, None))
+    header = list(islice((text for text in texts if text), 2))
+    return (
+        len(header) == 2
+        and OUTLOOK_FROM.match(header[0]) is not None
+        and OUTLOOK_SENT.match(header[1]) is not None
+    )
+
+
+def _strip_quotes(lines: list[str], keep_blank: bool) -> list[str]:
+    # whitespace is collapsed line by line up to the quote, the rest is
+    # never looked at
+    kept = []
+    for i, line in enumerate(lines):
+        line = SPACES.sub(" ", line)
+        text = line.strip()
+        if not text and not keep_blank:
+            continue
+        # the signature separator is the one line with a trailing space
+        if line.lstrip() == SIGNATURE or QUOTE_START.match(text):
+            break
+        if OUTLOOK_FROM.match(text) and _outlook_header(lines, i):
+            break
+        if UNDERSCORE_RULE.match(text) and _outlook_header(lines, i + 1):
+            break
+        if text.startswith(">") or MOBILE_FOOTER.match(text):
+            continue
+        kept.append(text)
+    return kept
+
+
+def html_to_text(body: str) -> str:
+    """Text of an HTML or plain email body without quotes and signatures."""
+    plain = HTML_TAG.search(body) is None
+    if plain:
+        text = ANGLE_BRACKETS.sub("", body)
+    else:
+        extractor = TextExtractor()
+        try:
+            extractor.feed(body)
+            extractor.close()
+        except _ReplyHeader:
+            pass
+        text = extractor.text()
+
+    # in HTML every block is a line of its own, blank lines come from markup
+    lines = _strip_quotes(text.split("\n"), keep_blank=plain)
+    return BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
@@ -0,0 +1,483 @@
+"""Batched IMAP fetch of headers and text parts.
+
+A set of messages is fetched in two rounds of batched commands instead of
+one `UID FETCH (RFC822)` per message:
+
+1. `BODYSTRUCTURE`, size and the headers the digest uses (`fetch_headers`);
+2. the body parts picked from the structures, with
+   `BODY.PEEK[<section>]<0.n>` so nothing is marked as read and no part is
+   downloaded past its cap. Messages asking for the same sections share one
+   command (`fetch_bodies`).
+
+The rounds can be split to pick the messages worth a body download from
+their headers first.
+
+Only the text a reader would see is downloaded: one alternative of a
+multipart/alternative, plain text over HTML, and no attachments, images or
+other non-text parts.
+
+`last_uids` finds the UIDs to fetch without listing the whole mailbox: the
+tail window is addressed by sequence numbers, and filtered searches only
+scan the most recent messages.
+"""
+
+import binascii
+import codecs
+import quopri
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from email import policy
+from email.message import EmailMessage
+from email.parser import BytesParser
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient, ImapError
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+metrics = metrics_registry.get("imap-fetch")
+
+HEADER_FIELDS = ("SUBJECT", "FROM", "TO", "DATE")
+HEADERS_ITEM = f"BODY.PEEK[HEADER.FIELDS ({' '.join(HEADER_FIELDS)})]"
+
+OPEN, CLOSE = "(", ")"
+
+# text parts read as the body, other text/* parts (calendar, csv, ...) are data
+BODY_SUBTYPES = ("plain", "html")
+# an escape or soft line break cut short at the end of a truncated part
+QP_TAIL = re.compile(rb"=[0-9A-Fa-f]?\Z")
+
+# IMAP dates use English month names whatever the locale
+MONTHS = (
+    "Jan", "Feb", "Mar", "Apr", "May", "Jun",
+    "Jul", "Aug", "Sep", "Oct", "Nov", "Dec",
+)  # fmt: skip
+
+
+@dataclass(frozen=True)
+class TextPart:
+    section: str
+    subtype: str
+    charset: str
+    encoding: str
+    size: int
+
+
+@dataclass(frozen=True)
+class MailboxStatus:
+    exists: int
+    uidvalidity: int | None
+    uidnext: int | None
+
+
+@dataclass
+class FetchedMessage:
+    uid: bytes
+    headers: EmailMessage
+    # arrival date on the server, what SINCE compares against
+    received: date | None = None
+    # RFC822.SIZE, attachments included
+    size: int = 0
+    parts: list[TextPart] = field(default_factory=list)
+    # section -> raw (still transfer-encoded) bytes
+    bodies: dict[str, bytes] = field(default_factory=dict)
+
+    def texts(self) -> list[str]:
+        return [
+            decode_part(self.bodies[part.section], part.encoding, part.charset)
+            for part in self.parts
+            if part.section in self.bodies
+        ]
+
+
+def _tokenize(text: bytes, tokens: list) -> None:
+    i, n = 0, len(text)
+    while i < n:
+        char = text[i : i + 1]
+        if char in b" \r\n":
+            i += 1
+        elif char in b"()":
+            tokens.append(char.decode())
+            i += 1
+        elif char == b'"':
+            value = bytearray()
+            i += 1
+            while i < n and text[i : i + 1] != b'"':
+                if text[i : i + 1] == b"\\":
+                    i += 1
+                value += text[i : i + 1]
+                i += 1
+            tokens.append(bytes(value))
+            i += 1
+        elif char == b"{" and text.rstrip().endswith(b"}"):
+            # literal marker, the literal itself follows as the next segment
+            break
+        else:
+            start, depth = i, 0
+            while i < n:
+                char = text[i : i + 1]
+                if char == b"[":
+                    depth += 1
+                elif char == b"]":
+                    depth -= 1
+                elif depth == 0 and char in b" ()\r\n":
+                    break
+                i += 1
+            atom = text[start:i]
+            tokens.append(None if atom.upper() == b"NIL" else atom)
+
+
+def tokenize_response(data: list) -> list:
+    """Flatten a `(head, literal)` / `bytes` response into tokens."""
+    tokens = []
+    for item in data:
+        if isinstance(item, tuple):
+            _tokenize(item[0], tokens)
+            tokens.append(item[1])
+        elif isinstance(item, bytes):
+            _tokenize(item, tokens)
+    return tokens
+
+
+def _parse_value(tokens: list, i: int) -> tuple[object, int]:
+    if tokens[i] != OPEN:
+        return tokens[i], i + 1
+
+    values = []
+    i += 1
+    while tokens[i] != CLOSE:
+        value, i = _parse_value(tokens, i)
+        values.append(value)
+    return values, i + 1
+
+
+def parse_fetch_response(data: list) -> dict[bytes, dict[str, object]]:
+    """`UID FETCH` response as {uid: {item name: value}}."""
+    tokens = tokenize_response(data)
+    messages: dict[bytes, dict[str, object]] = {}
+
+    i = 0
+    while i < len(tokens):
+        # "<seq> (<name> <value> ...)"
+        items, i = _parse_value(tokens, i + 1)
+        if not isinstance(items, list):
+            continue
+
+        fields = {
+            items[k].decode().upper(): items[k + 1]
+            for k in range(0, len(items) - 1, 2)
+            if isinstance(items[k], bytes)
+        }
+        uid = fields.get("UID")
+        if uid is None:
+            # unsolicited FLAGS update for another message
+            continue
+        messages.setdefault(uid, {}).update(fields)
+
+    return messages
+
+
+def _params(value) -> dict[str, str]:
+    if not isinstance(value, list):
+        return {}
+    return {
+        value[k].decode().lower(): value[k + 1].decode(errors="replace")
+        for k in range(0, len(value) - 1, 2)
+        if isinstance(value[k], bytes) and isinstance(value[k + 1], bytes)
+    }
+
+
+def _text(value) -> str:
+    return value.decode(errors="replace").lower() if isinstance(value, bytes) else ""
+
+
+def _body_parts(structure: list, section: str) -> list[TextPart]:
+    children = []
+    for index, child in enumerate(structure, start=1):
+        if not isinstance(child, list):
+            break
+        children.append((child, f"{section}.{index}" if section else str(index)))
+    # the multipart subtype follows the children
+    subtype = _text(structure[len(children)]) if len(structure) > len(children) else ""
+
+    if subtype == "related":
+        # the root, the first part, refers to the other ones (inline images, ...)
+        children = children[:1]
+    if subtype != "alternative":
+        return [part for child in children for part in text_parts(*child)]
+
+    # alternatives of the same content: the first one with plain text, else
+    # the last readable one, which is what the sender preferred
+    best: list[TextPart] = []
+    for child in children:
+        parts = text_parts(*child)
+        if any(part.subtype == "plain" for part in parts):
+            return parts
+        best = parts or best
+    return best
+
+
+def text_parts(structure: list, section: str = "") -> list[TextPart]:
+    """The text parts making up the body of a `BODYSTRUCTURE`, in order.
+
+    Only inline text/plain and text/html parts count. Of a
+    multipart/alternative one alternative is kept, plain text over HTML, and
+    of a multipart/related only its root. Forwarded messages are included.
+    """
+    if structure and isinstance(structure[0], list):
+        return _body_parts(structure, section)
+
+    if len(structure) < 7:
+        return []
+
+    main_type, subtype = _text(structure[0]), _text(structure[1])
+    section = section or "1"
+
+    if main_type == "message" and subtype == "rfc822" and len(structure) > 8:
+        inner = structure[8]
+        if isinstance(inner, list) and inner and isinstance(inner[0], list):
+            return text_parts(inner, section)
+        return text_parts(inner, f"{section}.1")
+
+    if main_type != "text" or subtype not in BODY_SUBTYPES:
+        return []
+
+    # type subtype params id description encoding size lines md5 disposition
+    disposition = structure[9] if len(structure) > 9 else None
+    if isinstance(disposition, list) and _text(disposition[0]) == "attachment":
+        return []
+
+    size = structure[6]
+    return [
+        TextPart(
+            section=section,
+            subtype=subtype,
+            charset=_params(structure[2]).get("charset", "utf-8"),
+            encoding=_text(structure[5]) or "7bit",
+            size=int(size) if isinstance(size, bytes) and size.isdigit() else 0,
+        )
+    ]
+
+
+def decode_part(data: bytes, encoding: str, charset: str) -> str:
+    """Text of a part that may have been cut at its size cap.
+
+    Whatever the cut left incomplete at the end, a base64 quantum, a
+    quoted-printable escape or a multibyte character, is dropped.
+    """
+    if encoding == "base64":
+        data = b"".join(data.split())
+        try:
+            data = binascii.a2b_base64(data[: len(data) - len(data) % 4])
+        except binascii.Error:
+            data = b""
+    elif encoding == "quoted-printable":
+        data = quopri.decodestring(QP_TAIL.sub(b"", data))
+
+    try:
+        decoder = codecs.getincrementaldecoder(charset)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    # not final: a character cut in half is held back instead of replaced
+    return decoder.decode(data, final=False)
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _part_limits(
+    parts: list[TextPart], max_part_bytes: int, max_email_bytes: int
+) -> tuple[tuple[str, int], ...]:
+    limits = []
+    budget = max_email_bytes
+    for part in parts:
+        if budget <= 0:
+            break
+        limit = min(max_part_bytes, budget)
+        limits.append((part.section, limit))
+        budget -= min(part.size, limit) if part.size else limit
+    return tuple(limits)
+
+
+async def fetch_headers(
+    mail: ImapClient, uids: list[bytes], batch_size: int
+) -> list[FetchedMessage]:
+    """Headers, size and body structure of `uids`, in the order given.
+
+    The first round of `fetch_messages`; no body is downloaded.
+    """
+    parser = BytesParser(policy=policy.default)
+    fetched: dict[bytes, FetchedMessage] = {}
+
+    for chunk in _chunks(uids, batch_size):
+        _, data = await mail.uid(
+            "fetch",
+            b",".join(chunk).decode(),
+            f"(UID INTERNALDATE RFC822.SIZE BODYSTRUCTURE {HEADERS_ITEM})",
+        )
+        metrics.inc("commands")
+
+        for uid, fields in parse_fetch_response(data).items():
+            raw_headers = next(
+                (
+                    value
+                    for name, value in fields.items()
+                    if name.startswith("BODY[HEADER") and isinstance(value, bytes)
+                ),
+                b"",
+            )
+            structure = fields.get("BODYSTRUCTURE")
+            size = fields.get("RFC822.SIZE")
+            fetched[uid] = FetchedMessage(
+                uid=uid,
+                headers=parser.parsebytes(raw_headers, headersonly=True),
+                received=parse_imap_date(fields.get("INTERNALDATE")),
+                size=int(size) if isinstance(size, bytes) and size.isdigit() else 0,
+                parts=text_parts(structure) if isinstance(structure, list) else [],
+            )
+
+    metrics.inc("messages", len(fetched))
+    return [fetched[uid] for uid in uids if uid in fetched]
+
+
+async def fetch_bodies(
+    mail: ImapClient,
+    messages: list[FetchedMessage],
+    max_part_bytes: int,
+    max_email_bytes: int,
+    batch_size: int,
+) -> None:
+    """Download the capped text parts of `messages` into their `bodies`."""
+    by_uid = {message.uid: message for message in messages}
+
+    # sections to fetch -> uids asking for exactly those
+    groups: dict[tuple[tuple[str, int], ...], list[bytes]] = defaultdict(list)
+    for message in messages:
+        limits = _part_limits(message.parts, max_part_bytes, max_email_bytes)
+        if limits:
+            groups[limits].append(message.uid)
+
+    for limits, uids in groups.items():
+        items = " ".join(
+            f"BODY.PEEK[{section}]<0.{limit}>" for section, limit in limits
+        )
+        for chunk in _chunks(uids, batch_size):
+            _, data = await mail.uid(
+                "fetch", b",".join(chunk).decode(), f"(UID {items})"
+            )
+            metrics.inc("commands")
+
+            for uid, fields in parse_fetch_response(data).items():
+                if uid not in by_uid:
+                    continue
+                for name, value in fields.items():
+                    if name.startswith("BODY[") and isinstance(value, bytes):
+                        section = name[len("BODY[") : name.index("]")]
+                        by_uid[uid].bodies[section] = value
+                        metrics.inc("body_bytes", len(value))
+
+
+async def fetch_messages(
+    mail: ImapClient,
+    uids: list[bytes],
+    max_part_bytes: int,
+    max_email_bytes: int,
+    batch_size: int,
+) -> list[FetchedMessage]:
+    """Headers and capped text parts of `uids`, in the order given."""
+    messages = await fetch_headers(mail, uids, batch_size)
+    await fetch_bodies(mail, messages, max_part_bytes, max_email_bytes, batch_size)
+    return messages
+
+
+def imap_date(day: date) -> str:
+    return f"{day.day}-{MONTHS[day.month - 1]}-{day.year}"
+
+
+def parse_imap_date(value) -> date | None:
+    # "17-Jul-1996 02:44:25 -0700", the date part is in the server's timezone
+    if not isinstance(value, bytes):
+        return None
+    try:
+        day, month, year = value.decode().split()[0].split("-")
+        return date(int(year), MONTHS.index(month.title()) + 1, int(day))
+    except (IndexError, ValueError):
+        return None
+
+
+def imap_string(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _response_int(mail: ImapClient, code: str) -> int | None:
+    _, data = mail.response(code)
+    value = data[-1] if data else None
+    return int(value) if isinstance(value, bytes) and value.isdigit() else None
+
+
+async def select_inbox(mail: ImapClient) -> MailboxStatus:
+    # re-selecting costs one round trip and, unlike NOOP, always reports EXISTS
+    status, data = await mail.select("INBOX")
+    metrics.inc("commands")
+    if status != "OK":
+        raise ImapError(f"SELECT INBOX failed: {data}")
+    return MailboxStatus(
+        exists=int(data[0]),
+        uidvalidity=_response_int(mail, "UIDVALIDITY"),
+        uidnext=_response_int(mail, "UIDNEXT"),
+    )
+
+
+async def last_uids(
+    mail: ImapClient,
+    n: int,
+    since: date | None = None,
+    sender: str = "",
+    search_window: int = 1000,
+    search_depth: int = 5000,
+    exists: int | None = None,
+) -> list[bytes]:
+    """UIDs of the last `n` messages in INBOX, oldest first.
+
+    Without filters this is a `FETCH <exists-n+1>:* (UID)`. With `since` or
+    `sender`, `UID SEARCH` runs on windows of `search_window` messages from
+    the end of the mailbox until `n` matches are found, at most
+    `search_depth` messages back. INBOX is re-selected unless `exists` is
+    passed.
+    """
+    if n <= 0:
+        return []
+    if exists is None:
+        exists = (await select_inbox(mail)).exists
+    if exists == 0:
+        return []
+
+    criteria = []
+    if since is not None:
+        criteria += ["SINCE", imap_date(since)]
+    if sender:
+        criteria += ["FROM", imap_string(sender)]
+
+    if not criteria:
+        _, data = await mail.fetch(f"{max(1, exists - n + 1)}:*", "(UID)")
+        metrics.inc("commands")
+        # `*` also covers messages that arrived after SELECT
+        return sorted(parse_fetch_response(data), key=int)[-n:]
+
+    uids: list[bytes] = []
+    high = exists
+    while high >= 1 and len(uids) < n and exists - high < search_depth:
+        low = max(1, high - search_window + 1)
+        _, data = await mail.uid("search", f"{low}:{high}", *criteria)
+        metrics.inc("commands")
+        found = data[0].split()
+        uids = found + uids
+        high = low - 1
+
+        if since is not None and not sender and not found:
+            # messages are appended in arrival order, older windows are older
+            break
+
+    return uids[-n:]
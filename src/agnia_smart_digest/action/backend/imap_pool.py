@@ -0,0 +1,190 @@
+"""Authenticated IMAP connections, kept open between requests.
+
+Connections are keyed by account and have INBOX selected. A connection that
+sat idle for a while is checked with NOOP before it is handed out, and one
+idle for longer than `imap_idle_timeout` is logged out, either when its
+account next takes a connection or by the reaper task `start` launches,
+every `imap_reap_interval` seconds. Servers limit
+concurrent sessions per account, so at most `imap_max_connections`
+connections are open per account; further callers wait for one.
+"""
+
+import asyncio
+import hashlib
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TypeVar
+
+from agnia_smart_digest.action.backend.aioimap import ImapAbort, ImapClient, ImapError
+from agnia_smart_digest.settings import imap_settings
+from agnia_smart_digest.utils.logger import Logger
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+logger = Logger("imap-pool")
+metrics = metrics_registry.get("imap-pool")
+
+T = TypeVar("T")
+
+
+@dataclass
+class PooledConnection:
+    mail: ImapClient
+    last_used: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class AccountPool:
+    limit: asyncio.Semaphore
+    idle: list[PooledConnection] = field(default_factory=list)
+
+
+class ImapPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        max_connections: int,
+        idle_timeout: float,
+        reap_interval: float,
+        noop_after: float,
+        timeout: float,
+    ):
+        self.host = host
+        self.port = port
+        self.max_connections = max_connections
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self.noop_after = noop_after
+        self.timeout = timeout
+
+        self._accounts: dict[tuple[str, str], AccountPool] = {}
+        self._reaper: asyncio.Task | None = None
+
+    def _account(self, email: str, password: str) -> AccountPool:
+        # the password is part of the key so a changed one never reuses a session
+        key = (email, hashlib.sha256(password.encode()).hexdigest())
+        if key not in self._accounts:
+            self._accounts[key] = AccountPool(asyncio.Semaphore(self.max_connections))
+        return self._accounts[key]
+
+    async def _connect(self, email: str, password: str) -> PooledConnection:
+        mail = ImapClient(self.host, self.port, timeout=self.timeout)
+        await mail.connect()
+        try:
+            await mail.login(email, password)
+            await mail.select("INBOX")
+        except BaseException:
+            await mail.close()
+            raise
+        metrics.inc("connects")
+        return PooledConnection(mail)
+
+    async def _is_alive(self, connection: PooledConnection) -> bool:
+        if connection.mail.broken:
+            return False
+        if time.monotonic() - connection.last_used < self.noop_after:
+            return True
+        try:
+            status, _ = await connection.mail.noop()
+            return status == "OK"
+        except ImapError:
+            return False
+
+    async def _evict_expired(self, account: AccountPool) -> None:
+        now = time.monotonic()
+        expired = [c for c in account.idle if now - c.last_used >= self.idle_timeout]
+        account.idle = [c for c in account.idle if c not in expired]
+
+        for stale in expired:
+            metrics.inc("evictions")
+            await stale.mail.logout()
+
+    async def _reap(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            for account in list(self._accounts.values()):
+                await self._evict_expired(account)
+
+    async def _take_idle(self, account: AccountPool) -> PooledConnection | None:
+        await self._evict_expired(account)
+        connection = account.idle.pop() if account.idle else None
+
+        if connection is not None and not await self._is_alive(connection):
+            metrics.inc("dead_connections")
+            await connection.mail.close()
+            return None
+        return connection
+
+    @asynccontextmanager
+    async def connection(self, email: str, password: str) -> AsyncIterator[ImapClient]:
+        """An authenticated connection with INBOX selected.
+
+        The connection goes back to the pool when the block exits and is
+        dropped if it broke on the way or the block raised.
+        """
+        account = self._account(email, password)
+        async with account.limit:
+            connection = await self._take_idle(account)
+            if connection is None:
+                connection = await self._connect(email, password)
+            else:
+                metrics.inc("reuses")
+
+            try:
+                yield connection.mail
+            except BaseException:
+                # the block may have left a command half read
+                await connection.mail.close()
+                raise
+
+            if connection.mail.broken:
+                await connection.mail.close()
+            else:
+                connection.last_used = time.monotonic()
+                account.idle.append(connection)
+
+    async def run(
+        self,
+        email: str,
+        password: str,
+        func: Callable[[ImapClient], Awaitable[T]],
+    ) -> T:
+        """Run `func` on a pooled connection, reconnecting once if it broke."""
+        try:
+            async with self.connection(email, password) as mail:
+                return await func(mail)
+        except ImapAbort as e:
+            logger.info(f"imap connection lost ({e}), reconnecting")
+            metrics.inc("reconnects")
+
+        async with self.connection(email, password) as mail:
+            return await func(mail)
+
+    def start(self) -> None:
+        """Log out idle connections in the background until `close`."""
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+
+    async def close(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+
+        connections = [c for a in self._accounts.values() for c in a.idle]
+        for account in self._accounts.values():
+            account.idle.clear()
+
+        await asyncio.gather(*(c.mail.logout() for c in connections))
+
+
+imap_pool = ImapPool(
+    imap_settings.imap_host,
+    imap_settings.imap_port,
+    imap_settings.imap_max_connections,
+    imap_settings.imap_idle_timeout,
+    imap_settings.imap_reap_interval,
+    imap_settings.imap_noop_after,
+    imap_settings.imap_timeout,
+)
@@ -0,0 +1,434 @@
+"""Local SQLite copy of the most recent emails of each account.
+
+The mirror holds the parsed emails of the last INBOX messages, keyed by
+account and UID, with the mailbox's UIDVALIDITY, UIDNEXT and message count.
+How many messages it holds grows with the largest window asked for, up to
+`imap_mirror_depth`. A sync re-selects INBOX and:
+
+* stops there if UIDVALIDITY, UIDNEXT and the message count are unchanged;
+* otherwise lists the UIDs of the tail window with one `UID SEARCH`, drops
+  mirrored messages that were expunged or fell out of the window and
+  fetches only the new ones;
+* starts over if UIDVALIDITY changed, since UIDs are then meaningless, or
+  if the emails were parsed by an older version of the action.
+
+The header-first digest ranks the headers of more messages than it reads.
+For it the mirror keeps, apart from that window, the headers, sizes and
+body structures of the candidates it was given and the emails it picked,
+so a repeat digest downloads the headers of new mail and the bodies of
+newly picked emails only.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import date
+from email import policy
+from email.parser import BytesParser
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from agnia_smart_digest.action.backend.aioimap import ImapClient
+from agnia_smart_digest.action.backend.imap_fetch import (
+    FetchedMessage,
+    MailboxStatus,
+    TextPart,
+    fetch_bodies,
+    fetch_headers,
+    fetch_messages,
+    select_inbox,
+)
+from agnia_smart_digest.settings import imap_settings
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+metrics = metrics_registry.get("mailbox-mirror")
+
+
+@dataclass(frozen=True)
+class MirrorState:
+    uidvalidity: int | None
+    uidnext: int | None
+    exists: int
+    version: int
+    # how many of the last messages are mirrored
+    window: int
+
+
+class MailboxMirror:
+    def __init__(self, path: str, depth: int):
+        self.path = Path(path)
+        self.depth = depth
+
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        # one sync per account at a time, so new mail is downloaded once
+        self._sync_locks: dict[str, asyncio.Lock] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS mailboxes (account TEXT PRIMARY KEY,"
+                " uidvalidity INTEGER, uidnext INTEGER, message_count INTEGER,"
+                " version INTEGER, window INTEGER)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS messages (account TEXT, uid INTEGER,"
+                " sender TEXT, received TEXT, email TEXT,"
+                " PRIMARY KEY (account, uid))"
+            )
+            # header-first candidates; email is set once the email was picked
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS candidates (account TEXT, uid INTEGER,"
+                " uidvalidity INTEGER, version INTEGER, headers BLOB,"
+                " summary TEXT, email TEXT, PRIMARY KEY (account, uid))"
+            )
+            self._db.commit()
+        return self._db
+
+    def _sync_lock(self, account: str) -> asyncio.Lock:
+        return self._sync_locks.setdefault(account, asyncio.Lock())
+
+    def state(self, account: str) -> MirrorState | None:
+        with self._db_lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT uidvalidity, uidnext, message_count, version, window"
+                    " FROM mailboxes WHERE account = ?",
+                    (account,),
+                )
+                .fetchone()
+            )
+        return MirrorState(*row) if row is not None else None
+
+    def _save_state(self, account: str, state: MirrorState) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO mailboxes VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    account,
+                    state.uidvalidity,
+                    state.uidnext,
+                    state.exists,
+                    state.version,
+                    state.window,
+                ),
+            )
+            db.commit()
+
+    def _reset(self, account: str) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.execute("DELETE FROM messages WHERE account = ?", (account,))
+            db.execute("DELETE FROM mailboxes WHERE account = ?", (account,))
+            db.commit()
+
+    def _uids(self, account: str) -> set[int]:
+        with self._db_lock:
+            rows = (
+                self._connect()
+                .execute("SELECT uid FROM messages WHERE account = ?", (account,))
+                .fetchall()
+            )
+        return {uid for (uid,) in rows}
+
+    def _delete(self, account: str, uids: set[int]) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.executemany(
+                "DELETE FROM messages WHERE account = ? AND uid = ?",
+                [(account, uid) for uid in uids],
+            )
+            db.commit()
+
+    def _select(self, query: str, params: list) -> list[tuple]:
+        with self._db_lock:
+            return self._connect().execute(query, params).fetchall()
+
+    def _store(
+        self,
+        account: str,
+        messages: list[FetchedMessage],
+        to_email: Callable[[FetchedMessage], BaseModel],
+    ) -> None:
+        rows = [
+            (
+                account,
+                int(message.uid),
+                str(message.headers.get("From", "")),
+                message.received.isoformat() if message.received else "",
+                to_email(message).model_dump_json(),
+            )
+            for message in messages
+        ]
+        with self._db_lock:
+            db = self._connect()
+            db.executemany(
+                "INSERT OR REPLACE INTO messages VALUES (?, ?, ?, ?, ?)", rows
+            )
+            db.commit()
+
+    async def sync(
+        self,
+        mail: ImapClient,
+        account: str,
+        version: int,
+        to_email: Callable[[FetchedMessage], BaseModel],
+        window: int,
+    ) -> MailboxStatus:
+        """Bring the mirror of `account` up to date with its INBOX.
+
+        At least the last `window` messages are mirrored afterwards (within
+        the depth). `to_email` turns a fetched message into the model that
+        is stored, `version` identifies how it does so. Disk access runs in
+        a worker thread.
+        """
+        status = await select_inbox(mail)
+
+        async with self._sync_lock(account):
+            state = await asyncio.to_thread(self.state, account)
+            if state is not None and (
+                state.uidvalidity != status.uidvalidity or state.version != version
+            ):
+                metrics.inc("resets")
+                await asyncio.to_thread(self._reset, account)
+                state = None
+
+            window = min(self.depth, max(window, state.window if state else 0))
+            if (
+                state is not None
+                and status.uidnext is not None
+                and (state.uidnext, state.exists) == (status.uidnext, status.exists)
+                and state.window == window
+            ):
+                metrics.inc("unchanged")
+                return status
+
+            server: set[int] = set()
+            if status.exists:
+                tail = f"{max(1, status.exists - window + 1)}:*"
+                _, data = await mail.uid("search", tail)
+                server = {int(uid) for uid in data[0].split()}
+
+            mirrored = await asyncio.to_thread(self._uids, account)
+            # expunged, or older than the window now
+            await asyncio.to_thread(self._delete, account, mirrored - server)
+
+            new = sorted(server - mirrored)
+            if new:
+                messages = await fetch_messages(
+                    mail,
+                    [str(uid).encode() for uid in new],
+                    max_part_bytes=imap_settings.imap_max_part_bytes,
+                    max_email_bytes=imap_settings.imap_max_email_bytes,
+                    batch_size=imap_settings.imap_fetch_batch_size,
+                )
+                await asyncio.to_thread(self._store, account, messages, to_email)
+
+            metrics.inc("synced", len(new))
+            metrics.inc("dropped", len(mirrored - server))
+            await asyncio.to_thread(
+                self._save_state,
+                account,
+                MirrorState(
+                    status.uidvalidity, status.uidnext, status.exists, version, window
+                ),
+            )
+        return status
+
+    async def last_emails(
+        self,
+        account: str,
+        n: int,
+        since: date | None = None,
+        sender: str = "",
+    ) -> list[str] | None:
+        """JSON of the last `n` matching emails, oldest first.
+
+        None if the mirror cannot tell: fewer than `n` emails match and the
+        mailbox goes back further than the mirrored window.
+        """
+        query = "SELECT email FROM messages WHERE account = ?"
+        params: list = [account]
+        if since is not None:
+            query += " AND received >= ?"
+            params.append(since.isoformat())
+        if sender:
+            # IMAP FROM is a case-insensitive substring match too
+            query += " AND instr(lower(sender), lower(?)) > 0"
+            params.append(sender)
+        query += " ORDER BY uid DESC LIMIT ?"
+        params.append(n)
+
+        state = await asyncio.to_thread(self.state, account)
+        rows = await asyncio.to_thread(self._select, query, params)
+
+        if len(rows) < n and (state is None or state.exists > state.window):
+            metrics.inc("misses")
+            return None
+
+        metrics.inc("hits")
+        return [email for (email,) in reversed(rows)]
+
+    def _candidates(
+        self, account: str, uidvalidity: int | None, version: int
+    ) -> dict[int, tuple[bytes, str, str | None]]:
+        with self._db_lock:
+            db = self._connect()
+            # mirrored before the mailbox was recreated or the action changed
+            db.execute(
+                "DELETE FROM candidates WHERE account = ?"
+                " AND (uidvalidity IS NOT ? OR version != ?)",
+                (account, uidvalidity, version),
+            )
+            db.commit()
+            rows = db.execute(
+                "SELECT uid, headers, summary, email FROM candidates WHERE account = ?",
+                (account,),
+            ).fetchall()
+        return {uid: (headers, summary, email) for uid, headers, summary, email in rows}
+
+    def _store_candidates(
+        self,
+        account: str,
+        uidvalidity: int | None,
+        version: int,
+        messages: list[FetchedMessage],
+    ) -> None:
+        rows = [
+            (
+                account,
+                int(message.uid),
+                uidvalidity,
+                version,
+                message.headers.as_bytes(),
+                json.dumps(
+                    {
+                        "received": message.received.isoformat()
+                        if message.received
+                        else None,
+                        "size": message.size,
+                        "parts": [asdict(part) for part in message.parts],
+                    }
+                ),
+                None,
+            )
+            for message in messages
+        ]
+        with self._db_lock:
+            db = self._connect()
+            db.executemany(
+                "INSERT OR REPLACE INTO candidates VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            # only the newest `depth` candidates are kept
+            db.execute(
+                "DELETE FROM candidates WHERE account = ? AND uid NOT IN"
+                " (SELECT uid FROM candidates WHERE account = ?"
+                " ORDER BY uid DESC LIMIT ?)",
+                (account, account, self.depth),
+            )
+            db.commit()
+
+    def _store_picked(self, account: str, emails: dict[int, str]) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.executemany(
+                "UPDATE candidates SET email = ? WHERE account = ? AND uid = ?",
+                [(email, account, uid) for uid, email in emails.items()],
+            )
+            db.commit()
+
+    async def pick_emails(
+        self,
+        mail: ImapClient,
+        account: str,
+        uidvalidity: int | None,
+        version: int,
+        to_email: Callable[[FetchedMessage], BaseModel],
+        uids: list[bytes],
+        pick: Callable[[list[FetchedMessage]], list[FetchedMessage]],
+    ) -> list[str]:
+        """JSON of the emails `pick` chooses among `uids` by their headers.
+
+        Headers, sizes and body structures are fetched for the `uids` not
+        mirrored yet, bodies for the picked emails not mirrored yet. The
+        emails keep the order `pick` returns them in.
+        """
+        parser = BytesParser(policy=policy.default)
+
+        async with self._sync_lock(account):
+            stored = await asyncio.to_thread(
+                self._candidates, account, uidvalidity, version
+            )
+            missing = [uid for uid in uids if int(uid) not in stored]
+            fetched = {
+                message.uid: message
+                for message in await fetch_headers(
+                    mail, missing, imap_settings.imap_fetch_batch_size
+                )
+            }
+            await asyncio.to_thread(
+                self._store_candidates,
+                account,
+                uidvalidity,
+                version,
+                list(fetched.values()),
+            )
+            metrics.inc("candidate_hits", len(uids) - len(missing))
+            metrics.inc("candidate_misses", len(missing))
+
+            messages = []
+            emails: dict[bytes, str] = {}
+            for uid in uids:
+                if uid in fetched:
+                    messages.append(fetched[uid])
+                elif int(uid) in stored:
+                    headers, summary, email = stored[int(uid)]
+                    fields = json.loads(summary)
+                    received = fields["received"]
+                    messages.append(
+                        FetchedMessage(
+                            uid=uid,
+                            headers=parser.parsebytes(headers, headersonly=True),
+                            received=date.fromisoformat(received) if received else None,
+                            size=fields["size"],
+                            parts=[TextPart(**part) for part in fields["parts"]],
+                        )
+                    )
+                    if email is not None:
+                        emails[uid] = email
+
+            picked = pick(messages)
+            unread = [message for message in picked if message.uid not in emails]
+            await fetch_bodies(
+                mail,
+                unread,
+                max_part_bytes=imap_settings.imap_max_part_bytes,
+                max_email_bytes=imap_settings.imap_max_email_bytes,
+                batch_size=imap_settings.imap_fetch_batch_size,
+            )
+            read = {
+                message.uid: to_email(message).model_dump_json() for message in unread
+            }
+            await asyncio.to_thread(
+                self._store_picked,
+                account,
+                {int(uid): email for uid, email in read.items()},
+            )
+            metrics.inc("picked_hits", len(picked) - len(unread))
+            metrics.inc("picked_misses", len(unread))
+
+        emails.update(read)
+        return [emails[message.uid] for message in picked]
+
+
+mailbox_mirror = MailboxMirror(
+    imap_settings.imap_mirror_path, imap_settings.imap_mirror_depth
+)
@@ -1,4 +1,5 @@
 import asyncio
+import time
 from pathlib import Path
 
 import psutil
@@ -11,12 +12,18 @@ from selenium.webdriver.edge.service import Service as EdgeService
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.base import BlockingAction
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.utils.logger import Logger
 
 driver_path = Path() / "driver"
-msedgedriver_path = list(driver_path.glob("msedgedriver"))[0].resolve()
+
+
+def find_msedgedriver() -> Path:
+    for path in driver_path.glob("msedgedriver"):
+        return path.resolve()
+    raise FileNotFoundError(f"msedgedriver not found in {driver_path.resolve()}")
+
 
 # Configure Selenium WebDriver for Edge
 edge_options = Options()
@@ -45,9 +52,7 @@ class MoodleOutputParams(BaseModel):
     deadlines: list[str]
 
 
-def deadlines_message(raw_data: dict) -> tuple[str, dict]:
-    output = MoodleOutputParams.model_validate(raw_data)
-
+def deadlines_message(output: MoodleOutputParams) -> tuple[str, MoodleOutputParams]:
     word = "deadline"
     if len(output.deadlines) > 1:
         word = "deadlines"
@@ -63,7 +68,7 @@ def deadlines_message(raw_data: dict) -> tuple[str, dict]:
             f"• «{deadline.name}» is due <b>{deadline.time} on {deadline.date}</b>\n\n"
         )
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
@@ -72,15 +77,21 @@ def deadlines_message(raw_data: dict) -> tuple[str, dict]:
     system_name="General",
     result_message_func=deadlines_message,
 )
-class EmailsAction(Action[MoodleInputParams, MoodleOutputParams]):
+class EmailsAction(BlockingAction[MoodleInputParams, MoodleOutputParams]):
     action_name = "moodle_action"
+    # the cleanup below kills every Edge process, so runs must not overlap
+    max_workers = 1
 
     def __init__(self):
         super().__init__(action_name="moodle_action")
+        self.msedgedriver_path: Path | None = None
 
-    async def execute(self, input_data: MoodleInputParams) -> MoodleOutputParams:
+    async def setup(self) -> None:
+        self.msedgedriver_path = await asyncio.to_thread(find_msedgedriver)
 
-        service = EdgeService(executable_path=str(msedgedriver_path))
+    def execute_blocking(self, input_data: MoodleInputParams) -> MoodleOutputParams:
+        assert self.msedgedriver_path is not None
+        service = EdgeService(executable_path=str(self.msedgedriver_path))
 
         driver = webdriver.Edge(service=service, options=edge_options)
 
@@ -91,13 +102,13 @@ class EmailsAction(Action[MoodleInputParams, MoodleOutputParams]):
             logger.info("logging-out from moodle")
             logout_url = "https://sso.university.innopolis.ru/adfs/oauth2/logout"
             driver.get(logout_url)
-            await asyncio.sleep(1)  # Allow time for the logout to complete
+            time.sleep(1)  # Allow time for the logout to complete
 
             # Step 2: Log into the secondary website
             logger.info("logging-in to moodle")
             login_url = "https://my.university.innopolis.ru/site/auth?authclient=adfs"
             driver.get(login_url)
-            await asyncio.sleep(3)  # Allow time for the page to load
+            time.sleep(3)  # Allow time for the page to load
 
             # Find and fill the login form
             logger.info("filling-in moodle login form")
@@ -108,13 +119,13 @@ class EmailsAction(Action[MoodleInputParams, MoodleOutputParams]):
                 input_data.moodle_password
             )
             driver.find_element(By.ID, "submitButton").click()
-            await asyncio.sleep(3)  # Allow time for the login process to complete
+            time.sleep(3)  # Allow time for the login process to complete
 
             # Step 3: Navigate to Moodle and use OAuth login
             logger.info("navigating to moodle")
             moodle_login_url = "https://moodle.innopolis.university/login/index.php"
             driver.get(moodle_login_url)
-            await asyncio.sleep(1)  # Allow time for the page to load
+            time.sleep(1)  # Allow time for the page to load
 
             # Wait for the OAuth login button to be clickable
             logger.info("waiting for moodle login button")
@@ -142,7 +153,7 @@ class EmailsAction(Action[MoodleInputParams, MoodleOutputParams]):
 
             # Give the page a moment to fully render
             logger.info("waiting for moodle page to load")
-            await asyncio.sleep(1)
+            time.sleep(1)
 
             # Get the page source after fully loaded
             page_source = driver.page_source
@@ -183,7 +194,7 @@ class EmailsAction(Action[MoodleInputParams, MoodleOutputParams]):
 
                 for event in events:
                     # Extract event details
-                    time = event.find(
+                    due_time = event.find(
                         "small",
                         {"class": "text-right text-nowrap align-self-center ml-1"},
                     ).text.strip()
@@ -198,7 +209,7 @@ class EmailsAction(Action[MoodleInputParams, MoodleOutputParams]):
                     # Store the event details in a dictionary
                     event_details = {
                         "date": date_text,
-                        "time": time,
+                        "time": due_time,
                         "event_name": event_name,
                         "event_url": event_url,
                         "course_info": course_info,
@@ -1,7 +1,7 @@
 from newsapi import NewsApiClient
 from pydantic import BaseModel
 
-from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.base import BlockingAction
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.utils.logger import Logger
 
@@ -22,9 +22,7 @@ class NewsActionOutputParams(BaseModel):
     articles: list[str]
 
 
-def news_message(raw_data: dict) -> tuple[str, dict]:
-    output = NewsActionOutputParams.model_validate(raw_data)
-
+def news_message(output: NewsActionOutputParams) -> tuple[str, NewsActionOutputParams]:
     n = len(output.articles)
     word = "article"
     if n > 1:
@@ -36,7 +34,7 @@ def news_message(raw_data: dict) -> tuple[str, dict]:
         article = NewsArticle.model_validate_json(article)
         formatted_message += f"📰 <a href='{article.url}'>{article.title}</a>\n"
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
@@ -45,13 +43,14 @@ def news_message(raw_data: dict) -> tuple[str, dict]:
     system_name="General",
     result_message_func=news_message,
 )
-class NewsAction(Action[NewsActionInputParams, NewsActionOutputParams]):
+class NewsAction(BlockingAction[NewsActionInputParams, NewsActionOutputParams]):
     action_name = "news_action"
+    max_workers = 2
 
     def __init__(self):
         super().__init__(action_name="news_action")
 
-    async def execute(
+    def execute_blocking(
         self, input_data: NewsActionInputParams
     ) -> NewsActionOutputParams:
         client = NewsApiClient(api_key=input_data.news_api_key)
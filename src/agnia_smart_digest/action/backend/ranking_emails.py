@@ -1,4 +1,4 @@
-import json
+import asyncio
 import pickle
 from collections import defaultdict
 from pathlib import Path
@@ -7,52 +7,80 @@ import numpy as np
 from lexrank import STOPWORDS, LexRank
 from pydantic import BaseModel
 
-from agnia_smart_digest.action.backend.emails import EmailOutputModel
+from agnia_smart_digest.action.backend.email_analysis import EmailAnalysis, analyze
+from agnia_smart_digest.action.backend.emails import (
+    EMAIL_SCHEMA_VERSION,
+    EmailList,
+    EmailOutputModel,
+)
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.utils.logger import Logger
 
 logger = Logger("ranking-emails-action")
 
-# Load the LexRank object from a file
 lex_rank_filepath = Path("models") / "tech_lexRank.pkl"
-lxr = LexRank(
-    documents=[["tech"]],
-    stopwords=STOPWORDS["en"],
-)
 
-with lex_rank_filepath.open("rb") as f:
-    data = pickle.load(f)
 
-    score = defaultdict(lambda: 0.0)
-    score.update(data)
-    lxr.idf_score = score
+class EmailLexRank(LexRank):
+    """LexRank ranking `EmailAnalysis` objects, each tokenized only once."""
+
+    def tokenize_sentence(self, sentence: str | EmailAnalysis) -> list[str]:
+        if not isinstance(sentence, EmailAnalysis):
+            return super().tokenize_sentence(sentence)
+        if sentence.rank_tokens is None:
+            sentence.rank_tokens = self._tokenize_words(sentence.text)
+        return sentence.rank_tokens
+
+    def _tokenize_words(self, text: str) -> list[str]:
+        # lexrank tokenizes word by word, looking for URLs in each of them;
+        # emails repeat most of their words
+        tokens = []
+        tokenized: dict[str, list[str]] = {}
+        for word in text.split():
+            word_tokens = tokenized.get(word)
+            if word_tokens is None:
+                word_tokens = tokenized[word] = super().tokenize_sentence(word)
+            tokens += word_tokens
+        return tokens
+
+
+def load_lexrank() -> EmailLexRank:
+    # Load the LexRank object from a file
+    lxr = EmailLexRank(
+        documents=[["tech"]],
+        # a plain set, lookups in lexrank's immutable one are slow
+        stopwords=frozenset(STOPWORDS["en"]),
+    )
+
+    with lex_rank_filepath.open("rb") as f:
+        data = pickle.load(f)
+
+        score = defaultdict(lambda: 0.0)
+        score.update(data)
+        lxr.idf_score = score
+
+    return lxr
 
 
 # Define input parameters for the action
 class RankingEmailsActionInputParams(BaseModel):
-    emails: list[str]
+    emails: EmailList
 
 
 # Define output parameters for the action
 class RankingEmailsActionOutputParams(BaseModel):
-    emails: list[str]
-
+    emails: EmailList
+    schema_version: int = EMAIL_SCHEMA_VERSION
 
-def remove_multiple_newlines(text: str) -> str:
-    return " ".join(text.split())
 
+def get_email_contents(emails: list[EmailOutputModel]) -> list[EmailAnalysis]:
+    return [analyze(email.Text) for email in emails]
 
-def get_email_contents(json_emails: list[str]) -> list[str]:
-    emails = [json.loads(email)["Text"] for email in json_emails]
 
-    contents = []
-    for email in emails:
-        contents.append(remove_multiple_newlines(email))
-    return contents
-
-
-def return_technical_emails(contents: list[str]) -> list[int]:
+def return_technical_emails(
+    lxr: EmailLexRank, contents: list[EmailAnalysis]
+) -> list[int]:
     scores_cont = lxr.rank_sentences(
         contents,
         threshold=None,
@@ -62,16 +90,14 @@ def return_technical_emails(contents: list[str]) -> list[int]:
     return sorted_indices[::-1].tolist()
 
 
-def ranking_emails_message(raw_data: dict) -> tuple[str, dict]:
-    output = RankingEmailsActionOutputParams.model_validate(raw_data)
-
-    emails = [EmailOutputModel.model_validate_json(email) for email in output.emails]
-
+def ranking_emails_message(
+    output: RankingEmailsActionOutputParams,
+) -> tuple[str, RankingEmailsActionOutputParams]:
     formatted_message = "<i>Ranked technical emails ✅</i>:"
-    for email in emails:
+    for email in output.emails:
         formatted_message += f"\n📧 {email.Subject}"
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 # Register the action
@@ -88,6 +114,24 @@ class RankingEmailsAction(
 
     def __init__(self):
         super().__init__(action_name="ranking_emails_action")
+        self.lxr: EmailLexRank | None = None
+
+    async def setup(self) -> None:
+        self.lxr = await asyncio.to_thread(load_lexrank)
+
+    async def warmup(self) -> None:
+        assert self.lxr is not None
+        await asyncio.to_thread(
+            return_technical_emails,
+            self.lxr,
+            [
+                analyze("Warming up the ranker."),
+                analyze("The release is scheduled for Monday."),
+            ],
+        )
+
+    async def teardown(self) -> None:
+        self.lxr = None
 
     async def execute(
         self, input_data: RankingEmailsActionInputParams
@@ -97,7 +141,8 @@ class RankingEmailsAction(
             logger.error("No email contents found")
             return RankingEmailsActionOutputParams(emails=[])
 
-        top_emails = return_technical_emails(contents)
+        assert self.lxr is not None
+        top_emails = return_technical_emails(self.lxr, contents)
 
         selected_emails = [input_data.emails[i] for i in top_emails]
 
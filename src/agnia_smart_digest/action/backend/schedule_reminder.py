@@ -21,14 +21,14 @@ class ScheduleReminderOutputParams(BaseModel):
     reminder_datetime: str
 
 
-def schedule_reminder_message(data: dict) -> tuple[str, dict]:
-    obj = ScheduleReminderOutputParams.model_validate(data)
-
+def schedule_reminder_message(
+    obj: ScheduleReminderOutputParams,
+) -> tuple[str, ScheduleReminderOutputParams]:
     date = datetime.fromisoformat(obj.reminder_datetime)
 
     return (
         f"<i>Scheduled reminder ✅</i>\n📅 {date.strftime('%c')}",
-        obj.model_dump(),
+        obj,
     )
 
 
@@ -65,6 +65,8 @@ class ScheduleReminderAction(
     Action[ScheduleReminderInputParams, ScheduleReminderOutputParams]
 ):
     action_name = "schedule_reminder_action"
+    # identical requests are still separate reminders
+    coalesce = False
 
     def __init__(self) -> None:
         super().__init__("schedule_reminder_action")
@@ -1,41 +1,41 @@
+import asyncio
+import uuid
+
 import chromadb
 from pydantic import BaseModel
 
-from agnia_smart_digest.action.backend.emails import EmailOutputModel
-from agnia_smart_digest.action.base import Action
+from agnia_smart_digest.action.backend.email_analysis import analyze
+from agnia_smart_digest.action.backend.emails import EMAIL_SCHEMA_VERSION, EmailList
+from agnia_smart_digest.action.base import BlockingAction
 from agnia_smart_digest.action.registry import register_action
 from agnia_smart_digest.utils.logger import Logger
 
-client = chromadb.Client()
-
-collection = client.create_collection("emails31")
-
-
 logger = Logger("search-emails-action")
 
 
 # Define input parameters for the action
 class SearchEmailsActionInputParams(BaseModel):
-    emails: list[str]
+    emails: EmailList
     query_texts: str
     n_results: int
 
 
 # Define output parameters for the action
 class SearchEmailActionOutputParams(BaseModel):
-    emails: list[str]
+    emails: EmailList
+    schema_version: int = EMAIL_SCHEMA_VERSION
 
 
-def search_emails_message(raw_data: dict) -> tuple[str, dict]:
-    output = SearchEmailActionOutputParams.model_validate(raw_data)
-
+def search_emails_message(
+    output: SearchEmailActionOutputParams,
+) -> tuple[str, SearchEmailActionOutputParams]:
     n = len(output.emails)
     word = "email"
     if n > 1:
         word = "emails"
 
     formatted_message = f"Find {n} {word} ✅"
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 # Register the action
@@ -46,25 +46,51 @@ def search_emails_message(raw_data: dict) -> tuple[str, dict]:
     result_message_func=search_emails_message,
 )
 class SearchEmailsAction(
-    Action[SearchEmailsActionInputParams, SearchEmailActionOutputParams]
+    BlockingAction[SearchEmailsActionInputParams, SearchEmailActionOutputParams]
 ):
     action_name = "search_emails_action"
+    # chromadb embeds and queries synchronously
+    max_workers = 2
 
     def __init__(self):
         super().__init__(action_name="search_emails_action")
-
-    async def execute(
+        self.client = None
+        self.collection = None
+
+    async def setup(self) -> None:
+        self.client = await asyncio.to_thread(chromadb.Client)
+        self.collection = await asyncio.to_thread(
+            self.client.get_or_create_collection, "emails31"
+        )
+
+    async def warmup(self) -> None:
+        # the first add loads the embedding model
+        assert self.collection is not None
+        await asyncio.to_thread(
+            self.collection.add, documents=["warm up"], ids=["warmup"]
+        )
+        await asyncio.to_thread(self.collection.delete, ids=["warmup"])
+
+    async def teardown(self) -> None:
+        if self.client is not None:
+            self.client.delete_collection("emails31")
+        self.client = None
+        self.collection = None
+
+    def execute_blocking(
         self, input_data: SearchEmailsActionInputParams
     ) -> SearchEmailActionOutputParams:
+        assert self.collection is not None
+        collection = self.collection
+        # searches share the collection, each one only sees its own documents
+        request_id = uuid.uuid4().hex
+        emails = input_data.emails
+        ids = [f"{request_id}-{index}" for index in range(len(emails))]
         try:
-            emails = [
-                EmailOutputModel.model_validate_json(email)
-                for email in input_data.emails
+            documents = [analyze(email.Text).text for email in emails]
+            metadatas = [
+                {"topic": email.Subject, "request": request_id} for email in emails
             ]
-            documents = [email.Text for email in emails]
-            metadatas = [{"topic": email.Subject} for email in emails]
-
-            ids = list(map(str, range(len(documents))))
 
             # Add documents to the collection
             collection.add(
@@ -75,15 +101,20 @@ class SearchEmailsAction(
 
             # Query the collection
             results = collection.query(
-                query_texts=[input_data.query_texts], n_results=input_data.n_results
+                query_texts=[input_data.query_texts],
+                n_results=input_data.n_results,
+                where={"request": request_id},
             )
             assert results["ids"] is not None
 
-            indexes = [int(index) for index in results["ids"][0]]
+            indexes = [int(id_.rsplit("-", 1)[1]) for id_ in results["ids"][0]]
 
             return SearchEmailActionOutputParams(
                 emails=[input_data.emails[index] for index in indexes]
             )
-        except Exception as e:
-            logger.error(f"Error in collection action: {e}")
+        except Exception:
+            logger.exception("Error in collection action")
             return SearchEmailActionOutputParams(emails=[])
+        finally:
+            if ids:
+                collection.delete(ids=ids)
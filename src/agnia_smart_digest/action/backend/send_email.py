@@ -1,11 +1,12 @@
-import smtplib
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.backend.aiosmtp import SmtpClient
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
+from agnia_smart_digest.settings import smtp_settings
 from agnia_smart_digest.utils.logger import Logger
 
 logger = Logger("send-email-action")
@@ -23,14 +24,15 @@ class EmailSendOutputParams(BaseModel):
     status: str
 
 
-def email_send_message(raw_data: dict) -> tuple[str, dict]:
-    output = EmailSendOutputParams.model_validate(raw_data)
+def email_send_message(
+    output: EmailSendOutputParams,
+) -> tuple[str, EmailSendOutputParams]:
     if output.status == "Success":
         formatted_message = "<i>Email sent successfully! ✅</i>"
     else:
         formatted_message = "<i>Email sending failed! ❌</i>"
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
@@ -41,18 +43,22 @@ def email_send_message(raw_data: dict) -> tuple[str, dict]:
 )
 class SendEmailAction(Action[EmailSendInputParams, EmailSendOutputParams]):
     action_name = "send_email_action"
+    # identical requests are still separate emails
+    coalesce = False
 
     def __init__(self):
         super().__init__(action_name="send_email_action")
 
     async def execute(self, input_data: EmailSendInputParams) -> EmailSendOutputParams:
-        SMTP_HOST = "mail.innopolis.ru"  # Replace with your SMTP server
-        SMTP_PORT = 587  # SMTP port for TLS
+        server = SmtpClient(
+            smtp_settings.smtp_host,
+            smtp_settings.smtp_port,
+            timeout=smtp_settings.smtp_timeout,
+        )
 
         try:
-            server = smtplib.SMTP(SMTP_HOST, SMTP_PORT)
-            server.starttls()
-            server.login(input_data.outlook_email, input_data.outlook_password)
+            await server.connect()
+            await server.login(input_data.outlook_email, input_data.outlook_password)
 
             msg = MIMEMultipart()
             msg["From"] = input_data.outlook_email
@@ -60,12 +66,13 @@ class SendEmailAction(Action[EmailSendInputParams, EmailSendOutputParams]):
             msg["Subject"] = input_data.email_subject
             msg.attach(MIMEText(input_data.email_content, "plain"))
 
-            server.sendmail(
-                input_data.outlook_email, input_data.email_receiver, msg.as_string()
+            await server.send_message(
+                msg, input_data.outlook_email, [input_data.email_receiver]
             )
-            server.quit()
 
             return EmailSendOutputParams(status="Success")
         except Exception as e:
             logger.error(f"Error sending email: {e}")
             return EmailSendOutputParams(status="Failed")
+        finally:
+            await server.quit()
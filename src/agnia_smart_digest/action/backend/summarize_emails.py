@@ -1,61 +1,126 @@
-import heapq
-import re
+import asyncio
+from functools import cache
 
 import nltk
+import numpy as np
 from pydantic import BaseModel
 
-from agnia_smart_digest.action.backend.emails import EmailOutputModel
+from agnia_smart_digest.action.backend.email_analysis import analyze
+from agnia_smart_digest.action.backend.emails import EMAIL_SCHEMA_VERSION, EmailList
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
 
+# sentences in a summary
+SUMMARY_SENTENCES = 7
+# longer sentences are left out of summaries
+MAX_SENTENCE_WORDS = 30
+
+
+@cache
+def english_stopwords() -> frozenset[str]:
+    return frozenset(nltk.corpus.stopwords.words("english"))
+
+
+def summarize_emails(email_texts: list[str]) -> list[str]:
+    """Summaries of `email_texts`, the best scoring short sentences of each.
+
+    A sentence scores the frequencies of its words relative to the most
+    frequent word of its email, stopwords aside. The sentences of all the
+    emails form one sparse term matrix and are scored in a single pass.
+    """
+    stopwords = english_stopwords()
+    # frequency of each term, the terms of every email one after another
+    weights: list[float] = []
+    # sentence and term of each token that has a frequency
+    rows: list[int] = []
+    columns: list[int] = []
+    # distinct short sentences of each email, and the row of the first
+    sentences: list[list[str]] = []
+    first_rows: list[int] = []
+    n_rows = 0
+
+    for email_text in email_texts:
+        analysis = analyze(email_text)
+        counts = {
+            word: count
+            for word, count in analysis.term_counts.items()
+            if word not in stopwords
+        }
+        first_rows.append(n_rows)
+        sentences.append([])
+        if not counts:
+            continue
+
+        maximum = max(counts.values())
+        terms = {}
+        for word, count in counts.items():
+            terms[word] = len(weights)
+            weights.append(count / maximum)
+
+        # a sentence repeated in an email is scored as one
+        sentence_rows: dict[str, int] = {}
+        for i, sentence in enumerate(analysis.sentences):
+            if len(sentence.split(" ")) >= MAX_SENTENCE_WORDS:
+                continue
+            row = sentence_rows.get(sentence)
+            if row is None:
+                row = sentence_rows[sentence] = n_rows
+                sentences[-1].append(sentence)
+                n_rows += 1
+            for word in analysis.sentence_words(i):
+                term = terms.get(word)
+                if term is not None:
+                    rows.append(row)
+                    columns.append(term)
+
+    row_index = np.array(rows, dtype=np.intp)
+    # bincount adds the tokens of a sentence in order, like the scores were
+    # summed before, so equal sentences still tie
+    scores = np.bincount(
+        row_index,
+        weights=np.array(weights)[np.array(columns, dtype=np.intp)],
+        minlength=n_rows,
+    )
+    scored = np.bincount(row_index, minlength=n_rows) > 0
+
+    summaries = []
+    for first_row, email_sentences in zip(first_rows, sentences):
+        rows_of_email = slice(first_row, first_row + len(email_sentences))
+        picked = np.flatnonzero(scored[rows_of_email])
+        picked_scores = scores[rows_of_email][picked]
+        if len(picked) > SUMMARY_SENTENCES:
+            keep = _best(picked_scores, SUMMARY_SENTENCES)
+            picked, picked_scores = picked[keep], picked_scores[keep]
+        # best first, the earlier sentence first among equals
+        order = np.lexsort((picked, -picked_scores))
+        summaries.append(" ".join(email_sentences[i] for i in picked[order]))
+    return summaries
+
+
+def _best(scores: np.ndarray, k: int) -> np.ndarray:
+    # mask of the k highest scores, the earliest of those tied with the k-th
+    kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+    above = scores > kth
+    tied = scores == kth
+    return above | (tied & (np.cumsum(tied) <= k - np.count_nonzero(above)))
+
 
 def summarize_email(email_text: str) -> str:
-    # Removing Square Brackets and Extra Spaces
-    email_text = re.sub(r"\[[0-9]*\]", " ", email_text)
-    email_text = re.sub(r"\s+", " ", email_text)
-    # Removing special characters and digits
-    formatted_email_text = re.sub("[^a-zA-Z]", " ", email_text)
-    formatted_email_text = re.sub(r"\s+", " ", formatted_email_text)
-    sentence_list = nltk.sent_tokenize(email_text)
-    stopwords = nltk.corpus.stopwords.words("english")
-
-    word_frequencies = {}
-    for word in nltk.word_tokenize(formatted_email_text):
-        if word not in stopwords:
-            if word not in word_frequencies.keys():
-                word_frequencies[word] = 1
-            else:
-                word_frequencies[word] += 1
-        maximum_frequncy = max(word_frequencies.values())
-    for word in word_frequencies.keys():
-        word_frequencies[word] = word_frequencies[word] / maximum_frequncy
-        sentence_scores = {}
-    for sent in sentence_list:
-        for word in nltk.word_tokenize(sent.lower()):
-            if word in word_frequencies.keys():
-                if len(sent.split(" ")) < 30:
-                    if sent not in sentence_scores.keys():
-                        sentence_scores[sent] = word_frequencies[word]
-                    else:
-                        sentence_scores[sent] += word_frequencies[word]
-
-    summary_sentences = heapq.nlargest(7, sentence_scores, key=sentence_scores.get)  # type: ignore
-
-    summary = " ".join(summary_sentences)
-    return summary
+    return summarize_emails([email_text])[0]
 
 
 class SummarizeEmailsInputParams(BaseModel):
-    emails: list[str]
+    emails: EmailList
 
 
 class EmailSummaryOutputParams(BaseModel):
-    emails: list[str]
-
+    emails: EmailList
+    schema_version: int = EMAIL_SCHEMA_VERSION
 
-def summarized_emails_message(raw_data: dict) -> tuple[str, dict]:
-    output = EmailSummaryOutputParams.model_validate(raw_data)
 
+def summarized_emails_message(
+    output: EmailSummaryOutputParams,
+) -> tuple[str, EmailSummaryOutputParams]:
     n = len(output.emails)
     word = "email"
     if n > 1:
@@ -64,12 +129,11 @@ def summarized_emails_message(raw_data: dict) -> tuple[str, dict]:
     formatted_message = f"<i>Summarized {n} {word} ✅</i>\n"
 
     for email_data in output.emails:
-        email_data = EmailOutputModel.model_validate_json(email_data)
         formatted_message += (
             f"✉️ «{email_data.Subject}» {email_data.Date}\n{email_data.Text}\n\n"
         )
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
@@ -84,16 +148,19 @@ class EmailsAction(Action[SummarizeEmailsInputParams, EmailSummaryOutputParams])
     def __init__(self):
         super().__init__(action_name="summarize_emails_action")
 
+    async def warmup(self) -> None:
+        # loads the nltk tokenizer and stopwords corpus
+        await asyncio.to_thread(
+            summarize_email, "Warming up the summarizer. It reads the corpus once."
+        )
+
     async def execute(
         self, input_data: SummarizeEmailsInputParams
     ) -> EmailSummaryOutputParams:
-        emails = []
-        for email in input_data.emails:
-            emails.append(EmailOutputModel.model_validate_json(email))
-
-        summarized_emails = []
-        for email in emails:
-            email.Text = summarize_email(email.Text)
-            summarized_emails.append(email.model_dump_json())
+        summaries = summarize_emails([email.Text for email in input_data.emails])
+        summarized_emails = [
+            email.model_copy(update={"Text": summary})
+            for email, summary in zip(input_data.emails, summaries)
+        ]
 
         return EmailSummaryOutputParams(emails=summarized_emails)
@@ -1,9 +1,9 @@
-import aiohttp
 from pydantic import BaseModel
 
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.exception import ActionException
 from agnia_smart_digest.action.registry import register_action
+from agnia_smart_digest.external_services.http import http_client
 from agnia_smart_digest.utils.logger import Logger
 
 logger = Logger("teamflame-action")
@@ -23,9 +23,7 @@ class TeamFlameOutputParams(BaseModel):
     teamflame_tasks: list[str]
 
 
-def tasks_message(raw_data: dict) -> tuple[str, dict]:
-    output = TeamFlameOutputParams.model_validate(raw_data)
-
+def tasks_message(output: TeamFlameOutputParams) -> tuple[str, TeamFlameOutputParams]:
     n = len(output.teamflame_tasks)
     word = "task"
     if n > 1:
@@ -41,7 +39,7 @@ def tasks_message(raw_data: dict) -> tuple[str, dict]:
             + "\n"
         )
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
@@ -66,12 +64,11 @@ class TeamflameAcrion(Action[TeamFlameInputParams, TeamFlameOutputParams]):
         #### LOGIN
         url = f"{AUTH_BASE_URL}/auth/sign-in"
         body = {"email": EMAIL_ADDRESS, "password": PASSWORD}
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, json=body) as response:
-                if response.status == 200:
-                    tokens = (await response.json())["tokens"]
-                else:
-                    raise ActionException("Error loggin in to teamflame!")
+        async with http_client.session.post(url, json=body) as response:
+            if response.status == 200:
+                tokens = (await response.json())["tokens"]
+            else:
+                raise ActionException("Error loggin in to teamflame!")
 
         #### Fetch data
         tasks_info = []
@@ -81,12 +78,11 @@ class TeamflameAcrion(Action[TeamFlameInputParams, TeamFlameOutputParams]):
             "Authorization": f"Bearer {tokens['accessToken']['token']}",
             "X-Api-Version": "1",
         }
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status == 200:
-                    tasks_info = await response.json()
-                else:
-                    raise ActionException("Failed to get tasks")
+        async with http_client.session.get(url, headers=headers) as response:
+            if response.status == 200:
+                tasks_info = await response.json()
+            else:
+                raise ActionException("Failed to get tasks")
         ####
 
         tasks_data = []
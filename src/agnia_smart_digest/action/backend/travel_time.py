@@ -1,11 +1,11 @@
 import json
 from datetime import datetime
 
-import aiohttp
 from pydantic import BaseModel
 
 from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.registry import register_action
+from agnia_smart_digest.external_services.http import http_client
 from agnia_smart_digest.utils.logger import Logger
 
 logger = Logger("travel-time-action")
@@ -21,16 +21,16 @@ async def get_coordinates(place, api_key):
     params = {
         "query": place,
     }
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers, params=params) as response:
-            data = await response.json()
-            if "features" in data and len(data["features"]) > 0:
-                place_info = data["features"][0]
-                address = place_info["properties"]["label"]
-                longitude, latitude = place_info["geometry"]["coordinates"]
-                return address, longitude, latitude
-            else:
-                raise ValueError(f"Could not get coordinates for {place}")
+    session = http_client.session
+    async with session.get(url, headers=headers, params=params) as response:
+        data = await response.json()
+        if "features" in data and len(data["features"]) > 0:
+            place_info = data["features"][0]
+            address = place_info["properties"]["label"]
+            longitude, latitude = place_info["geometry"]["coordinates"]
+            return address, longitude, latitude
+        else:
+            raise ValueError(f"Could not get coordinates for {place}")
 
 
 async def get_corridinates_of_start_dest(src, dst, api_key):
@@ -85,10 +85,10 @@ async def get_travel_time(api_key, start_coords, end_coords, departure_time):
     payload_json = json.dumps(payload)
 
     # Send POST request
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, data=payload_json, headers=headers) as response:
-            data = await response.json()
-            return data
+    session = http_client.session
+    async with session.post(url, data=payload_json, headers=headers) as response:
+        data = await response.json()
+        return data
 
 
 class TravelTimeActionInputParams(BaseModel):
@@ -102,9 +102,9 @@ class TravelTimeActionOutputParams(BaseModel):
     distance: int
 
 
-def travel_time_message(raw_data: dict) -> tuple[str, dict]:
-    output = TravelTimeActionOutputParams.model_validate(raw_data)
-
+def travel_time_message(
+    output: TravelTimeActionOutputParams,
+) -> tuple[str, TravelTimeActionOutputParams]:
     formatted_message = "<i>Calculated time ✅</i>\n"
 
     word = "minute"
@@ -114,7 +114,7 @@ def travel_time_message(raw_data: dict) -> tuple[str, dict]:
     formatted_message += f"⏰ Travel time: {output.travel_time} {word}\n"
     formatted_message += f"🗺️ Distance: {output.distance} km\n"
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
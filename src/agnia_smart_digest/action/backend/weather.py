@@ -25,9 +25,7 @@ class WeatherOutputParams(BaseModel):
     evening_icon: str
 
 
-def weather_message(raw_data: dict) -> tuple[str, dict]:
-    output = WeatherOutputParams.model_validate(raw_data)
-
+def weather_message(output: WeatherOutputParams) -> tuple[str, WeatherOutputParams]:
     formatted_message = (
         "<i>Fetched today's weather ✅</i>\n"
         f"🌆 Morning - {output.morning_icon} {output.morning_temperature}°C\n"
@@ -35,7 +33,7 @@ def weather_message(raw_data: dict) -> tuple[str, dict]:
         f"🌃 Evening - {output.evening_icon} {output.evening_temperature}°C"
     )
 
-    return formatted_message, output.model_dump()
+    return formatted_message, output
 
 
 @register_action(
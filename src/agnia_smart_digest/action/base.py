@@ -3,14 +3,51 @@ from typing import Generic, TypeVar
 
 from pydantic import BaseModel
 
+from agnia_smart_digest.action.executor import action_executors
+
 TInput = TypeVar("TInput", bound=BaseModel)
 TOutput = TypeVar("TOutput", bound=BaseModel)
 
 
 class Action(ABC, Generic[TInput, TOutput]):
+    # blocking actions are run by the router on their own thread pool
+    blocking: bool = False
+    max_workers: int = 1
+    # concurrent identical invocations share one execution unless disabled
+    coalesce: bool = True
+
     def __init__(self, action_name: str):
         self.action_name = action_name
 
     @abstractmethod
     async def execute(self, input_data: TInput) -> TOutput:
         pass
+
+    # lifecycle hooks, run by the registry at startup and shutdown
+    async def setup(self) -> None:
+        """Load heavy state (models, clients, drivers) the action needs."""
+
+    async def warmup(self) -> None:
+        """Exercise the loaded state once so the first request is not cold."""
+
+    async def teardown(self) -> None:
+        """Release what `setup` acquired."""
+
+
+class BlockingAction(Action[TInput, TOutput]):
+    """Action built on synchronous I/O (selenium, newsapi, ...).
+
+    Subclasses implement `execute_blocking`, which runs on a thread pool of
+    `max_workers` threads dedicated to the action, so the event loop is never
+    held by it.
+    """
+
+    blocking = True
+    max_workers = 4
+
+    async def execute(self, input_data: TInput) -> TOutput:
+        return await action_executors.run(self, input_data)
+
+    @abstractmethod
+    def execute_blocking(self, input_data: TInput) -> TOutput:
+        pass
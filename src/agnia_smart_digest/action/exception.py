@@ -8,3 +8,7 @@ class SystemNotFoundException(Exception):
 
 class ActionNotFoundException(Exception):
     pass
+
+
+class ActionNotReadyException(Exception):
+    pass
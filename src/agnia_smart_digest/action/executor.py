@@ -0,0 +1,34 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from agnia_smart_digest.utils.logger import Logger
+
+logger = Logger("action-executor")
+
+
+class ActionExecutors:
+    def __init__(self):
+        self._executors: dict[str, ThreadPoolExecutor] = {}
+
+    def get(self, action_name: str, max_workers: int) -> ThreadPoolExecutor:
+        if action_name not in self._executors:
+            logger.debug(f"creating executor for {action_name} ({max_workers=})")
+            self._executors[action_name] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=action_name
+            )
+        return self._executors[action_name]
+
+    async def run(self, action: Any, input_data: Any) -> Any:
+        executor = self.get(action.action_name, action.max_workers)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, action.execute_blocking, input_data)
+
+    def shutdown(self) -> None:
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._executors.clear()
+
+
+# Create a global executors registry
+action_executors = ActionExecutors()
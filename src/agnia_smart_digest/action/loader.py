@@ -0,0 +1,181 @@
+"""Registers the actions listed in `config.yml:load_actions`.
+
+With lazy loading on, an action module that has schema files in
+`schemas_dir` is not imported at startup: its actions are registered from
+the schema files and the module is imported on first use or by the
+background warm-up. Modules without schema files are imported right away.
+Schema files are written by `agnia-smart-digest dump-schemas`, which the
+build runs.
+
+Each schema file records a hash of the sources it was generated from: the
+action module and the project modules it imports, directly or not. A
+module whose files do not match the current sources is imported right
+away, so stale schemas are never registered.
+"""
+
+import hashlib
+import importlib
+import json
+import re
+from collections import defaultdict
+from functools import cache
+from pathlib import Path
+
+from agnia_smart_digest.action.registry import action_registry
+from agnia_smart_digest.utils.logger import Logger
+
+logger = Logger("action-loader")
+
+PACKAGE = "agnia_smart_digest"
+# import statements; a match in a string only adds a dependency
+IMPORT = re.compile(
+    r"^[ \t]*(?:import[ \t]+(?P<modules>[\w., \t]+)"
+    r"|from[ \t]+(?P<base>\.*[\w.]*)[ \t]+import[ \t]+(?P<names>\([^)]*\)|[^\n#]+))",
+    re.MULTILINE,
+)
+
+
+def _module_path(module: str) -> Path | None:
+    # resolved from the package directory, importing nothing
+    root = Path(__file__).resolve().parents[1]
+    parts = module.split(".")
+    if parts[0] != PACKAGE:
+        return None
+    base = root.joinpath(*parts[1:])
+    for path in (base.with_suffix(".py"), base / "__init__.py"):
+        if path.is_file():
+            return path
+    return None
+
+
+def _imported_modules(source: str, module: str, is_package: bool) -> set[str]:
+    package = module if is_package else module.rpartition(".")[0]
+    imported = set()
+    for match in IMPORT.finditer(source):
+        if match["modules"] is not None:
+            imported.update(
+                name.split()[0] for name in match["modules"].split(",") if name.strip()
+            )
+            continue
+        base = match["base"].lstrip(".")
+        level = len(match["base"]) - len(base)
+        if level:
+            parent = package.rsplit(".", level - 1)[0]
+            base = f"{parent}.{base}" if base else parent
+        imported.add(base)
+        # `from package import module`
+        for name in match["names"].strip("()").split(","):
+            if name.strip():
+                imported.add(f"{base}.{name.split()[0]}")
+    return {name for name in imported if name.split(".")[0] == PACKAGE}
+
+
+@cache
+def _file_digest(module: str) -> tuple[bytes, frozenset[str]] | None:
+    # digest of the module's source and the project modules it imports;
+    # the action modules share most of these, each is read once
+    path = _module_path(module)
+    if path is None:
+        return None
+    source = path.read_bytes()
+    imported = _imported_modules(
+        source.decode(), module, is_package=path.name == "__init__.py"
+    )
+    return hashlib.sha256(source).digest(), frozenset(imported)
+
+
+def source_hash(module: str) -> str | None:
+    """SHA-256 of `module` and the project modules it imports, transitively.
+
+    None if the module's source cannot be found.
+    """
+    if _file_digest(module) is None:
+        return None
+
+    digests = {}
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        if name in digests:
+            continue
+        entry = _file_digest(name)
+        # None for a name imported from a module rather than a module
+        digests[name] = entry[0] if entry is not None else b""
+        if entry is not None:
+            pending.extend(entry[1])
+
+    digest = hashlib.sha256()
+    for name in sorted(digests):
+        if digests[name]:
+            digest.update(name.encode() + b"\0" + digests[name])
+    return digest.hexdigest()
+
+
+def read_action_metadata(schemas_dir: str) -> dict[str, list[dict]]:
+    """Schema files in `schemas_dir`, grouped by the module implementing them."""
+    metadata = defaultdict(list)
+    for path in sorted(Path(schemas_dir).glob("*/*.json")):
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        metadata[entry["module"]].append(entry)
+    return metadata
+
+
+def load_actions(modules: list[str], schemas_dir: str, lazy: bool) -> None:
+    metadata = read_action_metadata(schemas_dir) if lazy else {}
+
+    for module in modules:
+        entries = metadata.get(module)
+        if entries:
+            current = source_hash(module)
+            if current is None or any(
+                entry.get("source_hash") != current for entry in entries
+            ):
+                logger.warning(
+                    f"schemas of {module} are out of date, importing it; "
+                    "run `agnia-smart-digest dump-schemas`"
+                )
+                del metadata[module]
+                entries = None
+        if not entries:
+            importlib.import_module(module)
+            continue
+
+        for entry in entries:
+            action_registry.register_lazy_action(entry)
+
+    logger.info(
+        f"loaded {len(modules)} action modules, "
+        f"{sum(module in metadata for module in modules)} of them lazily"
+    )
+
+
+def dump_schemas(modules: list[str], schemas_dir: str) -> list[Path]:
+    """Import every action module and write one schema file per action."""
+    for module in modules:
+        importlib.import_module(module)
+
+    paths = []
+    hashes: dict[str, str | None] = {}
+    for spec in action_registry.get_action_specs():
+        module = spec.action_obj.__module__
+        if module not in hashes:
+            hashes[module] = source_hash(module)
+        entry = {
+            "module": module,
+            "source_hash": hashes[module],
+            **action_registry.get_action_schema(spec.system_name, spec.action_name),
+        }
+        path = Path(schemas_dir) / spec.system_name / f"{spec.action_name}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(
+            json.dumps(entry, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+        )
+        paths.append(path)
+
+    # actions that were removed or renamed
+    for path in Path(schemas_dir).glob("*/*.json"):
+        if path not in paths:
+            path.unlink()
+
+    logger.info(f"wrote {len(paths)} action schemas to {schemas_dir}")
+    return paths
@@ -1,22 +1,109 @@
+import asyncio
+import importlib
+import inspect
 import json
+import threading
+import typing
 from collections.abc import Callable
+from dataclasses import dataclass, field
 from typing import Any
 
-import aiohttp
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
+from agnia_smart_digest.action.base import Action
 from agnia_smart_digest.action.exception import (
     ActionNotFoundException,
+    ActionNotReadyException,
     SystemNotFoundException,
 )
+from agnia_smart_digest.external_services.http import http_client
 from agnia_smart_digest.utils.logger import Logger
 
 logger = Logger("action-registry")
 
 
+@dataclass(slots=True)
+class ActionSpec:
+    """Everything the router needs to run one registered action."""
+
+    system_name: str
+    action_name: str
+    action_obj: Any
+    input_type: type[BaseModel]
+    output_type: type[BaseModel]
+    input_adapter: TypeAdapter
+    result_message_func: Callable | None
+    coalesce: bool
+    # registered -> starting -> ready | failed
+    status: str = "registered"
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    _instance: Any = None
+
+    @property
+    def is_class(self) -> bool:
+        return isinstance(self.action_obj, type) and issubclass(self.action_obj, Action)
+
+    @property
+    def instance(self) -> Action | None:
+        # class actions are instantiated once and reused by every request
+        if self._instance is None and self.is_class:
+            self._instance = self.action_obj()
+        return self._instance
+
+    async def start(self) -> None:
+        """Run the action's `setup` and `warmup` hooks once.
+
+        Concurrent callers wait for the first one to finish. A failed setup
+        is logged and reported through `status`, it does not stop startup.
+        """
+        if self.status != "registered":
+            await self.ready.wait()
+            return
+
+        self.status = "starting"
+        try:
+            action = self.instance
+            if action is not None:
+                # the traceback is logged below, with constructor errors
+                with logger.activity(
+                    f"starting-{self.action_name}", with_traceback=False
+                ):
+                    await action.setup()
+                    await action.warmup()
+            self.status = "ready"
+        except Exception:
+            logger.exception(f"action {self.action_name} failed to start")
+            self.status = "failed"
+        finally:
+            self.ready.set()
+
+    async def ensure_ready(self) -> None:
+        if not self.ready.is_set():
+            await self.start()
+        if self.status == "failed":
+            raise ActionNotReadyException(
+                f"Action '{self.action_name}' for system '{self.system_name}'"
+                " failed to start"
+            )
+
+    async def stop(self) -> None:
+        if self._instance is None or self.status == "registered":
+            return
+
+        await self.ready.wait()
+        with logger.activity(f"stopping-{self.action_name}", capture=True):
+            await self._instance.teardown()
+        self.status = "registered"
+        self.ready.clear()
+
+
 class ActionRegistry:
     def __init__(self):
-        self._actions = {}
+        self._actions: dict[str, dict[str, ActionSpec]] = {}
+        # (system_name, action_name) -> metadata of actions not imported yet
+        self._lazy: dict[tuple[str, str], dict] = {}
+        # modules may be imported from a worker thread while the loop reads
+        self._lock = threading.Lock()
 
     def register_action(
         self,
@@ -28,27 +115,90 @@ class ActionRegistry:
         result_message_func: Callable | None = None,
     ):
         logger.debug(f"registering action: {action_name} for system: {system_name}")
-        if system_name not in self._actions:
-            logger.debug(f"creating new system: {system_name}")
-            self._actions[system_name] = {}
 
         logger.debug(
             f"{system_name}/{action_name} is "
             f"{action_obj.__name__}({input_type.__name__}) -> {output_type.__name__}"
         )
 
-        self._actions[system_name][action_name] = {
-            "object": action_obj,
-            "input_type": input_type,
-            "output_type": output_type,
-            "result_message_func": result_message_func,
-        }
+        spec = ActionSpec(
+            system_name=system_name,
+            action_name=action_name,
+            action_obj=action_obj,
+            input_type=input_type,
+            output_type=output_type,
+            input_adapter=TypeAdapter(input_type),
+            result_message_func=adapt_result_message_former(result_message_func),
+            coalesce=getattr(action_obj, "coalesce", True),
+        )
+        with self._lock:
+            if system_name not in self._actions:
+                logger.debug(f"creating new system: {system_name}")
+                self._actions[system_name] = {}
+            self._actions[system_name][action_name] = spec
+            self._lazy.pop((system_name, action_name), None)
+
+    def register_lazy_action(self, metadata: dict) -> None:
+        """Register an action from its schema file without importing it.
+
+        `metadata` is the action schema plus the `module` that implements it,
+        as written by `dump-schemas`. The module is imported on the first
+        call of the action or by `load_lazy_actions`.
+        """
+        key = (metadata["system_name"], metadata["action_name"])
+        logger.debug(f"registering lazy action: {key[1]} from {metadata['module']}")
+        with self._lock:
+            if key[0] not in self._actions or key[1] not in self._actions[key[0]]:
+                self._lazy[key] = metadata
+
+    async def load_lazy_actions(self) -> None:
+        # imports run one at a time in a worker thread, off the event loop
+        with self._lock:
+            modules = list(dict.fromkeys(m["module"] for m in self._lazy.values()))
+        for module in modules:
+            with logger.activity(f"importing-{module}", capture=True):
+                await asyncio.to_thread(importlib.import_module, module)
+
+    async def load_action_spec(self, system_name: str, action_name: str) -> ActionSpec:
+        metadata = self._lazy.get((system_name, action_name))
+        if metadata is not None:
+            with logger.activity(f"importing-{metadata['module']}"):
+                await asyncio.to_thread(importlib.import_module, metadata["module"])
+        return self.get_action_spec(system_name, action_name)
+
+    def get_action_specs(self) -> list[ActionSpec]:
+        with self._lock:
+            return [
+                spec for actions in self._actions.values() for spec in actions.values()
+            ]
+
+    async def start_actions(self) -> None:
+        await asyncio.gather(*(spec.start() for spec in self.get_action_specs()))
+
+    async def stop_actions(self) -> None:
+        await asyncio.gather(*(spec.stop() for spec in self.get_action_specs()))
+
+    def get_readiness(self) -> dict[str, dict[str, str]]:
+        readiness: dict[str, dict[str, str]] = {}
+        with self._lock:
+            for system_name, action_name in self._lazy:
+                readiness.setdefault(system_name, {})[action_name] = "not-imported"
+            for system_name, actions in self._actions.items():
+                for action_name, spec in actions.items():
+                    readiness.setdefault(system_name, {})[action_name] = spec.status
+        return readiness
+
+    def get_action_spec(self, system_name: str, action_name: str) -> ActionSpec:
+        metadata = self._lazy.get((system_name, action_name))
+        if metadata is not None:
+            importlib.import_module(metadata["module"])
 
-    def get_action_object(self, system_name: str, action_name: str) -> Any:
         try:
-            return self._actions[system_name][action_name]["object"]
+            return self._actions[system_name][action_name]
         except KeyError as e:
-            if system_name not in self._actions:
+            if system_name not in self._actions and not any(
+                key[0] == system_name for key in self._lazy
+            ):
                 raise SystemNotFoundException(
                     f"System '{system_name}' not found"
                 ) from e
@@ -56,41 +206,17 @@ class ActionRegistry:
                 f"Action '{action_name}' not found for system '{system_name}'"
             ) from e
 
+    def get_action_object(self, system_name: str, action_name: str) -> Any:
+        return self.get_action_spec(system_name, action_name).action_obj
+
     def get_input_type(self, system_name: str, action_name: str) -> type[BaseModel]:
-        try:
-            return self._actions[system_name][action_name]["input_type"]
-        except KeyError as e:
-            if system_name not in self._actions:
-                raise SystemNotFoundException(
-                    f"System '{system_name}' not found"
-                ) from e
-            raise ActionNotFoundException(
-                f"Action '{action_name}' not found for system '{system_name}'"
-            ) from e
+        return self.get_action_spec(system_name, action_name).input_type
 
     def get_output_type(self, system_name: str, action_name: str) -> type[BaseModel]:
-        try:
-            return self._actions[system_name][action_name]["output_type"]
-        except KeyError as e:
-            if system_name not in self._actions:
-                raise SystemNotFoundException(
-                    f"System '{system_name}' not found"
-                ) from e
-            raise ActionNotFoundException(
-                f"Action '{action_name}' not found for system '{system_name}'"
-            ) from e
+        return self.get_action_spec(system_name, action_name).output_type
 
     def get_result_message_former(self, system_name: str, action_name: str) -> Callable:
-        try:
-            return self._actions[system_name][action_name]["result_message_func"]
-        except KeyError as e:
-            if system_name not in self._actions:
-                raise SystemNotFoundException(
-                    f"System '{system_name}' not found"
-                ) from e
-            raise ActionNotFoundException(
-                f"Action '{action_name}' not found for system '{system_name}'"
-            ) from e
+        return self.get_action_spec(system_name, action_name).result_message_func
 
     def get_parameters(self, param_cls):
         schema = param_cls.model_json_schema()
@@ -99,10 +225,10 @@ class ActionRegistry:
             params[name]["description"] = params[name].pop("title", "")
             params[name]["required"] = name in schema["required"]
 
-            if params[name]["type"] == "array" and "$ref" in params[name]["items"]:
-                params[name]["items"] = self.get_parameters(
-                    param_cls.get_field_info(name)["type"]
-                )
+            if params[name].get("type") == "array" and "$ref" in params[name]["items"]:
+                # list[SomeModel] -> describe the nested model's fields
+                (item_cls,) = typing.get_args(param_cls.model_fields[name].annotation)
+                params[name]["items"] = self.get_parameters(item_cls)
         return params
 
     def get_input_parameters_schema(self, system_name: str, action_name: str) -> dict:
@@ -124,24 +250,59 @@ class ActionRegistry:
             ),
         }
 
-    async def register_actions(self, url, token):
-        async with aiohttp.ClientSession() as session:
-            _ = session
-            data = []
+    def get_action_schemas(self) -> list[dict]:
+        with self._lock:
+            loaded = [
+                (system_name, action_name)
+                for system_name, actions in self._actions.items()
+                for action_name in actions
+            ]
+            lazy = list(self._lazy.values())
 
-            for system_name, actions in self._actions.items():
-                for action_name in actions:
-                    data.append(self.get_action_schema(system_name, action_name))
+        data = [self.get_action_schema(*key) for key in loaded]
+        # lazy actions publish the schema they were registered with
+        for metadata in lazy:
+            data.append({k: v for k, v in metadata.items() if k != "module"})
+        return data
+
+    async def register_actions(self, url, token, data: list[dict] | None = None):
+        if data is None:
+            data = self.get_action_schemas()
+
+        logger.info(f"registering actions data {json.dumps(data)}")
+
+        async with http_client.session.post(
+            url, json=data, headers={"Authorization": f"Bearer {token}"}
+        ) as response:
+            if response.status // 100 != 2:
+                logger.error(f"failed to register actions: {await response.text()}")
+                return False
+
+        logger.info("successfully registered actions")
+        return True
+
+
+def adapt_result_message_former(func: Callable | None) -> Callable | None:
+    """Result formers take the typed output model of their action.
+
+    Formers still written against the dumped dict (`def x(data: dict)`) are
+    wrapped so they receive `output.model_dump(mode="json")` as before.
+    """
+    if func is None:
+        return None
+
+    params = list(inspect.signature(func).parameters)
+    if not params:
+        return func
 
-            logger.info(f"registering actions data {json.dumps(data)}")
+    annotation = typing.get_type_hints(func).get(params[0])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return func
 
-            async with session.post(
-                url, json=data, headers={"Authorization": f"Bearer {token}"}
-            ) as response:
-                if response.status // 100 != 2:
-                    logger.error(f"failed to register actions: {response.text}")
+    def former(output: BaseModel) -> tuple:
+        return func(output.model_dump(mode="json"))
 
-            logger.info("successfully registered actions")
+    return former
 
 
 # Create a global action registry
@@ -1,7 +1,6 @@
 import json
 
-import aiohttp
-
+from agnia_smart_digest.external_services.http import http_client
 from agnia_smart_digest.settings import endpoints_settings, team_auth_settings
 
 
@@ -10,10 +9,9 @@ class Embedder:
         self.url: str = endpoints_settings.embedder_endpoint
 
     async def get_response(self, json_data) -> list:
-        async with aiohttp.ClientSession() as session:
-            json_data["team_id"] = team_auth_settings.team_id
-            async with session.post(self.url, json=json_data) as response:
-                text = await response.text()
-                data = json.loads(text)
+        json_data["team_id"] = team_auth_settings.team_id
+        async with http_client.session.post(self.url, json=json_data) as response:
+            text = await response.text()
+            data = json.loads(text)
 
-                return data
+            return data
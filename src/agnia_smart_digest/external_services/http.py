@@ -0,0 +1,55 @@
+import aiohttp
+
+from agnia_smart_digest.settings import http_settings
+
+
+class HttpClient:
+    """Process-wide aiohttp session with a keep-alive connection pool.
+
+    The FastAPI lifespan starts and closes it; the session is also created on
+    first use, so code running before the lifespan still shares the pool.
+    """
+
+    def __init__(self):
+        self._session: aiohttp.ClientSession | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=http_settings.pool_limit,
+                limit_per_host=http_settings.pool_limit_per_host,
+                keepalive_timeout=http_settings.keepalive_timeout,
+                ttl_dns_cache=http_settings.dns_cache_ttl,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=self.timeout
+            )
+        return self._session
+
+    @property
+    def timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=http_settings.total_timeout,
+            connect=http_settings.connect_timeout,
+        )
+
+    def scoped_session(self, **kwargs) -> aiohttp.ClientSession:
+        # a session with its own defaults (headers, ...) on top of the shared pool
+        return aiohttp.ClientSession(
+            connector=self.session.connector,
+            connector_owner=False,
+            timeout=self.timeout,
+            **kwargs,
+        )
+
+    async def start(self) -> None:
+        _ = self.session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+http_client = HttpClient()
@@ -1,16 +1,170 @@
-import aiohttp
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
 
-from agnia_smart_digest.settings import endpoints_settings, team_auth_settings
+from agnia_smart_digest.external_services.http import http_client
+from agnia_smart_digest.settings import (
+    endpoints_settings,
+    llm_cache_settings,
+    team_auth_settings,
+)
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+metrics = metrics_registry.get("llm-cache")
+
+
+class LLMCache:
+    """Answers of the LLM keyed by prompt, stop and max_tokens.
+
+    An in-memory LRU with TTL sits in front of a SQLite file, so answers
+    survive restarts. The file keeps at most about `max_rows` answers:
+    expired and oldest rows are deleted when it is opened and after every
+    tenth of `max_rows` inserts. Disk access runs in a worker thread.
+    """
+
+    def __init__(self, path: str, max_entries: int, max_rows: int, ttl: float):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self.ttl = ttl
+
+        self._memory: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_lock = threading.Lock()
+        self._inserts = 0
+
+    @staticmethod
+    def key(json_data: dict) -> str:
+        payload = json.dumps(
+            {
+                "prompt": json_data.get("prompt"),
+                "stop": json_data.get("stop"),
+                "max_tokens": json_data.get("max_tokens"),
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str):
+        entry = self._memory.get(key)
+        if entry is not None:
+            created_at, value = entry
+            if time.time() - created_at < self.ttl:
+                self._memory.move_to_end(key)
+                metrics.inc("hits")
+                metrics.inc("memory_hits")
+                return json.loads(value)
+
+            del self._memory[key]
+            metrics.inc("evictions")
+
+        entry = await asyncio.to_thread(self._disk_get, key)
+        if entry is None:
+            metrics.inc("misses")
+            return None
+
+        self._remember(key, *entry)
+        metrics.inc("hits")
+        metrics.inc("disk_hits")
+        return json.loads(entry[1])
+
+    async def set(self, key: str, answer) -> None:
+        created_at, value = time.time(), json.dumps(answer)
+        self._remember(key, created_at, value)
+        await asyncio.to_thread(self._disk_set, key, created_at, value)
+
+    def _remember(self, key: str, created_at: float, value: str) -> None:
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            metrics.inc("evictions")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS answers "
+                "(key TEXT PRIMARY KEY, created_at REAL, value TEXT)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS answers_created_at ON answers (created_at)"
+            )
+            self._prune(self._db)
+        return self._db
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        expired = db.execute(
+            "DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl,)
+        ).rowcount
+        oldest = db.execute(
+            "DELETE FROM answers WHERE key IN (SELECT key FROM answers "
+            "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,),
+        ).rowcount
+        db.commit()
+        metrics.inc("evictions", expired + oldest)
+        self._inserts = 0
+
+    def _disk_get(self, key: str) -> tuple[float, str] | None:
+        with self._db_lock:
+            row = (
+                self._connect()
+                .execute("SELECT created_at, value FROM answers WHERE key = ?", (key,))
+                .fetchone()
+            )
+        if row is None or time.time() - row[0] >= self.ttl:
+            return None
+        return row
+
+    def _disk_set(self, key: str, created_at: float, value: str) -> None:
+        with self._db_lock:
+            db = self._connect()
+            db.execute(
+                "INSERT OR REPLACE INTO answers VALUES (?, ?, ?)",
+                (key, created_at, value),
+            )
+            db.commit()
+
+            # pruning scans the index, so it runs in batches
+            self._inserts += 1
+            if self._inserts >= max(self.max_rows // 10, 1):
+                self._prune(db)
+
+
+llm_cache = LLMCache(
+    llm_cache_settings.llm_cache_path,
+    llm_cache_settings.llm_cache_max_entries,
+    llm_cache_settings.llm_cache_max_rows,
+    llm_cache_settings.llm_cache_ttl,
+)
 
 
 class LLM:
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.url: str = endpoints_settings.llm_endpoint
+        self.use_cache = use_cache and llm_cache_settings.llm_cache_enabled
 
     async def get_response(self, json_data) -> str:
-        async with aiohttp.ClientSession() as session:
-            json_data["team_id"] = team_auth_settings.team_id
-            async with session.post(self.url, json=json_data) as response:
-                if response.status != 200:
-                    raise Exception(f"Error: {response.status}")
-                return await response.json()
+        if not self.use_cache:
+            return await self.request(json_data)
+
+        key = llm_cache.key(json_data)
+        answer = await llm_cache.get(key)
+        if answer is None:
+            answer = await self.request(json_data)
+            await llm_cache.set(key, answer)
+        return answer
+
+    async def request(self, json_data) -> str:
+        json_data["team_id"] = team_auth_settings.team_id
+        async with http_client.session.post(self.url, json=json_data) as response:
+            if response.status != 200:
+                raise Exception(f"Error: {response.status}")
+            return await response.json()
@@ -1,45 +1,106 @@
+import hashlib
 import json
+import time
 
-from agnia_smart_digest.action.base import Action
-from agnia_smart_digest.action.registry import action_registry
+import psutil
+from pydantic import BaseModel
+
+from agnia_smart_digest.action.executor import action_executors
+from agnia_smart_digest.action.registry import ActionSpec, action_registry
+from agnia_smart_digest.utils.metrics import metrics_registry
+from agnia_smart_digest.utils.singleflight import SingleFlight
+
+metrics = metrics_registry.get("router")
+startup_metrics = metrics_registry.get("startup")
+single_flight = SingleFlight()
+
+
+async def load_action(system_name: str, action_name: str) -> ActionSpec:
+    # lazily registered actions import their module here on first call
+    return await action_registry.load_action_spec(system_name, action_name)
 
 
 async def execute_action(
-    system_name: str,
-    action_name: str,
+    spec: ActionSpec,
     input_data: dict,
     authorizations_data: dict | None = None,
-) -> dict:
-    action_obj = action_registry.get_action_object(system_name, action_name)
-    input_type = action_registry.get_input_type(system_name, action_name)
-
+) -> BaseModel:
     # Convert input_data to a format suitable for the action
-    input_params = input_type(**input_data)
-    if isinstance(action_obj, type) and issubclass(action_obj, Action):
-        # Instantiate and execute the action if it's a class
-        action = action_obj()  # type: ignore
-        output = await action.execute(input_params)
-    else:
-        # Execute the action directly if it's a function
-        output = action_obj(authorizations_data, input_params)
-
-    output_json = json.loads(output.json())
-    return output_json
-
-
-def form_result_message(
-    system_name: str, action_name: str, execution_result: dict | None
-) -> dict:
+    input_params = spec.input_adapter.validate_python(input_data)
+
+    async def run() -> BaseModel:
+        return await run_action(spec, input_params, authorizations_data)
+
+    # side-effecting actions opt out, every call of theirs must run
+    if not spec.coalesce:
+        metrics.inc("executed")
+        output = await run()
+        record_first_request()
+        return output
+
+    key = invocation_key(
+        spec.system_name, spec.action_name, input_params, authorizations_data
+    )
+    output, shared = await single_flight.do(key, run)
+    metrics.inc("coalesced" if shared else "executed")
+    record_first_request()
+    return output
+
+
+def record_first_request() -> None:
+    if startup_metrics.get("first_request_s"):
+        return
+
+    process = psutil.Process()
+    startup_metrics.set("first_request_s", time.time() - process.create_time())
+    startup_metrics.set("first_request_rss_mb", process.memory_info().rss / 2**20)
+
+
+def invocation_key(
+    system_name: str,
+    action_name: str,
+    input_params: BaseModel,
+    authorizations_data: dict | None,
+) -> str:
+    payload = json.dumps(
+        [
+            system_name,
+            action_name,
+            input_params.model_dump(mode="json"),
+            authorizations_data,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def run_action(
+    spec: ActionSpec, input_params: BaseModel, authorizations_data: dict | None
+) -> BaseModel:
+    # actions not started by the lifespan yet are set up on first use
+    await spec.ensure_ready()
+
+    # the typed output is kept until the socket boundary serializes the reply
+    action = spec.instance
+    if action is not None:
+        if action.blocking:
+            return await action_executors.run(action, input_params)
+        return await action.execute(input_params)
+
+    # Execute the action directly if it's a function
+    return spec.action_obj(authorizations_data, input_params)
+
+
+def form_result_message(spec: ActionSpec, execution_result: BaseModel | None) -> dict:
     if execution_result is None:
-        message_str = f"Could not run action '{action_name}' for system '{system_name}'"
-        message_dict = {
-            "Error": f"Could not run action '{action_name}' for system '{system_name}'"
-        }
+        message_str = (
+            f"Could not run action '{spec.action_name}' for system '{spec.system_name}'"
+        )
+        message_dict = {"Error": message_str}
         return {"message_str": message_str, "message_dict": message_dict}
 
-    message_forming_func = action_registry.get_result_message_former(
-        system_name=system_name, action_name=action_name
-    )
+    message_forming_func = spec.result_message_func
     if message_forming_func is None:
         return {}
 
@@ -0,0 +1,373 @@
+from agnia_smart_digest.settings import imap_settings, team_auth_settings
+
+
+def build_plans() -> list[dict]:
+    """Plans kept registered on the hub, see `registration.register_plans`."""
+    return [
+        # {
+        #     "initial_data": {"user_request": ""},
+        #     "description": "extract platforms plan",
+        #     "actions": [
+        #         {
+        #             "action_id": 1,
+        #             "system": "General",
+        #             "action_type": "TeamAction",
+        #             "action_name": "extract_platforms_action",
+        #             "input_data": {
+        #                 "user_request": "initial_data[user_request]"
+        #             },
+        #             "depends_on": [],
+        #             "requires_visualization": True,
+        #         }
+        #     ],
+        # },
+        # {
+        #     "initial_data": {"user_request": ""},
+        #     "description": "extract format plan",
+        #     "actions": [
+        #         {
+        #             "action_id": 1,
+        #             "system": "General",
+        #             "action_type": "TeamAction",
+        #             "action_name": "extract_format_action",
+        #             "input_data": {
+        #                 "user_request": "initial_data[user_request]"
+        #             },
+        #             "depends_on": [],
+        #             "requires_visualization": True,
+        #         }
+        #     ],
+        # },
+        {
+            "initial_data": {"city": "Innopolis"},
+            "description": (
+                "weather, sunny, temperature, humidity, rain, cloud, wear, clother"
+            ),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "weather_action",
+                    "input_data": {"city": "initial_data[city]"},
+                    "depends_on": [],
+                    "requires_visualization": True,
+                }
+            ],
+        },
+        {
+            "initial_data": {
+                "user_request": "",
+                "outlook_email": team_auth_settings.outlook_email,
+                "outlook_password": team_auth_settings.outlook_password,
+                "email_candidates": imap_settings.imap_digest_candidates,
+            },
+            "description": "get, emails, list, fetch, inbox, contacts",
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "extract_email_number_action",
+                    "input_data": {
+                        "user_request": "initial_data[user_request]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 2,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "list_emails_action",
+                    "input_data": {
+                        "outlook_email": "initial_data[outlook_email]",
+                        "outlook_password": "initial_data[outlook_password]",
+                        "last_n_emails": "actions[1][extracted_email_number]",
+                        "candidates": "initial_data[email_candidates]",
+                    },
+                    "depends_on": [1],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 3,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "clean_emails_action",
+                    "input_data": {
+                        "emails": "actions[2][emails]",
+                    },
+                    "depends_on": [2],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 4,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "ranking_emails_action",
+                    "input_data": {
+                        "emails": "actions[3][emails]",
+                    },
+                    "depends_on": [3],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 5,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "summarize_emails_action",
+                    "input_data": {
+                        "emails": "actions[4][emails]",
+                    },
+                    "depends_on": [4],
+                    "requires_visualization": True,
+                },
+            ],
+        },
+        {
+            "initial_data": {
+                "teamflame_email": team_auth_settings.teamflame_email,
+                "teamflame_password": team_auth_settings.teamflame_password,
+            },
+            "description": ("tasks, cards, board, kanban, teamflame, todo, work"),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "list_teamflake_tasks_action",
+                    "input_data": {
+                        "teamflame_email": "initial_data[teamflame_email]",
+                        "teamflame_password": "initial_data[teamflame_password]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                }
+            ],
+        },
+        {
+            "initial_data": {
+                "travel_source": "Stuttgart",
+                "travel_destination": "Karlsruhe",
+                "api_key": team_auth_settings.maps_api_key,
+            },
+            "description": ("route, travel, distance, time, latency, map, gps, arrive"),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "travel_time_action",
+                    "input_data": {
+                        "travel_source": "initial_data[travel_source]",
+                        "travel_destination": "initial_data[travel_destination]",
+                        "api_key": "initial_data[api_key]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                }
+            ],
+        },
+        {
+            "initial_data": {
+                "news_api_key": team_auth_settings.news_api_key,
+                "user_request": "",
+            },
+            "description": (
+                "news, articles, newspaper, headline, world, happning, info"
+            ),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "extract_acticle_number_action",
+                    "input_data": {
+                        "user_request": "initial_data[user_request]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 2,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "news_action",
+                    "input_data": {
+                        "news_api_key": "initial_data[news_api_key]",
+                        "n_articles": "actions[1][extracted_article_number]",
+                    },
+                    "depends_on": [1],
+                    "requires_visualization": True,
+                },
+            ],
+        },
+        {
+            "initial_data": {
+                "moodle_email": team_auth_settings.moodle_email,
+                "moodle_password": team_auth_settings.moodle_password,
+            },
+            "description": (
+                "moodle, deadline, assignment, task, due, submission, course, homework"
+            ),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "moodle_action",
+                    "input_data": {
+                        "moodle_email": "initial_data[moodle_email]",
+                        "moodle_password": "initial_data[moodle_password]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+            ],
+        },
+        {
+            "initial_data": {
+                "user_request": "",
+                "outlook_email": team_auth_settings.outlook_email,
+                "outlook_password": team_auth_settings.outlook_password,
+            },
+            "description": "send, email, sent, contact, message, text, @",
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "extract_email_fields_action",
+                    "input_data": {
+                        "user_request": "initial_data[user_request]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 2,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "send_email_action",
+                    "input_data": {
+                        "outlook_email": "initial_data[outlook_email]",
+                        "outlook_password": "initial_data[outlook_password]",
+                        "email_receiver": "actions[1][extracted_receiver]",
+                        "email_subject": "actions[1][extracted_subject]",
+                        "email_content": "actions[1][extracted_text]",
+                    },
+                    "depends_on": [1],
+                    "requires_visualization": True,
+                },
+            ],
+        },
+        {
+            "initial_data": {
+                "user_request": "",
+                "reminder_datetime": "0001-01-01T00:00:00",
+                "telegram_user_id": team_auth_settings.telegram_user_id,
+            },
+            "description": (
+                "remind, reminder, schedule, note, "
+                "postpone, calendar, event, deadline, time, date"
+            ),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "extract_reminder_fields_action",
+                    "input_data": {
+                        "user_request": "initial_data[user_request]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 2,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "schedule_reminder_action",
+                    "input_data": {
+                        "reminder_text": "actions[1][reminder_text]",
+                        "reminder_datetime": "actions[1][reminder_datetime]",
+                        "telegram_user_id": "initial_data[telegram_user_id]",
+                    },
+                    "depends_on": [1],
+                    "requires_visualization": True,
+                },
+            ],
+        },
+        {
+            "initial_data": {
+                "user_request": "",
+                "outlook_email": team_auth_settings.outlook_email,
+                "outlook_password": team_auth_settings.outlook_password,
+                "n_results": 5,
+            },
+            "description": (
+                "search, find, email, retrieve, get, extract, topic, related to, about"
+            ),
+            "actions": [
+                {
+                    "action_id": 1,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "extract_search_query_action",
+                    "input_data": {
+                        "user_request": "initial_data[user_request]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 2,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "extract_email_number_action",
+                    "input_data": {
+                        "user_request": "initial_data[user_request]",
+                    },
+                    "depends_on": [],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 3,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "list_emails_action",
+                    "input_data": {
+                        "last_n_emails": "actions[2][extracted_email_number]",
+                        "outlook_email": "initial_data[outlook_email]",
+                        "outlook_password": "initial_data[outlook_password]",
+                    },
+                    "depends_on": [2],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 4,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "search_emails_action",
+                    "input_data": {
+                        "emails": "actions[3][emails]",
+                        "query_texts": "actions[1][extracted_query]",
+                        "n_results": "initial_data[n_results]",
+                    },
+                    "depends_on": [1, 2, 3],
+                    "requires_visualization": True,
+                },
+                {
+                    "action_id": 5,
+                    "system": "General",
+                    "action_type": "TeamAction",
+                    "action_name": "summarize_emails_action",
+                    "input_data": {
+                        "emails": "actions[4][emails]",
+                    },
+                    "depends_on": [4],
+                    "requires_visualization": True,
+                },
+            ],
+        },
+    ]
@@ -0,0 +1,234 @@
+"""Keeps the hub's copy of our action schemas and plans up to date.
+
+Schemas and plans are content-hashed. The hashes of what was last
+registered, with the ids of the created plans, are kept in a local state
+file, so a restart only sends what changed:
+
+* action schemas are re-posted only when their hash differs;
+* a plan whose hash is known and still exists on the hub is kept as is;
+* new or changed plans are created, and plans that are no longer defined
+  are deleted, all concurrently.
+
+The hub has no way to list our action schemas, so a hub that was reset is
+noticed through the plans: when none of the known plans exists any more,
+the schemas are posted again as well. A hub reset before any plan was
+registered needs `force_hub_registration`.
+"""
+
+import asyncio
+import hashlib
+import json
+from pathlib import Path
+
+import aiohttp
+
+from agnia_smart_digest.action.registry import action_registry
+from agnia_smart_digest.servers.http.plans import build_plans
+from agnia_smart_digest.settings import (
+    endpoints_settings,
+    registration_settings,
+    team_auth_settings,
+)
+from agnia_smart_digest.utils.helpers import strip_url
+from agnia_smart_digest.utils.logger import Logger
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+logger = Logger("hub-registration")
+lifespan_metrics = metrics_registry.get("lifespan")
+
+
+def content_hash(data) -> str:
+    payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class HubState:
+    """Hashes registered on the hub, persisted between restarts."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.actions_hash: str | None = None
+        # plan content hash -> plan_id on the hub
+        self.plans: dict[str, str] = {}
+
+    def load(self) -> "HubState":
+        if self.path.exists():
+            try:
+                data = json.loads(self.path.read_text(encoding="utf-8"))
+                self.actions_hash = data.get("actions_hash")
+                self.plans = data.get("plans", {})
+            except (OSError, ValueError) as e:
+                logger.error(f"ignoring unreadable hub state {self.path}: {e}")
+        return self
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps({"actions_hash": self.actions_hash, "plans": self.plans}),
+            encoding="utf-8",
+        )
+
+
+def api_url(*parts: str) -> str:
+    return "/".join([strip_url(endpoints_settings.api_endpoint), *parts])
+
+
+async def register_actions(state: HubState) -> None:
+    data = action_registry.get_action_schemas()
+    actions_hash = content_hash(data)
+    if (
+        actions_hash == state.actions_hash
+        and not registration_settings.force_hub_registration
+    ):
+        logger.info("action schemas unchanged, skipping registration")
+        return
+
+    with (
+        logger.activity("registering-actions"),
+        lifespan_metrics.timer("register-actions"),
+    ):
+        registered = await action_registry.register_actions(
+            api_url("register-actions"), team_auth_settings.access_token, data
+        )
+    if registered:
+        state.actions_hash = actions_hash
+
+
+async def save_initial_credentials(session: aiohttp.ClientSession) -> None:
+    with (
+        logger.activity("saving-user-credentials"),
+        lifespan_metrics.timer("save-auth"),
+    ):
+        async with session.post(
+            endpoints_settings.save_auth_endpoint,
+            json={
+                "system_name": "General",
+                "authorization_data_json": json.dumps({}),
+            },
+        ) as response:
+            response.raise_for_status()
+
+
+async def plan_exists(session: aiohttp.ClientSession, plan_id: str) -> bool:
+    """Whether the hub has the plan; raises if the hub could not tell."""
+    async with session.get(api_url("plans", plan_id)) as response:
+        if response.status == 404:
+            return False
+        # a hub error must not make a valid plan look deleted
+        response.raise_for_status()
+        return True
+
+
+async def create_new_plan(url, session, plan):
+    logger.info(f"creating plan: {json.dumps(plan)}")
+    with lifespan_metrics.timer(f"create_new_plan: {plan['description'][:40]}"):
+        response = await session.post(url, json=plan)
+        response.raise_for_status()
+        return (await response.json())["plan_id"]
+
+
+async def delete_plan(session: aiohttp.ClientSession, plan_id: str) -> None:
+    with logger.activity(f"deleting-plan-{plan_id}", capture=True):
+        async with session.delete(api_url("plans", plan_id)) as response:
+            if response.status != 404:
+                response.raise_for_status()
+
+
+async def find_plans(
+    session: aiohttp.ClientSession, state: HubState
+) -> dict[str, bool | BaseException]:
+    """Whether each known plan id exists on the hub, or why it is unknown."""
+    if registration_settings.force_hub_registration:
+        return {}
+
+    plan_ids = list(state.plans.values())
+    results = await asyncio.gather(
+        *(plan_exists(session, plan_id) for plan_id in plan_ids),
+        return_exceptions=True,
+    )
+    return dict(zip(plan_ids, results, strict=True))
+
+
+async def upsert_plan(
+    session: aiohttp.ClientSession,
+    state: HubState,
+    found: dict[str, bool | BaseException],
+    plan_hash: str,
+    plan: dict,
+) -> str:
+    plan_id = state.plans.get(plan_hash)
+    exists = found.get(plan_id, False) if plan_id is not None else False
+    if isinstance(exists, BaseException):
+        raise exists
+    if exists:
+        return plan_id
+    return await create_new_plan(api_url("plans"), session, plan)
+
+
+async def register_plans(
+    session: aiohttp.ClientSession,
+    state: HubState,
+    found: dict[str, bool | BaseException],
+) -> None:
+    plans = {content_hash(plan): plan for plan in build_plans()}
+
+    with (
+        logger.activity("registering-new-plans"),
+        lifespan_metrics.timer("register-plans"),
+    ):
+        results = await asyncio.gather(
+            *(
+                upsert_plan(session, state, found, plan_hash, plan)
+                for plan_hash, plan in plans.items()
+            ),
+            return_exceptions=True,
+        )
+
+        registered = {}
+        for (plan_hash, plan), result in zip(plans.items(), results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error(f"failed to register plan {plan['description']}: {result}")
+                # keep the old id, the plan is retried on the next start
+                if plan_hash in state.plans:
+                    registered[plan_hash] = state.plans[plan_hash]
+            else:
+                registered[plan_hash] = result
+
+        # plans that were changed or removed since the last start
+        stale = set(state.plans.values()) - set(registered.values())
+        await asyncio.gather(*(delete_plan(session, plan_id) for plan_id in stale))
+
+    failed = sum(isinstance(result, BaseException) for result in results)
+    created = len(set(registered.values()) - set(state.plans.values()))
+    logger.info(
+        f"plans: {created} created, {len(stale)} deleted, {failed} failed"
+        f" of {len(plans)}"
+    )
+    state.plans = registered
+
+
+async def register_with_hub(session: aiohttp.ClientSession) -> HubState:
+    state = HubState(registration_settings.hub_state_path).load()
+    try:
+        with logger.activity("registering-with-hub"):
+            found, _ = await asyncio.gather(
+                find_plans(session, state), save_initial_credentials(session)
+            )
+            if found and all(exists is False for exists in found.values()):
+                logger.warning("no registered plan is left on the hub, it was reset")
+                state.actions_hash = None
+
+            # plans refer to the actions, so those are registered first
+            await register_actions(state)
+            await register_plans(session, state, found)
+    finally:
+        state.save()
+    return state
+
+
+async def delete_plans(session: aiohttp.ClientSession, state: HubState) -> None:
+    await asyncio.gather(
+        *(delete_plan(session, plan_id) for plan_id in state.plans.values())
+    )
+    state.plans = {}
+    state.save()
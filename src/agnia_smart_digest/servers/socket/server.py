@@ -1,15 +1,25 @@
 import asyncio
 import json
+import random
+import time
+from collections import deque
 from enum import StrEnum
 
 import websockets
 from pydantic import BaseModel, ValidationError
-
-from agnia_smart_digest.router import execute_action, form_result_message
-from agnia_smart_digest.settings import endpoints_settings, team_auth_settings
+from pydantic_core import to_json
+
+from agnia_smart_digest.router import execute_action, form_result_message, load_action
+from agnia_smart_digest.settings import (
+    endpoints_settings,
+    socket_settings,
+    team_auth_settings,
+)
 from agnia_smart_digest.utils.logger import Logger
+from agnia_smart_digest.utils.metrics import metrics_registry
 
 logger = Logger("socket-server")
+metrics = metrics_registry.get("socket")
 
 
 class ResultStatusEnum(StrEnum):
@@ -29,21 +39,18 @@ async def handle_message(input_data: dict, data: dict) -> dict:
     error_message = None
     stats = ResultStatusEnum.SUCCESS
     execution_result = None
+    message = {}
 
     try:
         msg = MessageModel.model_validate(data)
 
         with logger.activity(f"execute-action-{msg.action_name}"):
+            spec = await load_action(msg.system_name, msg.action_name)
             execution_result = await execute_action(
-                msg.system_name,
-                msg.action_name,
-                msg.input_data,
-                msg.system_authorization_data,
+                spec, msg.input_data, msg.system_authorization_data
             )
 
-            message = form_result_message(
-                msg.system_name, msg.action_name, execution_result
-            )
+            message = form_result_message(spec, execution_result)
     except ValidationError as e:
         stats = ResultStatusEnum.FAIL
         error_message = "message validation failed"
@@ -56,7 +63,7 @@ async def handle_message(input_data: dict, data: dict) -> dict:
     response = {
         **input_data,
         **message,
-        "request_id": msg.request_id,
+        "request_id": data.get("request_id"),
         "status": stats.value,
     }
 
@@ -69,27 +76,145 @@ async def handle_message(input_data: dict, data: dict) -> dict:
     return response
 
 
-async def run():
-    endpoint = f"{endpoints_settings.socket_endpoint}/{team_auth_settings.team_id}"
-    async with websockets.connect(endpoint) as socket:
-        logger.info("started socker server")
+class SocketSession:
+    """Keeps one logical session with the hub alive across reconnects.
+
+    Actions are not tied to a connection: replies that finish while the link
+    is down stay queued and are sent once the next connection is established.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.limit = asyncio.Semaphore(socket_settings.max_in_flight_requests)
+        self.replies: asyncio.Queue[tuple[dict, bool]] = asyncio.Queue()
+        self.unsent: deque[dict] = deque()
+        self.tasks: set[asyncio.Task] = set()
+        self.connected = False
+
+    async def run_forever(self) -> None:
+        attempt = 0
+        while True:
+            connected_at = None
+            try:
+                async with websockets.connect(
+                    self.endpoint, ping_interval=None
+                ) as socket:
+                    logger.info("started socker server")
+                    if attempt:
+                        metrics.inc("reconnects")
+                    connected_at = time.monotonic()
+                    await self.serve(socket)
+            except asyncio.CancelledError:
+                logger.info("closed by task cancellation")
+                for task in self.tasks:
+                    task.cancel()
+                raise
+            except websockets.ConnectionClosedOK:
+                logger.info("closed by connection closing")
+            except Exception:
+                # reconnect whatever went wrong, the traceback tells what
+                logger.exception("unexpected error, reconnecting")
+
+            # a peer that accepts and drops right away must not reset the backoff
+            if (
+                connected_at is not None
+                and time.monotonic() - connected_at
+                >= socket_settings.reconnect_reset_after
+            ):
+                attempt = 0
+
+            delay = min(
+                socket_settings.reconnect_max_delay,
+                socket_settings.reconnect_initial_delay * 2**attempt,
+            )
+            delay = random.uniform(0, delay)
+            attempt += 1
+            logger.info(f"reconnecting in {delay:.2f}s (attempt {attempt})")
+            await asyncio.sleep(delay)
+
+    async def serve(self, socket) -> None:
+        self.connected = True
+        writer = asyncio.create_task(self.write_replies(socket))
+        pinger = asyncio.create_task(self.ping(socket))
 
         try:
-            while True:
+            await self.read_requests(socket)
+        finally:
+            self.connected = False
+            pinger.cancel()
+            writer.cancel()
+
+    async def read_requests(self, socket) -> None:
+        while True:
+            # stop reading frames until one of the running actions finishes
+            await self.limit.acquire()
+            try:
                 request_raw = await socket.recv()
-                request = json.loads(request_raw)
-
-                if "error" in request:
-                    logger.error(f"received error message: {request}")
-                    continue
-
-                response = await handle_message(request, request)
-                response_raw = json.dumps(response)
-
-                await socket.send(response_raw)
-        except websockets.ConnectionClosedOK:
-            logger.info("closed by connection closing")
-        except asyncio.CancelledError:
-            logger.info("closed by task cancellation")
-        except Exception as e:
-            logger.error(f"unexpected error: {e}")
+            except BaseException:
+                self.limit.release()
+                raise
+
+            request = json.loads(request_raw)
+
+            if "error" in request:
+                logger.error(f"received error message: {request}")
+                self.limit.release()
+                continue
+
+            task = asyncio.create_task(self.dispatch(request))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def dispatch(self, request: dict) -> None:
+        try:
+            response = await handle_message(request, request)
+        finally:
+            self.limit.release()
+
+        if not self.connected:
+            metrics.inc("buffered_replies")
+
+        await self.replies.put((response, not self.connected))
+
+    async def write_replies(self, socket) -> None:
+        # replies left over from the previous connection go out first
+        while self.unsent:
+            await self.send(socket, self.unsent[0], replayed=True)
+            self.unsent.popleft()
+
+        # replies are sent in completion order, the hub matches them by request_id
+        while True:
+            response, buffered = await self.replies.get()
+            try:
+                await self.send(socket, response, replayed=buffered)
+            except BaseException:
+                self.unsent.append(response)
+                raise
+
+    async def send(self, socket, response: dict, replayed: bool) -> None:
+        # the only place the result models are serialized
+        await socket.send(to_json(response).decode())
+        metrics.inc("sent_replies")
+        if replayed:
+            metrics.inc("replayed_replies")
+
+    async def ping(self, socket) -> None:
+        while True:
+            await asyncio.sleep(socket_settings.ping_interval)
+
+            started = time.monotonic()
+            try:
+                pong_waiter = await socket.ping()
+                await asyncio.wait_for(pong_waiter, socket_settings.ping_timeout)
+            except TimeoutError:
+                logger.error("ping timed out, dropping connection")
+                metrics.inc("ping_timeouts")
+                await socket.close()
+                return
+
+            metrics.set("ping_latency_ms", (time.monotonic() - started) * 1000)
+
+
+async def run():
+    endpoint = f"{endpoints_settings.socket_endpoint}/{team_auth_settings.team_id}"
+    await SocketSession(endpoint).run_forever()
@@ -36,5 +36,112 @@ class EnpointsSettings(BaseSettings):
     api_endpoint: str = "http://10.100.30.244:9200"
 
 
+class SocketSettings(BaseSettings):
+    # how many actions may run at once before the server stops reading frames
+    max_in_flight_requests: int = 16
+
+    # reconnect backoff, in seconds (full jitter up to the current delay)
+    reconnect_initial_delay: float = 1.0
+    reconnect_max_delay: float = 60.0
+    # a connection that stayed up this long starts the backoff over
+    reconnect_reset_after: float = 30.0
+
+    ping_interval: float = 20.0
+    ping_timeout: float = 20.0
+
+
+class HttpSettings(BaseSettings):
+    # shared aiohttp connection pool used for every outgoing request
+    pool_limit: int = 100
+    pool_limit_per_host: int = 20
+    keepalive_timeout: float = 30.0
+    dns_cache_ttl: int = 300
+
+    connect_timeout: float = 10.0
+    total_timeout: float = 120.0
+
+
+class LLMCacheSettings(BaseSettings):
+    llm_cache_enabled: bool = True
+    llm_cache_path: str = ".cache/llm.sqlite3"
+    llm_cache_max_entries: int = 1024
+    # answers kept in the SQLite file, the oldest are deleted past this
+    llm_cache_max_rows: int = 100_000
+    llm_cache_ttl: float = 7 * 24 * 60 * 60
+
+
+class ActionLoadingSettings(BaseSettings):
+    # register actions from `schemas_dir` and import their modules on demand
+    lazy_actions: bool = True
+    # import lazy modules and set up every action in the background at startup
+    actions_warmup: bool = True
+    schemas_dir: str = "schemas"
+
+
+class RegistrationSettings(BaseSettings):
+    # hashes of the schemas and plans last registered on the hub
+    hub_state_path: str = ".cache/hub-state.json"
+    # re-register everything even if the hashes match
+    force_hub_registration: bool = False
+    # plans are kept between restarts unless this is set
+    delete_plans_on_shutdown: bool = False
+
+
+class ImapSettings(BaseSettings):
+    imap_host: str = "mail.innopolis.ru"
+    imap_port: int = 993  # IMAP over SSL/TLS
+
+    # servers limit concurrent sessions, keep below their per-account cap
+    imap_max_connections: int = 2
+    # idle connections are logged out after this many seconds
+    imap_idle_timeout: float = 5 * 60
+    # seconds between sweeps that log out connections past imap_idle_timeout
+    imap_reap_interval: float = 60.0
+    # connections idle for longer than this are checked with NOOP before reuse
+    imap_noop_after: float = 30.0
+    # seconds a single IMAP command may take
+    imap_timeout: float = 30.0
+
+    # UIDs per FETCH command
+    imap_fetch_batch_size: int = 100
+    # text parts are fetched partially, longer ones are cut at these sizes
+    imap_max_part_bytes: int = 128 * 1024
+    imap_max_email_bytes: int = 256 * 1024
+
+    # filtered searches scan the mailbox tail in windows of this many messages,
+    # going at most imap_search_depth messages back
+    imap_search_window: int = 1000
+    imap_search_depth: int = 5000
+
+    # local copy of the last imap_mirror_depth emails of each account
+    imap_mirror_enabled: bool = True
+    imap_mirror_path: str = ".cache/mailbox-mirror.sqlite3"
+    imap_mirror_depth: int = 500
+
+    # emails whose headers the digest plan ranks before downloading the
+    # bodies of the requested number of them
+    imap_digest_candidates: int = 50
+
+
+class EmailAnalysisSettings(BaseSettings):
+    # texts whose normalized form and tokens are kept between actions and
+    # digests; an email takes two, its body and its cleaned text
+    email_analysis_max_entries: int = 512
+
+
+class SmtpSettings(BaseSettings):
+    smtp_host: str = "mail.innopolis.ru"
+    smtp_port: int = 587  # submission, upgraded with STARTTLS
+    smtp_timeout: float = 30.0
+
+
 team_auth_settings = TeamSettings()  # type: ignore
 endpoints_settings = EnpointsSettings()
+socket_settings = SocketSettings()
+http_settings = HttpSettings()
+llm_cache_settings = LLMCacheSettings()
+action_loading_settings = ActionLoadingSettings()
+registration_settings = RegistrationSettings()
+imap_settings = ImapSettings()
+smtp_settings = SmtpSettings()
+email_analysis_settings = EmailAnalysisSettings()
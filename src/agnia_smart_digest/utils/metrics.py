@@ -0,0 +1,48 @@
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+
+class Metrics:
+    def __init__(self, name: str):
+        self.name = name
+        self._values: dict[str, float] = defaultdict(int)
+
+    def inc(self, key: str, value: float = 1) -> None:
+        self._values[key] += value
+
+    def set(self, key: str, value: float) -> None:
+        self._values[key] = value
+
+    def get(self, key: str) -> float:
+        return self._values.get(key, 0)
+
+    @contextmanager
+    def timer(self, key: str) -> Iterator[None]:
+        # sets `key` to the wall time of the block, in seconds
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.set(key, time.perf_counter() - started)
+
+    def snapshot(self) -> dict[str, float]:
+        return dict(self._values)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metrics] = {}
+
+    def get(self, name: str) -> Metrics:
+        if name not in self._metrics:
+            self._metrics[name] = Metrics(name)
+        return self._metrics[name]
+
+    def snapshot(self) -> dict[str, dict[str, float]]:
+        return {name: metrics.snapshot() for name, metrics in self._metrics.items()}
+
+
+# Create a global metrics registry
+metrics_registry = MetricsRegistry()
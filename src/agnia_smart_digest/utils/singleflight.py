@@ -0,0 +1,33 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class SingleFlight:
+    """Shares one execution between concurrent calls with the same key.
+
+    The first caller starts the call as a task; callers arriving while it is
+    still running await the same task. Keys are forgotten as soon as the call
+    finishes, so nothing is cached beyond the concurrent window.
+    """
+
+    def __init__(self):
+        self._calls: dict[str, asyncio.Future] = {}
+
+    async def do(
+        self, key: str, func: Callable[[], Awaitable[Any]]
+    ) -> tuple[Any, bool]:
+        call = self._calls.get(key)
+        shared = call is not None
+
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._forget(key, call))
+
+        # shield so one cancelled caller does not cancel the others
+        return await asyncio.shield(call), shared
+
+    def _forget(self, key: str, call: asyncio.Future) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
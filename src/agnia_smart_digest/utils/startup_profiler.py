@@ -0,0 +1,182 @@
+"""`agnia-smart-digest profile-startup`: where startup time and memory go.
+
+Three measurements, printed as tables and written to a JSON file:
+
+* self and cumulative import time of every module and dependency, taken
+  from `python -X importtime` in a fresh interpreter;
+* wall time and RSS added by importing each action module in this process;
+* time spent in each `lifespan` step (register-actions, save-auth, every
+  `create_new_plan`), read from the `lifespan` metrics.
+"""
+
+import asyncio
+import importlib
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import psutil
+
+from agnia_smart_digest.utils.logger import Logger
+from agnia_smart_digest.utils.metrics import metrics_registry
+
+logger = Logger("startup-profiler")
+
+IMPORTTIME_PREFIX = "import time:"
+TOP_DEPENDENCIES = 25
+
+
+def profile_imports(modules: list[str]) -> list[dict]:
+    """Per-module import times of `modules` in a fresh interpreter."""
+    code = "\n".join(f"import {module}" for module in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        logger.error(f"importing action modules failed: {result.stderr[-2000:]}")
+
+    return parse_importtime(result.stderr)
+
+
+def parse_importtime(output: str) -> list[dict]:
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORTTIME_PREFIX):
+            continue
+
+        self_us, cumulative_us, name = line[len(IMPORTTIME_PREFIX) :].split("|")
+        if not self_us.strip().isdigit():
+            # the header line
+            continue
+
+        entries.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                "self_s": int(self_us) / 1e6,
+                "cumulative_s": int(cumulative_us) / 1e6,
+            }
+        )
+    return entries
+
+
+def profile_action_modules(modules: list[str]) -> list[dict]:
+    """Wall time and RSS added by importing each action module, in order."""
+    process = psutil.Process()
+    entries = []
+    for module in modules:
+        rss_before = process.memory_info().rss
+        started = time.perf_counter()
+        importlib.import_module(module)
+        entries.append(
+            {
+                "module": module,
+                "import_s": time.perf_counter() - started,
+                "rss_mb": (process.memory_info().rss - rss_before) / 2**20,
+            }
+        )
+    return entries
+
+
+async def profile_lifespan() -> dict:
+    """Run the server's startup and shutdown once and time its steps."""
+    from agnia_smart_digest.servers.http.server import build_app, lifespan
+
+    app = build_app()
+    error = None
+    ready_s = None
+    started = time.perf_counter()
+    try:
+        async with lifespan(app):
+            ready_s = time.perf_counter() - started
+            # hub registration runs in the background, its steps are timed too
+            await app.state.registering
+    except Exception as e:
+        # any startup error is part of the report, with its traceback logged
+        error = f"{type(e).__name__}: {e}"
+        logger.exception("lifespan failed")
+
+    return {
+        "ready_s": ready_s,
+        "steps": metrics_registry.get("lifespan").snapshot(),
+        "error": error,
+    }
+
+
+def print_table(title: str, header: list[str], rows: list[list]) -> None:
+    cells = [header] + [
+        [f"{value:.4f}" if isinstance(value, float) else str(value) for value in row]
+        for row in rows
+    ]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+
+    print(f"\n{title}")
+    for index, row in enumerate(cells):
+        print(
+            "  ".join(
+                cell.ljust(width) if i == 0 else cell.rjust(width)
+                for i, (cell, width) in enumerate(zip(row, widths, strict=True))
+            )
+        )
+        if index == 0:
+            print("  ".join("-" * width for width in widths))
+
+
+def profile_startup(modules: list[str], output: str, with_lifespan: bool) -> dict:
+    imports = profile_imports(modules)
+    action_modules = profile_action_modules(modules)
+    lifespan = asyncio.run(profile_lifespan()) if with_lifespan else None
+
+    report = {
+        "created_at": time.time(),
+        "python": platform.python_version(),
+        "imports": imports,
+        "action_modules": action_modules,
+        "lifespan": lifespan,
+    }
+
+    by_name = {entry["module"]: entry for entry in imports}
+    print_table(
+        "action modules",
+        ["module", "self s", "cumulative s", "in-process s", "rss MB"],
+        [
+            [
+                entry["module"],
+                by_name.get(entry["module"], {}).get("self_s", 0.0),
+                by_name.get(entry["module"], {}).get("cumulative_s", 0.0),
+                entry["import_s"],
+                entry["rss_mb"],
+            ]
+            for entry in action_modules
+        ],
+    )
+
+    dependencies = sorted(imports, key=lambda entry: entry["self_s"], reverse=True)
+    print_table(
+        f"top {TOP_DEPENDENCIES} modules by self import time",
+        ["module", "self s", "cumulative s"],
+        [
+            [entry["module"], entry["self_s"], entry["cumulative_s"]]
+            for entry in dependencies[:TOP_DEPENDENCIES]
+        ],
+    )
+
+    if lifespan is not None:
+        print_table(
+            "lifespan",
+            ["step", "s"],
+            [[step, value] for step, value in lifespan["steps"].items()]
+            + [["ready", lifespan["ready_s"]]],
+        )
+        if lifespan["error"]:
+            print(f"lifespan failed: {lifespan['error']}")
+
+    Path(output).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"\nwrote {output}")
+    return report
@@ -0,0 +1,56 @@
+import asyncio
+from collections.abc import Callable
+from contextlib import asynccontextmanager
+
+import pytest
+
+# (tag, command) -> bytes to send back, or None to never answer; a reply not
+# ending in CRLF is cut short, the server closes the connection after it
+Respond = Callable[[bytes, bytes], bytes | None]
+
+
+def default_respond(tag: bytes, command: bytes) -> bytes | None:
+    name = command.split(b" ", 1)[0].upper()
+    if name == b"SELECT":
+        return b"* 3 EXISTS\r\n* OK [UIDVALIDITY 1] ok\r\n" + tag + b" OK done\r\n"
+    if name == b"LOGOUT":
+        return b"* BYE bye\r\n" + tag + b" OK done\r\n"
+    return tag + b" OK done\r\n"
+
+
+@asynccontextmanager
+async def serve_imap(respond: Respond = default_respond):
+    """A local plain-TCP IMAP server answering commands with `respond`.
+
+    Yields the list of received commands and the port.
+    """
+    commands: list[bytes] = []
+
+    async def handle(reader, writer):
+        writer.write(b"* OK ready\r\n")
+        while line := await reader.readline():
+            tag, _, command = line.strip().partition(b" ")
+            commands.append(command)
+            reply = respond(tag, command)
+            if reply is not None:
+                writer.write(reply)
+                await writer.drain()
+                if not reply.endswith(b"\r\n"):
+                    break
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    try:
+        yield commands, server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+
+
+@pytest.fixture
+def imap_server():
+    return serve_imap
+
+
+@pytest.fixture
+def imap_replies():
+    return default_respond
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from agnia_smart_digest.action.backend.aioimap import ImapAbort, ImapClient, ImapError
+from agnia_smart_digest.action.backend.imap_fetch import parse_fetch_response
+
+
+async def connect(port: int) -> ImapClient:
+    return await ImapClient("127.0.0.1", port, use_ssl=False, timeout=2).connect()
+
+
+def test_fetch_reads_literals(imap_server):
+    def respond(tag, command):
+        return (
+            b"* 1 FETCH (UID 7 BODY[1] {7}\r\nhi\r\nyou BODY[2] {0}\r\n)\r\n"
+            + tag
+            + b" OK done\r\n"
+        )
+
+    async def run():
+        async with imap_server(respond) as (_, port):
+            mail = await connect(port)
+            typ, data = await mail.uid("FETCH", "7", "(BODY.PEEK[1] BODY.PEEK[2])")
+            await mail.close()
+        return typ, data
+
+    typ, data = asyncio.run(run())
+    assert typ == "OK"
+    assert parse_fetch_response(data) == {
+        b"7": {"UID": b"7", "BODY[1]": b"hi\r\nyou", "BODY[2]": b""}
+    }
+
+
+def test_bad_response_keeps_connection(imap_server):
+    def respond(tag, command):
+        if command.startswith(b"SEARCH"):
+            return tag + b" BAD unknown criteria\r\n"
+        return tag + b" OK done\r\n"
+
+    async def run():
+        async with imap_server(respond) as (_, port):
+            mail = await connect(port)
+            with pytest.raises(ImapError) as error:
+                await mail.search("NONSENSE")
+            assert not isinstance(error.value, ImapAbort)
+            assert not mail.broken
+            assert (await mail.noop())[0] == "OK"
+            await mail.close()
+
+    asyncio.run(run())
+
+
+def test_cancelled_command_breaks_connection(imap_server):
+    def respond(tag, command):
+        # NOOP is never answered, the client gives up on it
+        return None if command == b"NOOP" else tag + b" OK done\r\n"
+
+    async def run():
+        async with imap_server(respond) as (_, port):
+            mail = await connect(port)
+            command = asyncio.create_task(mail.noop())
+            await asyncio.sleep(0.05)
+            command.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await command
+
+            # the NOOP reply may still arrive, nothing may read it as its own
+            assert mail.broken
+            with pytest.raises(ImapAbort):
+                await mail.noop()
+            await mail.close()
+
+    asyncio.run(run())
+
+
+def test_closed_connection_aborts(imap_server):
+    def respond(tag, command):
+        return b"* 1 FETCH (UID 1 BODY[1] {100}\r\ncut short"
+
+    async def run():
+        async with imap_server(respond) as (_, port):
+            mail = await connect(port)
+            # the server goes away in the middle of the literal
+            with pytest.raises(ImapAbort):
+                await mail.fetch("1", "(BODY[1])")
+            assert mail.broken
+            await mail.close()
+
+    asyncio.run(run())
+
+
+def test_bye_breaks_connection(imap_server):
+    def respond(tag, command):
+        return b"* BYE shutting down\r\n" + tag + b" OK done\r\n"
+
+    async def run():
+        async with imap_server(respond) as (_, port):
+            mail = await connect(port)
+            with pytest.raises(ImapAbort):
+                await mail.noop()
+            assert mail.broken
+            await mail.close()
+
+    asyncio.run(run())
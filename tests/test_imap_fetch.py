@@ -0,0 +1,77 @@
+from agnia_smart_digest.action.backend.imap_fetch import (
+    decode_part,
+    parse_fetch_response,
+    text_parts,
+)
+
+PLAIN = b'("text" "plain" ("charset" "utf-8") NIL NIL "quoted-printable" 120 4 NIL NIL)'
+HTML = b'("text" "html" ("charset" "windows-1251") NIL NIL "base64" 900 12 NIL NIL)'
+PDF = (
+    b'("application" "pdf" ("name" "report.pdf") NIL NIL "base64" 50000 NIL'
+    b' ("attachment" ("filename" "report.pdf")))'
+)
+IMAGE = b'("image" "png" NIL "<logo>" NIL "base64" 4000 NIL ("inline" NIL))'
+
+
+def structure(body: bytes) -> list:
+    (fields,) = parse_fetch_response(
+        [b"* 1 FETCH (UID 1 BODYSTRUCTURE " + body + b")"]
+    ).values()
+    return fields["BODYSTRUCTURE"]
+
+
+def sections(body: bytes) -> list[tuple[str, str]]:
+    return [(part.section, part.subtype) for part in text_parts(structure(body))]
+
+
+def test_single_part():
+    (part,) = text_parts(structure(PLAIN))
+    assert (part.section, part.charset, part.encoding, part.size) == (
+        "1",
+        "utf-8",
+        "quoted-printable",
+        120,
+    )
+
+
+def test_alternative_prefers_plain_text():
+    assert sections(b"(" + HTML + PLAIN + b' "alternative")') == [("2", "plain")]
+    assert sections(b"(" + HTML + b' "alternative")') == [("1", "html")]
+
+
+def test_attachments_are_skipped():
+    mixed = b"((" + HTML + PLAIN + b' "alternative")' + PDF + b' "mixed")'
+    assert sections(mixed) == [("1.2", "plain")]
+
+
+def test_related_keeps_its_root():
+    related = b"(" + HTML + IMAGE + PLAIN + b' "related")'
+    assert sections(related) == [("1", "html")]
+
+
+def test_forwarded_message():
+    inner = b"(" + PLAIN + HTML + b' "alternative")'
+    forwarded = b'("message" "rfc822" NIL NIL NIL "7bit" 2000 NIL ' + inner + b" 40)"
+    assert sections(b"(" + PLAIN + forwarded + b' "mixed")') == [
+        ("1", "plain"),
+        ("2.1", "plain"),
+    ]
+
+
+def test_literal_in_structure():
+    # servers send a parameter as a literal when it has quotes in it
+    data = [
+        (b'* 1 FETCH (UID 1 BODYSTRUCTURE ("text" "plain" ("name" {5}', b'a"b.t'),
+        b') NIL NIL "7bit" 10 1 NIL NIL))',
+    ]
+    (fields,) = parse_fetch_response(data).values()
+    (part,) = text_parts(fields["BODYSTRUCTURE"])
+    assert part.section == "1"
+
+
+def test_decode_truncated_parts():
+    # a base64 quantum, a quoted-printable escape and a character cut short
+    assert decode_part(b"aGVsbG8gd29y\r\nbGQ=aGk", "base64", "utf-8") == "hello world"
+    assert decode_part(b"caf=C3=A9 =E2=8", "quoted-printable", "utf-8") == "café "
+    assert decode_part("naïve".encode()[:3], "8bit", "utf-8") == "na"
+    assert decode_part(b"plain", "7bit", "no-such-charset") == "plain"
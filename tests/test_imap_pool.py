@@ -0,0 +1,126 @@
+import asyncio
+import functools
+
+import pytest
+
+from agnia_smart_digest.action.backend import imap_pool
+from agnia_smart_digest.action.backend.aioimap import ImapAbort, ImapClient
+
+
+@pytest.fixture(autouse=True)
+def plain_tcp(monkeypatch):
+    monkeypatch.setattr(
+        imap_pool, "ImapClient", functools.partial(ImapClient, use_ssl=False)
+    )
+
+
+def make_pool(port: int, idle_timeout: float = 60) -> imap_pool.ImapPool:
+    return imap_pool.ImapPool(
+        "127.0.0.1",
+        port,
+        max_connections=2,
+        idle_timeout=idle_timeout,
+        reap_interval=0.02,
+        noop_after=60,
+        timeout=2,
+    )
+
+
+def logins(commands: list[bytes]) -> int:
+    return sum(command.startswith(b"LOGIN") for command in commands)
+
+
+def test_connection_is_reused(imap_server):
+    async def run():
+        async with imap_server() as (commands, port):
+            pool = make_pool(port)
+            for _ in range(3):
+                async with pool.connection("me@example.com", "secret") as mail:
+                    await mail.noop()
+            await pool.close()
+        return commands
+
+    assert logins(asyncio.run(run())) == 1
+
+
+def test_failed_block_drops_connection(imap_server):
+    async def run():
+        async with imap_server() as (commands, port):
+            pool = make_pool(port)
+            with pytest.raises(ValueError):
+                async with pool.connection("me@example.com", "secret") as mail:
+                    raise ValueError
+            assert mail.broken
+
+            async with pool.connection("me@example.com", "secret") as other:
+                assert other is not mail
+            await pool.close()
+        return commands
+
+    assert logins(asyncio.run(run())) == 2
+
+
+def test_cancelled_command_is_not_reused(imap_server, imap_replies):
+    def respond(tag, command):
+        # the first NOOP is never answered, the caller gives up on it
+        if command == b"NOOP" and not answered:
+            answered.append(tag)
+            return None
+        return imap_replies(tag, command)
+
+    answered: list[bytes] = []
+
+    async def run():
+        async with imap_server(respond) as (commands, port):
+            pool = make_pool(port)
+
+            async def noop():
+                async with pool.connection("me@example.com", "secret") as mail:
+                    return await mail.noop()
+
+            with pytest.raises(TimeoutError):
+                await asyncio.wait_for(noop(), 0.05)
+            assert await noop() == ("OK", [b"done"])
+            await pool.close()
+        return commands
+
+    assert logins(asyncio.run(run())) == 2
+
+
+def test_run_reconnects_once(imap_server):
+    async def run():
+        async with imap_server() as (commands, port):
+            pool = make_pool(port)
+            calls = []
+
+            async def func(mail):
+                calls.append(mail)
+                if len(calls) == 1:
+                    await mail.close()
+                    raise ImapAbort("connection lost")
+                return await mail.noop()
+
+            assert await pool.run("me@example.com", "secret", func) == (
+                "OK",
+                [b"done"],
+            )
+            await pool.close()
+        return commands, calls
+
+    commands, calls = asyncio.run(run())
+    assert logins(commands) == 2
+    assert calls[0] is not calls[1]
+
+
+def test_reaper_logs_out_idle_connections(imap_server):
+    async def run():
+        async with imap_server() as (commands, port):
+            pool = make_pool(port, idle_timeout=0.05)
+            pool.start()
+            async with pool.connection("me@example.com", "secret"):
+                pass
+            await asyncio.sleep(0.2)
+            assert b"LOGOUT" in commands
+            await pool.close()
+
+    asyncio.run(run())